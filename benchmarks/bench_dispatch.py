@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+"""
+Measures the per-task dispatch overhead of running no-op tasks with a new process per task
+(ProcessExecutor, the parallelize_process model) versus the persistent WorkerPool.
+
+Usage::
+
+    python benchmarks/bench_dispatch.py [TASKS] [JOBS]
+
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# noinspection PyPep8
+from herring.parallelize import ProcessExecutor
+# noinspection PyPep8
+from herring.support.simple_logger import Logger
+# noinspection PyPep8
+from herring.task_scheduler import TaskScheduler
+# noinspection PyPep8
+from herring.task_with_args import HerringTasks, TaskWithArgs
+# noinspection PyPep8
+from herring.worker_pool import WorkerPool
+
+__docformat__ = 'restructuredtext en'
+
+
+def make_tasks(count):
+    """
+    Register no-op tasks.
+
+    :param count: the number of tasks
+    :type count: int
+    :return: dict where key is task name and value is an empty set of dependencies
+    :rtype: dict
+    """
+    depend_dict = {}
+    for index in range(count):
+        def noop():
+            """no-op"""
+            return 0
+        noop.__name__ = 'noop{index}'.format(index=index)
+        TaskWithArgs()(noop)
+        depend_dict[noop.__name__] = set()
+    return depend_dict
+
+
+def measure(depend_dict, executor, jobs):
+    """
+    :return: the mean wall time per task in milliseconds
+    :rtype: float
+    """
+    start = time.perf_counter()
+    TaskScheduler(depend_dict).run(executor, jobs=jobs)
+    return (time.perf_counter() - start) * 1000.0 / len(depend_dict)
+
+
+def main():
+    """benchmark entry point"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    Logger.set_verbose(False)
+    depend_dict = make_tasks(count)
+
+    per_process = measure(depend_dict, ProcessExecutor(lambda name: HerringTasks[name]['task']), jobs)
+
+    pool = WorkerPool(jobs)
+    try:
+        pooled = measure(depend_dict, pool, jobs)
+    finally:
+        pool.close()
+
+    print("tasks: {count}, jobs: {jobs}".format(count=count, jobs=jobs))
+    print("process per task: {ms:8.3f} ms/task".format(ms=per_process))
+    print("worker pool:      {ms:8.3f} ms/task".format(ms=pooled))
+
+
+if __name__ == '__main__':
+    main()
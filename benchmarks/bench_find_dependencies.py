@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+"""
+Measures the time to find the dependency closure (HerringRunner._find_dependencies) of the tasks in
+generated dependency graphs, comparing the original recursive, list based implementation with the
+iterative, set based one.  Each generated task depends on up to 3 random earlier tasks, the "chain"
+graphs are a single dependency chain.  The recursive implementation is skipped where it would exceed
+the recursion limit or take too long.
+
+Usage::
+
+    python benchmarks/bench_find_dependencies.py [SIZES...]
+
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# noinspection PyPep8
+from herring.herring_runner import HerringRunner
+
+__docformat__ = 'restructuredtext en'
+
+# the largest graph the recursive implementation is measured on
+RECURSIVE_LIMIT = 10000
+
+
+def recursive_find_dependencies(src_tasks, herring_tasks):
+    """
+    The original implementation, for comparison.
+    """
+    dependencies = []
+    for name in src_tasks:
+        if name not in dependencies:
+            dependencies.append(name)
+            depend_tasks = herring_tasks[name]['depends']
+            tasks = recursive_find_dependencies([task_ for task_ in depend_tasks if task_ not in dependencies],
+                                                herring_tasks)
+            dependencies.extend(tasks)
+    return dependencies
+
+
+def random_graph(count):
+    """
+    :return: tasks dict where each task depends on up to 3 earlier tasks
+    :rtype: dict
+    """
+    rand = random.Random(count)
+    return dict(('task%d' % index,
+                 {'depends': ['task%d' % rand.randrange(index) for _ in range(min(index, rand.randint(0, 3)))]})
+                for index in range(count))
+
+
+def chain_graph(count):
+    """
+    :return: tasks dict where each task depends on the previous task
+    :rtype: dict
+    """
+    return dict(('task%d' % index, {'depends': ['task%d' % (index - 1)] if index else []}) for index in range(count))
+
+
+def measure(function, src_tasks, herring_tasks):
+    """
+    :return: the wall time in milliseconds
+    :rtype: float
+    """
+    start = time.perf_counter()
+    function(src_tasks, herring_tasks)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def main():
+    """benchmark entry point"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    print("{graph:>8s} {tasks:>8s} {recursive:>14s} {iterative:>14s}".format(graph='graph', tasks='tasks',
+                                                                            recursive='recursive ms',
+                                                                            iterative='iterative ms'))
+    for kind, make_graph in (('random', random_graph), ('chain', chain_graph)):
+        for count in sizes:
+            herring_tasks = make_graph(count)
+            # every task is asked for, like running all of the generated matrix tasks
+            src_tasks = list(herring_tasks.keys())
+            if kind == 'chain':
+                src_tasks.reverse()
+            recursive = '-'
+            if count <= RECURSIVE_LIMIT and (kind == 'random' or count < sys.getrecursionlimit() - 100):
+                recursive = '{ms:14.1f}'.format(ms=measure(recursive_find_dependencies, src_tasks, herring_tasks))
+            # a new runner and tasks dict so the memoized closure is not reused
+            iterative = measure(HerringRunner()._find_dependencies, src_tasks, dict(herring_tasks))
+            print("{graph:>8s} {tasks:8d} {recursive:>14s} {iterative:14.1f}".format(graph=kind, tasks=count,
+                                                                                   recursive=recursive,
+                                                                                   iterative=iterative))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# coding=utf-8
+
+"""
+Measures the memory used by the HerringTasks records and the time to list the tasks (herring -T and -D
+with the output discarded) for generated task sets, comparing the original per task dictionaries and
+listing (copying each task into a dictionary then a 7-tuple, looking up the terminal size and wrapping
+every row) with the TaskSpec records and listing.
+
+The tasks are registered with the @task decorator, in namespaces of 100 tasks, each with a docstring and
+depending on up to 3 earlier tasks.
+
+Usage::
+
+    python benchmarks/bench_task_specs.py [SIZES...]
+
+"""
+import io
+import os
+import random
+import sys
+import textwrap
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from operator import itemgetter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# noinspection PyPep8
+from herring.herring_app import HerringApp
+# noinspection PyPep8
+from herring.herring_cli import HerringCLI, ROW_FORMAT
+# noinspection PyPep8
+from herring.support.simple_logger import Logger, info
+# noinspection PyPep8
+from herring.support.terminalsize import get_terminal_size
+# noinspection PyPep8
+from herring.task_spec import TaskSpec
+# noinspection PyPep8
+from herring.task_with_args import HerringTasks, NameSpace, TaskWithArgs
+
+__docformat__ = 'restructuredtext en'
+
+ROW = "{tasks:8d} {records:>8s} {memory:10.1f} {names:10.1f} {depends:10.1f}"
+
+
+class Settings(object):
+    """the listing settings"""
+    json = False
+
+
+def register_tasks(count):
+    """
+    Register the generated tasks into HerringTasks.
+    """
+    rand = random.Random(count)
+    names = []
+    for index in range(count):
+        namespace = 'group%d' % (index // 100)
+        depends = sorted(set(names[rand.randrange(index)] for _ in range(min(index, rand.randint(0, 3)))))
+        with NameSpace(namespace):
+            source = 'def task{index}():\n    """generated task {index}"""\n'.format(index=index)
+            scope = {}
+            exec(source, scope)
+            function = scope['task%d' % index]
+            TaskWithArgs(depends=[depend.split('::')[1] for depend in depends
+                                  if depend.startswith(namespace + '::')])(function)
+        names.append('%s::task%d' % (namespace, index))
+
+
+def as_dicts(specs):
+    """
+    :return: the tasks as the original per task dictionaries
+    :rtype: dict
+    """
+    return dict((name, dict(spec, depends=list(spec.depends))) for name, spec in specs.items())
+
+
+def as_specs(dicts):
+    """
+    :return: the tasks as TaskSpec records
+    :rtype: dict
+    """
+    return dict((name, TaskSpec(**task)) for name, task in dicts.items())
+
+
+def traced(function, *args):
+    """
+    :return: the result and the memory it allocated in bytes
+    :rtype: tuple
+    """
+    tracemalloc.start()
+    result = function(*args)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, memory
+
+
+def original_tasks_list(herring_tasks):
+    """
+    The original HerringApp._get_tasks_list and _get_tasks, for comparison.
+    """
+    task_list = []
+    for task_name in herring_tasks.keys():
+        description = herring_tasks[task_name]['description']
+        private = herring_tasks[task_name]['private']
+        configured = herring_tasks[task_name]['configured']
+        if not private and description is not None and configured in ('required', 'optional'):
+            task_list.append({'name': task_name,
+                              'description': str(description),
+                              'dependencies': herring_tasks[task_name]['depends'],
+                              'dependent_of': herring_tasks[task_name]['dependent_of'],
+                              'kwargs': herring_tasks[task_name]['kwargs'],
+                              'arg_prompt': herring_tasks[task_name]['arg_prompt']})
+    width = len(max([item['name'] for item in task_list], key=len))
+    for item in sorted(task_list, key=itemgetter('name')):
+        yield(item['name'], item['description'], item['dependencies'], item['dependent_of'], item['kwargs'],
+              item['arg_prompt'], width)
+
+
+def original_row(name, description, dependencies=None, dependent_of=None, max_name_length=20):
+    """
+    The original HerringCLI._row and _row_list, for comparison.
+    """
+    (console_width, console_height) = get_terminal_size()
+    c1_width = max_name_length + 8
+    c2_width = console_width - 5 - c1_width
+    rows = [('herring ' + name, description)]
+    if dependencies:
+        rows.append(('', 'depends: ' + repr(dependencies)))
+    if dependent_of is not None:
+        rows.append(('', 'dependent_of: ' + dependent_of))
+    for c1_value, c2_value in rows:
+        values = textwrap.fill(c2_value, c2_width).split("\n")
+        info(ROW_FORMAT.format(c1_value, values[0], width1=c1_width, width2=c2_width))
+        for line in values[1:]:
+            info(ROW_FORMAT.format(' ', line, width1=c1_width, width2=c2_width))
+
+
+def original_show_tasks(cli, tasks, herring_tasks):
+    """
+    The original HerringCLI.show_tasks, for comparison.
+    """
+    cli._header("Show tasks")
+    for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
+        original_row(name, description.strip().splitlines()[0], max_name_length=width)
+    cli._footer(herring_tasks)
+
+
+def original_show_depends(cli, tasks, herring_tasks):
+    """
+    The original HerringCLI.show_depends, for comparison.
+    """
+    cli._header("Show tasks and their dependencies")
+    for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
+        original_row(name, description.strip().splitlines()[0], dependencies=dependencies, dependent_of=dependent_of,
+                     max_name_length=width)
+    cli._footer(herring_tasks)
+
+
+def measure(function, *args):
+    """
+    :return: the wall time in milliseconds
+    :rtype: float
+    """
+    # the terminal size lookup prints when the output is not a terminal
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function(*args)
+        return (time.perf_counter() - start) * 1000.0
+
+
+def main():
+    """benchmark entry point"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or [20000]
+    Logger.log_outputter = {'debug': [], 'info': [io.StringIO()], 'warning': [], 'error': [], 'fatal': []}
+    app = HerringApp()
+    cli = HerringCLI()
+    settings = Settings()
+    print("{tasks:>8s} {records:>8s} {memory:>10s} {names:>10s} {depends:>10s}".format(
+        tasks='tasks', records='records', memory='records MB', names='-T ms', depends='-D ms'))
+    for count in sizes:
+        HerringTasks.clear()
+        register_tasks(count)
+        # the records are built from the same attribute values, so only the records are measured
+        dicts, dict_memory = traced(as_dicts, HerringTasks)
+        specs, spec_memory = traced(as_specs, dicts)
+
+        names = measure(lambda: original_show_tasks(cli, original_tasks_list(dicts), dicts))
+        depends = measure(lambda: original_show_depends(cli, original_tasks_list(dicts), dicts))
+        print(ROW.format(tasks=count, records='dict', memory=dict_memory / 1e6, names=names, depends=depends))
+
+        def list_specs(show):
+            show(app._get_tasks(app._get_tasks_list(specs, False, True, None)), specs, settings)
+
+        names = measure(list_specs, cli.show_tasks)
+        depends = measure(list_specs, cli.show_depends)
+        print(ROW.format(tasks=count, records='TaskSpec', memory=spec_memory / 1e6, names=names, depends=depends))
+
+
+if __name__ == '__main__':
+    main()
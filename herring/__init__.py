@@ -64,6 +64,27 @@ Task decorators can take optional keywords:
     If the task requires a command line argument and none are give, use this string to prompt the user for
     the argument.  The task can access this attribute using: task.arg_prompt
 
+:inputs:
+    A list of file glob patterns (relative to the herringfile's directory, "**" matches any number of
+    directories) for the files the task reads.  Example:  inputs=['docs/**/*.rst', 'docs/conf.py'].
+
+:outputs:
+    A list of file glob patterns for the files the task writes.  After a task with inputs or outputs
+    succeeds, the content hashes of those files are saved in .herring/state.json.  The next time, if
+    none of the files have changed (and the command line arguments are the same), the task is skipped
+    as up to date.  Use the --force flag to run the task anyway.  The outputs of a task that declares
+    both inputs and outputs are also saved in the artifact cache (~/.herring/cache), so when the same
+    inputs, arguments and task source come back (ex: switching git branches), the outputs are restored
+    instead of running the task.  Use --cache_size to limit the cache (in megabytes, 0 disables it).
+    Use --remote_cache URL to also share the cached outputs with other machines (ex: CI agents) through
+    a server such as "python -m herring.remote_cache_server".
+
+:always_run:
+    A boolean.  A task that has already succeeded in this herring invocation is not ran again when it is
+    asked for again (ex: by a task_execute('clean') call inside another task), and a task that is running
+    in another worker process is waited for instead of being ran twice at the same time.  If always_run is
+    True the task is ran every time.
+
 :configured:
     Indicates if herringfile must be filled in.  If configured is "no", then herringfile must be
     non-existent or empty for the task to be available.  If configured is "optional", then the task is always
@@ -159,13 +180,50 @@ this will run the **doc::generate_icon** task then the **doc::sphinx** task then
 
 .. note::
 
-    Herring performs a topological sort on a tasks dependencies.  This generates a list of sets of
-    tasks.  The list is executed in order.  The tasks in each set are executed in parallel
-    processes.  Output (both stdout and stderr) is captured while each task is ran then upon task
-    completion is writen to the output.
+    Herring resolves a task's dependencies into a dependency graph.  Each task is started as soon
+    as all of its own dependencies have finished, so independent tasks are executed in parallel
+    processes.  Output (both stdout and stderr, including the output of any processes the task starts)
+    is captured while each task is ran then upon task completion is writen to the output.  With
+    --output stream, each line of output is instead written as soon as the task produces it, prefixed
+    with the task name (colored when the output is a terminal, see --color).
+
+    The --jobs N option limits the number of tasks running at the same time (the default is the
+    number of CPUs).  Ready tasks beyond the limit wait until a running task finishes.  The waiting task
+    with the longest expected chain of tasks still to run after it, by the durations in the run history
+    (see --history), is started first.  Tasks without a history are expected to take --default_estimate
+    seconds.
+
+    The --start_method option selects how the task processes are started: "fork" processes inherit
+    the loaded tasks, "spawn" processes start clean then load the tasks, and "forkserver" processes
+    are forked from a clean server process that has the herringfile and herringlib preloaded.
+
+    When a task fails, the tasks that depend upon it are not ran, no more tasks are started, and herring
+    exits with a nonzero status once the running tasks finish.  With --keep_going every task that does
+    not depend upon a failed task is still ran.  With --fail_fast the running tasks are canceled.
+
+    At the end of the run herring prints the slowest tasks.  The --trace FILE option also writes the
+    queued, start and finish times, worker pid, exit code and output size of every task to FILE in the
+    Chrome trace-event JSON format (view it in chrome://tracing or https://ui.perfetto.dev).  The
+    --critical_path flag shows the chain of tasks that determined the run's wall time, the slack of every
+    other task, and the minimum wall time with unlimited workers and with --jobs.  "herring --analyze_trace
+    FILE" shows the same analysis of a saved trace.
+
+    The duration, result, host and input fingerprint of every task that is ran are added to the project's
+    run history (.herring/history.sqlite in the herringfile's directory).  "herring --history TASK" shows
+    the task's number of runs and failures, p50 and p95 durations and the trend of its recent durations.
+
+    The --progress flag shows a status line while the tasks run: the number of finished tasks, the
+    estimated time remaining from the run history and how long each running task has been running.  The
+    status line is not shown when the output is not a terminal or with --json.
 
     The --interactive flag may be used to prevent the tasks running in parallel.  Instead the tasks
-    in a set are ran in random order without buffering the output.
+    are ran one at a time, in dependency order, without buffering the output.
+
+    To avoid loading the tasks on every command, start a daemon for the project with "herring --daemon"
+    then use the "herringc" command instead of "herring".  The daemon keeps the tasks loaded and runs each
+    herringc request in a forked process using herringc's terminal, working directory and environment.
+    When the herringfile or a herringlib file changes, the daemon restarts itself.  herringc simply
+    runs herring itself when no daemon is running.  Stop the daemon with "herring --stop_daemon".
 
 
 Command Line Arguments
@@ -214,6 +272,10 @@ To show all tasks, including hidden tasks::
 
     herring --all
 
+The task listings (-T, -U and -D) are served from an index (.herring/task_index.json in the herringfile's
+directory) without importing the herringfile or herringlib modules.  The index is rebuilt whenever the
+herringfile, any herringlib file, or herring itself changes.
+
 
 Reusing Tasks
 -------------
@@ -231,9 +293,9 @@ The union is created with the first found directory being the top most.  This me
 same filename exists in multiple found directories, the version in the first found directory will
 be used.
 
-Technically herring will create a temporary directory and copy the contents from the found directories
-in the order found but not overwriting files.  Herring automatically deletes this temporary directory
-unless you tell it not to with the --leave_union_dir flag (sometimes useful for debugging).
+Technically herring installs an import hook that looks up each herringlib module in the found directories
+in the order found, without copying any files, so tracebacks show the real source files.  Sub-packages are
+merged the same way.
 
 The environment variable approach is good for using a common set of tasks among a group of projects.
 The sub-directory approach is good for using project specific tasks.
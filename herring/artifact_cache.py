@@ -0,0 +1,402 @@
+# coding=utf-8
+
+"""
+A local content-addressable store for the outputs of tasks.
+
+When a task that declares both inputs and outputs (see herring.task_state) succeeds, its output files are
+saved in the cache keyed by the task's full name, the hash of the task's source code, the hashes of its
+input files and its command line arguments.  Later, for example after switching git branches back and
+forth, if a task that is not up to date has a key that was built before, its outputs are restored from
+the cache instead of running the task.
+
+The cache lives in ~/.herring/cache::
+
+    blobs/<2 hex digits>/<sha256 digest>   gzip compressed file contents, shared by every entry
+    entries/<key>.json                     the output files (path, digest, mode) for a key
+
+An optional remote tier (see herring.remote_cache) is checked when an entry is not in the local cache, and
+the entries stored locally are also uploaded to it.
+
+An entry, whether local or from the remote cache, is only restored if every one of its paths is relative,
+stays within the herringfile's directory and matches the task's declared output patterns, so a tampered
+entry can not overwrite other files.
+
+Entries are kept in least recently used order (by the entry file's modification time, which is updated
+on every hit).  When the blobs exceed the size limit, the least recently used entries are evicted and
+then the blobs no longer used by any entry are removed.  The total size of the blobs is scanned once and
+then kept up to date as blobs are added, so storing an entry only scans the cache when it must be trimmed.
+"""
+import gzip
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import shutil
+import tempfile
+import zlib
+
+from herring.herring_file import HerringFile
+from herring.support.mkdir_p import mkdir_p
+from herring.support.simple_logger import debug, warning
+from herring.support.utils import match_globs
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('ArtifactCache',)
+
+DEFAULT_CACHE_DIR = '~/.herring/cache'
+DEFAULT_CACHE_SIZE = 1024  # megabytes
+
+
+def source_hash(function):
+    """
+    Hash the source code of a function.  If the source is not available, the function's byte code is used.
+
+    :param function: the task function
+    :type function: function
+    :return: the hex digest
+    :rtype: str
+    """
+    try:
+        source = inspect.getsource(function).encode('utf-8')
+    except (OSError, TypeError):
+        source = marshal.dumps(function.__code__)
+    return hashlib.sha256(source).hexdigest()
+
+
+class ArtifactCache(object):
+    """
+    The local artifact cache.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, size_limit=DEFAULT_CACHE_SIZE * 1024 * 1024, remote=None):
+        """
+        :param directory: the cache directory
+        :type directory: str
+        :param size_limit: the maximum size in bytes of the stored blobs
+        :type size_limit: int
+        :param remote: the remote cache tier or None for only the local cache
+        :type remote: herring.remote_cache.RemoteCache|None
+        """
+        self.directory = os.path.expanduser(directory)
+        self.size_limit = size_limit
+        self.remote = remote
+        self._blobs_dir = os.path.join(self.directory, 'blobs')
+        self._entries_dir = os.path.join(self.directory, 'entries')
+        # the total size of the blobs, None until scanned
+        self._blobs_size = None
+
+    # noinspection PyMethodMayBeStatic
+    def key(self, name, function, inputs, arguments):
+        """
+        Calculate the cache key for a task.
+
+        :param name: the task's full name
+        :type name: str
+        :param function: the task function
+        :type function: function
+        :param inputs: dict where key is an input file path and value is the file's digest
+        :type inputs: dict(str, str)
+        :param arguments: the command line arguments relevant to the task
+        :type arguments: list|dict
+        :return: the key
+        :rtype: str
+        """
+        data = json.dumps([name, source_hash(function), sorted(inputs.items()), arguments], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def _blob_path(self, digest):
+        return os.path.join(self._blobs_dir, digest[:2], digest)
+
+    def _entry_path(self, key):
+        return os.path.join(self._entries_dir, key + '.json')
+
+    def _temp_file(self, directory):
+        """
+        :return: a named temporary file in the directory, renamed into place when complete.
+        """
+        return tempfile.NamedTemporaryFile('wb', dir=mkdir_p(directory), prefix='.tmp', delete=False)
+
+    def has_blob(self, digest):
+        """
+        :param digest: the content digest
+        :type digest: str
+        :return: asserted if the blob is in the cache
+        :rtype: bool
+        """
+        return os.path.isfile(self._blob_path(digest))
+
+    def write_blob(self, digest, in_file):
+        """
+        Compress the contents of an open file into the cache as the blob with the given digest.
+
+        :param digest: the content digest
+        :type digest: str
+        :param in_file: the uncompressed contents
+        :type in_file: file
+        """
+        blob_path = self._blob_path(digest)
+        with self._temp_file(os.path.dirname(blob_path)) as temp_file:
+            with gzip.GzipFile(fileobj=temp_file, mode='wb', compresslevel=6) as out_file:
+                shutil.copyfileobj(in_file, out_file)
+        os.replace(temp_file.name, blob_path)
+        self._added_blob(blob_path)
+
+    def _added_blob(self, blob_path):
+        """
+        Count a new blob in the total size of the blobs.
+
+        :param blob_path: the blob's path
+        :type blob_path: str
+        """
+        if self._blobs_size is not None:
+            self._blobs_size += os.path.getsize(blob_path)
+
+    def _receive_blob(self, digest, chunks):
+        """
+        Save a compressed blob downloaded from the remote cache, verifying its contents as it is streamed.
+
+        :param digest: the content digest
+        :type digest: str
+        :param chunks: the compressed contents
+        :type chunks: iterator(bytes)
+        :return: asserted if the blob is valid and was saved
+        :rtype: bool
+        """
+        blob_path = self._blob_path(digest)
+        content_hash = hashlib.sha256()
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            temp_file = self._temp_file(os.path.dirname(blob_path))
+        except (IOError, OSError) as ex:
+            debug("can not save remote blob {digest}: {err}".format(digest=digest, err=str(ex)))
+            return False
+        try:
+            with temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+                    content_hash.update(decompressor.decompress(chunk))
+                content_hash.update(decompressor.flush())
+            if content_hash.hexdigest() == digest:
+                os.replace(temp_file.name, blob_path)
+                self._added_blob(blob_path)
+                return True
+            debug("corrupt remote blob {digest}".format(digest=digest))
+        except (IOError, OSError, zlib.error) as ex:
+            debug("can not save remote blob {digest}: {err}".format(digest=digest, err=str(ex)))
+        try:
+            os.remove(temp_file.name)
+        except OSError:
+            pass
+        return False
+
+    def _fetch(self, key):
+        """
+        Copy an entry and its missing blobs from the remote cache into the local cache.
+
+        :param key: the cache key
+        :type key: str
+        :return: the entry's list of [path, digest, mode] or None if not in the remote cache
+        :rtype: list|None
+        """
+        files = self.remote.get_entry(key)
+        if files is None:
+            return None
+        missing = sorted(set(digest for path, digest, mode in files if not self.has_blob(digest)))
+        if not self.remote.get_blobs(missing, self._receive_blob):
+            return None
+        self.write_entry(key, files)
+        return files
+
+    def read_entry(self, key):
+        """
+        Get an entry and mark it as recently used.
+
+        :param key: the cache key
+        :type key: str
+        :return: the entry's list of [path, digest, mode] or None if not in the cache
+        :rtype: list|None
+        """
+        files = self._load_entry(key)
+        if files is not None:
+            try:
+                os.utime(self._entry_path(key))
+            except OSError:
+                pass
+        return files
+
+    def _load_entry(self, key):
+        """
+        :param key: the cache key
+        :type key: str
+        :return: the entry's list of [path, digest, mode] or None if not in the cache
+        :rtype: list|None
+        """
+        try:
+            with open(self._entry_path(key)) as entry_file:
+                return json.load(entry_file)['files']
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+    def write_entry(self, key, files):
+        """
+        Save an entry.  The entry's blobs must already be in the cache.
+
+        :param key: the cache key
+        :type key: str
+        :param files: list of [path, digest, mode]
+        :type files: list
+        """
+        with self._temp_file(self._entries_dir) as temp_file:
+            temp_file.write(json.dumps({'files': files}).encode('utf-8'))
+        os.replace(temp_file.name, self._entry_path(key))
+
+    def restore(self, key, patterns, root=None):
+        """
+        Restore the output files for the key.
+
+        :param key: the cache key
+        :type key: str
+        :param patterns: the task's output glob patterns, every file of the entry must match one of them
+        :type patterns: list(str)
+        :param root: the directory the files must be within, the default is the herringfile's directory
+        :type root: str|None
+        :return: asserted if the key was in the cache and the files were restored
+        :rtype: bool
+        """
+        files = self.read_entry(key)
+        if files is None and self.remote is not None:
+            files = self._fetch(key)
+        if files is None or not all(self.has_blob(digest) for path, digest, mode in files):
+            return False
+        if not self._allowed(files, patterns, root or HerringFile.directory or os.getcwd()):
+            warning("Not restoring {key}: the entry has files that are not outputs of the task".format(key=key))
+            return False
+        try:
+            for path, digest, mode in files:
+                self._restore_file(path, digest, mode)
+        except (IOError, OSError) as ex:
+            debug("can not restore {key}: {err}".format(key=key, err=str(ex)))
+            return False
+        return True
+
+    # noinspection PyMethodMayBeStatic
+    def _allowed(self, files, patterns, root):
+        """
+        :param files: the entry's list of [path, digest, mode]
+        :type files: list
+        :param patterns: the task's output glob patterns
+        :type patterns: list(str)
+        :param root: the directory the files must be within
+        :type root: str
+        :return: asserted if every path is relative, within the root and matches one of the patterns
+        :rtype: bool
+        """
+        root = os.path.realpath(root)
+        for path, digest, mode in files:
+            if not isinstance(path, str) or os.path.isabs(path) or not match_globs(path, patterns):
+                return False
+            if os.path.commonpath([root, os.path.realpath(path)]) != root:
+                return False
+        return True
+
+    def _restore_file(self, path, digest, mode):
+        """
+        Decompress a blob into place.
+
+        :param path: the output file path
+        :type path: str
+        :param digest: the content digest
+        :type digest: str
+        :param mode: the file's permission bits
+        :type mode: int
+        """
+        with gzip.open(self._blob_path(digest), 'rb') as in_file:
+            with self._temp_file(os.path.dirname(os.path.abspath(path))) as temp_file:
+                shutil.copyfileobj(in_file, temp_file)
+        os.chmod(temp_file.name, mode)
+        os.replace(temp_file.name, path)
+
+    def store(self, key, outputs):
+        """
+        Save the output files for the key.
+
+        :param key: the cache key
+        :type key: str
+        :param outputs: dict where key is an output file path and value is the file's digest
+        :type outputs: dict(str, str)
+        """
+        files = []
+        for path, digest in sorted(outputs.items()):
+            if not self.has_blob(digest):
+                with open(path, 'rb') as in_file:
+                    self.write_blob(digest, in_file)
+            files.append([path, digest, os.stat(path).st_mode & 0o7777])
+        self.write_entry(key, files)
+        if self.remote is not None:
+            self.remote.put(key, files, self._blob_path)
+        self.evict()
+
+    def close(self):
+        """
+        Finish uploading to the remote cache.
+        """
+        if self.remote is not None:
+            self.remote.drain()
+
+    def _scan(self, directory):
+        """
+        :return: list of os.DirEntry for the files in the directory tree, excluding temporary files
+        :rtype: list
+        """
+        entries = []
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if entry.is_dir():
+                    entries.extend(self._scan(entry.path))
+                elif not entry.name.startswith('.'):
+                    entries.append(entry)
+        return entries
+
+    def evict(self):
+        """
+        Evict the least recently used entries until the blobs fit in the size limit.  The entries are sorted
+        once, then evicted from the oldest, each eviction only releasing the blobs of the evicted entry.
+        """
+        if self._blobs_size is not None and self._blobs_size <= self.size_limit:
+            return
+        blobs = dict((entry.name, entry.stat().st_size) for entry in self._scan(self._blobs_dir))
+        self._blobs_size = sum(blobs.values())
+        if self._blobs_size <= self.size_limit:
+            return
+        entries = sorted(self._scan(self._entries_dir), key=lambda entry_: entry_.stat().st_mtime)
+        # the number of entries using each blob
+        references = {}
+        digests = {}
+        for entry in entries:
+            key = entry.name[:-len('.json')]
+            digests[key] = set(digest for path, digest, mode in self._load_entry(key) or [])
+            for digest in digests[key]:
+                references[digest] = references.get(digest, 0) + 1
+        size = sum(blobs.get(digest, 0) for digest in references)
+        for entry in entries:
+            if size <= self.size_limit:
+                break
+            key = entry.name[:-len('.json')]
+            debug("evicting {key}".format(key=key))
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+            for digest in digests[key]:
+                references[digest] -= 1
+                if not references[digest]:
+                    del references[digest]
+                    size -= blobs.get(digest, 0)
+        for digest in blobs:
+            if digest not in references:
+                try:
+                    os.remove(self._blob_path(digest))
+                except OSError:
+                    pass
+        self._blobs_size = size
@@ -0,0 +1,189 @@
+# coding=utf-8
+
+"""
+Critical path analysis of a herring run.
+
+Given the dependency graph of the tasks that ran and their measured durations, the analysis finds:
+
+* the critical path - the chain of dependent tasks with the longest total duration.  No matter how many
+  workers are available the run can not finish sooner, so these are the tasks to optimize first,
+* the slack of every other task - how much longer the task could have taken without delaying the run,
+* the minimum wall time with unlimited workers (the length of the critical path) and the wall time
+  with the --jobs setting, estimated by scheduling the tasks on that many workers, longest remaining
+  path first.
+
+The analysis is made from the TaskTimeline of the current run (herring --critical_path ...) or offline
+from a saved --trace file (herring --analyze_trace FILE).
+"""
+import heapq
+import json
+
+from herring.support.toposort import DependencyGraph
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('CriticalPathAnalysis',)
+
+# durations closer than this are equal
+EPSILON = 1e-6
+
+
+class CriticalPathAnalysis(object):
+    """
+    The critical path, slack and minimum wall times of a run.
+    """
+
+    def __init__(self, durations, depends, jobs=None, wall_time=None):
+        """
+        :param durations: the duration in seconds of each task
+        :type durations: dict
+        :param depends: the names of the tasks each task depends upon, tasks without a duration are ignored
+        :type depends: dict
+        :param jobs: the --jobs setting of the run, None for no limit
+        :type jobs: int|None
+        :param wall_time: the measured wall time of the run in seconds
+        :type wall_time: float|None
+        """
+        self.durations = dict(durations)
+        self.depends = dict((name, set(depend for depend in depends.get(name, ()) if depend in self.durations))
+                            for name in self.durations)
+        self.jobs = jobs
+        self.wall_time = wall_time
+        graph = DependencyGraph(self.depends)
+        self._dependents = graph.dependents
+        self._order = list(graph.order())
+        self.earliest_start = {}
+        for name in self._order:
+            self.earliest_start[name] = max([self.earliest_start[depend] + self.durations[depend]
+                                             for depend in self.depends[name]] or [0.0])
+        # the longest chain of durations from the start of each task to the end of the run
+        self.remaining = {}
+        for name in reversed(self._order):
+            self.remaining[name] = self.durations[name] + max([self.remaining[dependent]
+                                                                for dependent in self._dependents[name]] or [0.0])
+        self.minimum_wall_time = max(self.remaining.values() or [0.0])
+        self.slack = dict((name, max(0.0, self.minimum_wall_time - self.earliest_start[name] - self.remaining[name]))
+                          for name in self._order)
+
+    @classmethod
+    def from_timeline(cls, timeline, jobs=None):
+        """
+        :param timeline: the timeline of the run
+        :type timeline: herring.task_timing.TaskTimeline
+        :param jobs: the --jobs setting of the run
+        :type jobs: int|None
+        :return: the analysis of the finished tasks, the last run of a task that ran more than once
+        :rtype: CriticalPathAnalysis
+        """
+        durations = {}
+        depends = {}
+        timings = timeline.completed()
+        for timing in timings:
+            durations[timing.name] = timing.duration
+            depends[timing.name] = timing.depends
+        wall_time = None
+        if timings:
+            wall_time = max(timing.finished for timing in timings) - min(timing.queued for timing in timings)
+        return cls(durations, depends, jobs=jobs, wall_time=wall_time)
+
+    @classmethod
+    def from_trace(cls, trace):
+        """
+        :param trace: a Chrome trace-event object written by --trace
+        :type trace: dict
+        :return: the analysis of the tasks in the trace
+        :rtype: CriticalPathAnalysis
+        """
+        durations = {}
+        depends = {}
+        start = None
+        end = None
+        for event in trace.get('traceEvents', []):
+            if event.get('ph') != 'X' or event.get('cat') != 'task':
+                continue
+            durations[event['name']] = event['dur'] / 1e6
+            depends[event['name']] = event.get('args', {}).get('depends', [])
+            queued = event.get('args', {}).get('queued', event['ts'])
+            start = queued if start is None else min(start, queued)
+            end = max(end or 0, event['ts'] + event['dur'])
+        wall_time = None if start is None else (end - start) / 1e6
+        return cls(durations, depends, jobs=trace.get('otherData', {}).get('jobs'), wall_time=wall_time)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: the path of a --trace file
+        :type path: str
+        :return: the analysis of the tasks in the trace file
+        :rtype: CriticalPathAnalysis
+        """
+        with open(path) as trace_file:
+            return cls.from_trace(json.load(trace_file))
+
+    def critical_path(self):
+        """
+        :return: the task names on the critical path, in the order they ran
+        :rtype: list(str)
+        """
+        path = []
+        candidates = [name for name in self._order if not self.depends[name]]
+        while candidates:
+            name = max(candidates, key=lambda name_: self.remaining[name_])
+            path.append(name)
+            rest = self.remaining[name] - self.durations[name]
+            candidates = [dependent for dependent in self._dependents[name]
+                          if abs(self.remaining[dependent] - rest) < EPSILON]
+        return path
+
+    def simulated_wall_time(self, jobs=None):
+        """
+        Estimate the wall time when the tasks are ran by the given number of workers, each ready task being
+        started as soon as a worker is free, the task with the longest remaining path first.
+
+        :param jobs: the number of workers, None for the jobs setting of the run
+        :type jobs: int|None
+        :return: the estimated wall time in seconds
+        :rtype: float
+        """
+        jobs = jobs or self.jobs
+        if not jobs:
+            return self.minimum_wall_time
+        in_degree = dict((name, len(self.depends[name])) for name in self._order)
+        ready = [(-self.remaining[name], name) for name, count in in_degree.items() if count == 0]
+        heapq.heapify(ready)
+        running = []
+        now = 0.0
+        while ready or running:
+            while ready and len(running) < jobs:
+                name = heapq.heappop(ready)[1]
+                heapq.heappush(running, (now + self.durations[name], name))
+            now, name = heapq.heappop(running)
+            for dependent in self._dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    heapq.heappush(ready, (-self.remaining[dependent], dependent))
+        return now
+
+    def report(self):
+        """
+        :return: the lines of the analysis report, empty if no tasks finished
+        :rtype: list(str)
+        """
+        if not self.durations:
+            return []
+        path = self.critical_path()
+        lines = ["Critical path ({time:.3f}s): {path}".format(time=self.minimum_wall_time, path=' -> '.join(path))]
+        wall_times = ["{time:.3f}s with unlimited workers".format(time=self.minimum_wall_time)]
+        if self.jobs:
+            wall_times.append("{time:.3f}s with {jobs} jobs".format(time=self.simulated_wall_time(), jobs=self.jobs))
+        if self.wall_time is not None:
+            wall_times.append("measured {time:.3f}s".format(time=self.wall_time))
+        lines.append("Minimum wall time: " + ', '.join(wall_times))
+        others = sorted((name for name in self._order if name not in path),
+                        key=lambda name_: (self.slack[name_], name_))
+        if others:
+            width = max(len(name) for name in others)
+            lines.append("Slack:")
+            for name in others:
+                lines.append("  {name:<{width}} {slack:>8.3f}s".format(name=name, width=width,
+                                                                      slack=self.slack[name]))
+        return lines
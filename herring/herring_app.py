@@ -17,20 +17,33 @@ The HerringApp will:
   dictionary on module import.
 * runs the given tasks and their dependencies.  By default, dependencies are ran in parallel processes.
 
+With --daemon, the loaded tasks are kept in a background daemon that runs the requests of the herringc
+client (see herring.herring_daemon).
+
+The task listings (-T, -U, -D) are served from the task index (see herring.task_index) without importing
+the herringfile or the herringlib modules when none of their files have changed since the tasks were last
+loaded.
+
 
 """
 
 import os
+import sqlite3
 import sys
 
-from operator import itemgetter
+from functools import partial
 
+from herring.herring_client import find_herring_file
+from herring.herring_daemon import HerringDaemon
 from herring.herring_loader import HerringLoader
 from herring.herring_runner import HerringRunner
-from herring.support.simple_logger import info, fatal
+from herring.run_history import RunHistory
+from herring.support.simple_logger import debug, info, fatal, warning, Logger
 from herring.herring_file import HerringFile
 # from herring.support.unionfs import unionfs, unionfs_available
 from herring.support.touch import touch
+from herring.task_graph import TaskGraph
+from herring.task_index import TaskIndex
 from herring.task_with_args import TaskWithArgs, HerringTasks, NameSpace
 
 __docformat__ = 'restructuredtext en'
@@ -72,7 +85,8 @@ class HerringApp(object):
             * settings.list_all_tasks asserted modifies the listing to include
               tasks that do not have a docstring.
             * if both settings.list_task and settings.list_dependencies are
-              deasserted, then run the tasks from settings.tasks
+              deasserted, then run the tasks from settings.tasks, exiting with a
+              nonzero status if any of them fail
 
         :param cli: the command line interface instance
         :type cli: herring.HerringCLI
@@ -80,50 +94,123 @@ class HerringApp(object):
         :return: None
         """
         try:
-            HerringFile.settings = settings
             herring_file = self._find_herring_file(settings.herringfile)
-            HerringFile.directory = str(os.path.realpath(os.path.dirname(herring_file)))
-            sys.path.insert(1, HerringFile.directory)
+            _configure(settings, herring_file)
 
             herringfile_is_nonempty = self._is_herring_file_nonempty(herring_file)
 
-            global debug_mode
-            global verbose_mode
-            debug_mode = settings.debug
-            verbose_mode = not settings.quiet
-
-            # the tasks are always ran with the current working directory
-            # set to the directory that contains the herringfile
-            os.chdir(HerringFile.directory)
-
             if not settings.json:
                 info("Using: %s" % herring_file)
 
             if not settings.json and settings.environment:
                 cli.show_environment()
 
+            if getattr(settings, 'history', None):
+                history = RunHistory()
+                try:
+                    cli.show_history(settings.history, history)
+                except sqlite3.Error as ex:
+                    fatal("Can not read the run history: {err}".format(err=str(ex)))
+                finally:
+                    history.close()
+                return
+
             with HerringLoader(settings) as loader:
-                loader.load_tasks(herring_file)  # populates HerringTasks
+                if getattr(settings, 'daemon', False) or getattr(settings, 'stop_daemon', False):
+                    self._daemon(loader, herring_file, settings)
+                    return
+
+                listing = settings.list_tasks or settings.list_task_usages or settings.list_dependencies
+                herring_tasks = self._load_tasks(loader, herring_file, settings, listing)
 
-                task_list = list(self._get_tasks_list(HerringTasks,
+                task_list = list(self._get_tasks_list(herring_tasks,
                                                       settings.list_all_tasks,
                                                       herringfile_is_nonempty,
                                                       settings.tasks))
 
                 if settings.list_tasks:
-                    cli.show_tasks(self._get_tasks(task_list), HerringTasks, settings)
+                    cli.show_tasks(self._get_tasks(task_list), herring_tasks, settings)
                 elif settings.list_task_usages:
-                    cli.show_task_usages(self._get_tasks(task_list), HerringTasks, settings)
+                    cli.show_task_usages(self._get_tasks(task_list), herring_tasks, settings)
                 elif settings.list_dependencies:
-                    cli.show_depends(self._get_tasks(task_list), HerringTasks, settings)
+                    cli.show_depends(self._get_tasks(task_list), herring_tasks, settings)
                 else:
                     try:
-                        HerringRunner.run_tasks(settings.tasks)
+                        errors = HerringRunner.run_tasks(settings.tasks)
                     except Exception as ex:
                         fatal(ex)
+                    finally:
+                        HerringRunner.close_pool()
+                        HerringRunner.report_timeline()
+                    if errors:
+                        fatal("Failed: {errors}".format(errors='; '.join(errors)))
         except ValueError as ex:
             fatal(ex)
 
+    def _load_tasks(self, loader, herring_file, settings, listing):
+        """
+        Load the tasks into HerringTasks unless only listing the tasks and the task index is up to date.  The
+        task index is only read and written when listing the tasks.
+
+        :param loader: the task loader
+        :type loader: HerringLoader
+        :param herring_file: the herringfile path
+        :type herring_file: str
+        :param settings: the application settings
+        :param listing: asserted if only listing the tasks
+        :type listing: bool
+        :return: HerringTasks or the indexed tasks
+        :rtype: dict
+        """
+        index = None
+        signature = None
+        indexed_tasks = None
+        if listing:
+            index = TaskIndex()
+            signature = index.signature(herring_file, loader.locate_library(herring_file), settings.herringlib)
+            indexed_tasks = index.load(signature)
+            if indexed_tasks is not None:
+                debug("using the task index {path}".format(path=index.path))
+                return indexed_tasks
+
+        loader.load_tasks(herring_file)  # populates HerringTasks
+        if not settings.json:
+            for name, missing in TaskGraph.compile(HerringTasks).unknown:
+                warning("Task {name} depends upon the unknown task {missing}".format(name=name, missing=missing))
+        HerringRunner.worker_initializer = partial(_initialize_worker, settings, herring_file,
+                                                   loader.library_paths)
+        HerringRunner.worker_preload = (herring_file, loader.library_paths)
+
+        if index is not None:
+            try:
+                index.save(signature, HerringTasks)
+            except (IOError, OSError, TypeError, ValueError) as ex:
+                debug("can not save the task index {path}: {err}".format(path=index.path, err=str(ex)))
+        return HerringTasks
+
+    def _daemon(self, loader, herring_file, settings):
+        """
+        Start or stop the project's daemon.
+
+        :param loader: the task loader
+        :type loader: HerringLoader
+        :param herring_file: the herringfile path
+        :type herring_file: str
+        :param settings: the application settings
+        """
+        daemon = HerringDaemon(sys.argv[1:], settings, herring_file, loader.locate_library(herring_file))
+        if settings.stop_daemon:
+            if daemon.stop():
+                info("Stopped the herring daemon.")
+            else:
+                info("The herring daemon is not running.")
+        elif daemon.is_running():
+            info("The herring daemon is already running: {path}".format(path=daemon.socket_path))
+        else:
+            self._load_tasks(loader, herring_file, settings, False)
+            pid = daemon.start()
+            info("Started the herring daemon (pid {pid}): {path}".format(pid=pid, path=daemon.socket_path))
+
     def _is_herring_file_nonempty(self, herringfile):
         return os.stat(herringfile).st_size != 0
 
@@ -138,16 +225,9 @@ class HerringApp(object):
         :return: the filespec to the found herringfile
         :rtype: str
         """
-        cwd = os.getcwd()
-        while cwd:
-            try:
-                file_spec = os.path.join(cwd, herringfile)
-                with open(file_spec):
-                    pass
-                return file_spec
-            except IOError:
-                # not in current directory so go up a directory and look again
-                cwd = os.sep.join(cwd.split(os.sep)[0:-1])
+        file_spec = find_herring_file(herringfile)
+        if file_spec is not None:
+            return file_spec
 
         # not found, so create in current directory
         file_spec = os.path.join(os.getcwd(), herringfile)
@@ -156,23 +236,19 @@ class HerringApp(object):
 
     def _get_tasks_list(self, herring_tasks, all_tasks_flag, configured_herringfile, parameters):
         """
-        A generator to massage the tasks structure into an easier to access dict.
+        A generator for the names of the tasks to show.
 
         :param herring_tasks: the herring task structure
         :type herring_tasks: dict
         :param all_tasks_flag: asserted to include all tasks, deasserted to
             only include tasks with a docstring
         :type all_tasks_flag: bool
-        :yields: a task_list dictionary {name: '...', description: '...',
-            dependencies: ['...']
-        :ytype: dict
+        :yields: the task names
+        :ytype: str
         """
-
-        for task_name in herring_tasks.keys():
-            description = herring_tasks[task_name]['description']
-            private = herring_tasks[task_name]['private']
-            configured = herring_tasks[task_name]['configured']
-            if all_tasks_flag or (not private and description is not None):
+        for task_name, task in herring_tasks.items():
+            if all_tasks_flag or (not task['private'] and task['description'] is not None):
+                configured = task['configured']
                 if ((configured == 'required' and configured_herringfile) or
                         (configured == 'no' and not configured_herringfile) or
                         (configured == 'optional')):
@@ -182,32 +258,56 @@ class HerringApp(object):
                     # So if parameters is None or empty, we want to yield all available tasks,
                     # otherwise only yield tasks that contain a parameter in the task_name.
                     if (parameters is None) or (not parameters) or [t for t in parameters if t in task_name]:
-                        yield ({'name': task_name,
-                                'description': str(description),
-                                'dependencies': herring_tasks[task_name]['depends'],
-                                'dependent_of': herring_tasks[task_name]['dependent_of'],
-                                'kwargs': herring_tasks[task_name]['kwargs'],
-                                'arg_prompt': herring_tasks[task_name]['arg_prompt']})
+                        yield task_name
 
     def _get_tasks(self, task_list):
         """
-        Generator for getting the sorted list of tasks with descriptions and dependencies
-        for show tasks features.
+        Get the sorted list of task names for show tasks features.
 
         :param task_list: list of task names to show.
         :type task_list: list
-        :yields: tuple containing (name, description, dependencies, width)
-        :ytype: tuple(str,str,list,int)
+        :return: the sorted task names
+        :rtype: list(str)
         """
-        width = len(max([item['name'] for item in task_list], key=len))
-        for item in sorted(task_list, key=itemgetter('name')):
-            yield(item['name'],
-                  item['description'],
-                  item['dependencies'],
-                  item['dependent_of'],
-                  item['kwargs'],
-                  item['arg_prompt'],
-                  width)
+        return sorted(task_list)
+
+
+def _configure(settings, herring_file):
+    """
+    Set up the process for running the herringfile's tasks.
+
+    :param settings: the application settings
+    :param herring_file: the herringfile path
+    :type herring_file: str
+    """
+    HerringFile.settings = settings
+    HerringFile.directory = str(os.path.realpath(os.path.dirname(herring_file)))
+    sys.path.insert(1, HerringFile.directory)
+
+    global debug_mode
+    global verbose_mode
+    debug_mode = settings.debug
+    verbose_mode = not settings.quiet
+
+    # the tasks are always ran with the current working directory
+    # set to the directory that contains the herringfile
+    os.chdir(HerringFile.directory)
+
+
+def _initialize_worker(settings, herring_file, library_paths):
+    """
+    Load the tasks into a worker process that was not forked from the herring process (see WorkerPool).
+
+    :param settings: the application settings
+    :param herring_file: the herringfile path
+    :type herring_file: str
+    :param library_paths: the herringlib directories used by the herring process
+    :type library_paths: list(Path)
+    """
+    Logger.set_verbose(not settings.quiet)
+    Logger.set_debug(settings.herring_debug)
+    _configure(settings, herring_file)
+    HerringLoader(settings).load_modules(herring_file, library_paths)
 
 
 task_execute = HerringRunner.run_tasks
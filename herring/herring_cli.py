@@ -13,10 +13,12 @@ import json
 
 from pprint import pformat
 
+from herring.critical_path import CriticalPathAnalysis
 from herring.herring_settings import HerringSettings
 from herring.support.terminalsize import get_terminal_size
 from herring.argument_helper import ArgumentHelper
-from herring.support.simple_logger import info, Logger
+from herring.support.simple_logger import info, fatal, Logger
+from herring.task_graph import TaskGraph
 from herring.task_with_args import TaskWithArgs
 
 __docformat__ = 'restructuredtext en'
@@ -29,6 +31,9 @@ ROW_FORMAT = "{0:<{width1}s}  # {1:<{width2}s}"
 class HerringCLI(object):
     """Command Line Interface for the Herring App"""
 
+    # the console width of the table being shown, looked up once by _header
+    _console_width = None
+
     def execute(self, app):
         """
         Handle the command line arguments then execute the app.
@@ -47,6 +52,7 @@ class HerringCLI(object):
 
             * user requested the applications version,
             * user requested help or longhelp,
+            * user requested the critical path analysis of a trace file,
             * can not find the herringfile.
 
         :return: None
@@ -68,6 +74,10 @@ class HerringCLI(object):
             info("Herring version %s" % self._load_version())
             exit(0)
 
+        if settings.analyze_trace:
+            self.show_critical_path(settings.analyze_trace)
+            exit(0)
+
         return settings
 
     def _load_version(self, path=None):
@@ -111,60 +121,72 @@ class HerringCLI(object):
         info('sys.platform: {data}'.format(data=pformat(sys.platform)))
         info('sys.version_info: {data}'.format(data=pformat(sys.version_info)))
 
+    def show_history(self, task, history):
+        """
+        Shows the run history of a task.
+
+        :param task: the task name
+        :type task: str
+        :param history: the project's run history
+        :type history: herring.run_history.RunHistory
+        """
+        for line in history.report(task):
+            info(line)
+
+    def show_critical_path(self, trace_path):
+        """
+        Shows the critical path analysis of a saved --trace file.
+
+        :param trace_path: the path of the trace file
+        :type trace_path: str
+        """
+        try:
+            analysis = CriticalPathAnalysis.load(trace_path)
+        except (IOError, OSError, ValueError, KeyError) as ex:
+            fatal("Can not analyze the trace file {path}: {err}".format(path=trace_path, err=str(ex)))
+        for line in analysis.report():
+            info(line)
+
     def show_tasks(self, tasks, herring_tasks, settings):
         """
         Shows the tasks.
 
-        :param tasks: generator for list of task names to show.
-        :type tasks: iterator
+        :param tasks: sorted list of task names to show.
+        :type tasks: list
         :param herring_tasks: all of the herring tasks
         :type herring_tasks: dict
         :param settings: the application settings
         :return: None
         """
         if settings.json:
-            info('[')
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
-                info(json.dumps({'name': name,
-                                 'description': description,
-                                 'dependencies': dependencies,
-                                 'dependent_of': dependent_of,
-                                 'kwargs': kwargs,
-                                 'arg_prompt': arg_prompt}))
-            info(']')
+            self._show_json(tasks, herring_tasks)
         else:
             self._header("Show tasks")
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
-                self._row(name=name, description=description.strip().splitlines()[0], max_name_length=width)
+            width = self._name_width(tasks)
+            for name in tasks:
+                self._row(name=name, description=str(herring_tasks[name]['description']).strip().splitlines()[0],
+                          max_name_length=width)
             self._footer(herring_tasks)
 
     def show_task_usages(self, tasks, herring_tasks, settings):
         """
         Shows the tasks.
 
-        :param tasks: generator for list of task names to show.
-        :type tasks: iterator
+        :param tasks: sorted list of task names to show.
+        :type tasks: list
         :param herring_tasks: all of the herring tasks
         :type herring_tasks: dict
         :param settings: the application settings
         :return: None
         """
         if settings.json:
-            info('[')
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
-                info(json.dumps({'name': name,
-                                 'description': description,
-                                 'dependencies': dependencies,
-                                 'dependent_of': dependent_of,
-                                 'kwargs': kwargs,
-                                 'arg_prompt': arg_prompt}))
-            info(']')
+            self._show_json(tasks, herring_tasks)
         else:
             self._header("Show task usages")
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
+            for name in tasks:
                 info("#" * 40)
                 info("# herring %s" % name)
-                info(textwrap.dedent(description).replace("\n\n", "\n").strip())
+                info(textwrap.dedent(str(herring_tasks[name]['description'])).replace("\n\n", "\n").strip())
                 info('')
             self._footer(herring_tasks)
 
@@ -172,33 +194,59 @@ class HerringCLI(object):
         """
         Shows the tasks and their dependencies.
 
-        :param tasks: generator for list of task names to show.
-        :type tasks: iterator
+        :param tasks: sorted list of task names to show.
+        :type tasks: list
         :param herring_tasks: all of the herring tasks
         :type herring_tasks: dict
         :param settings: the application settings
         :return: None
         """
         if settings.json:
-            info('[')
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
-                info(json.dumps({'name': name,
-                                 'description': description,
-                                 'dependencies': dependencies,
-                                 'dependent_of': dependent_of,
-                                 'kwargs': kwargs,
-                                 'arg_prompt': arg_prompt}))
-            info(']')
+            self._show_json(tasks, herring_tasks)
         else:
             self._header("Show tasks and their dependencies")
-            for name, description, dependencies, dependent_of, kwargs, arg_prompt, width in tasks:
+            width = self._name_width(tasks)
+            graph = TaskGraph.compile(herring_tasks)
+            for name in tasks:
+                task = herring_tasks[name]
                 self._row(name=name,
-                          description=description.strip().splitlines()[0],
-                          dependencies=dependencies,
-                          dependent_of=dependent_of,
+                          description=str(task['description']).strip().splitlines()[0],
+                          dependencies=list(graph.depends[name]),
+                          dependent_of=task['dependent_of'],
                           max_name_length=width)
             self._footer(herring_tasks)
 
+    def _show_json(self, tasks, herring_tasks):
+        """
+        Output the tasks as a JSON list.
+
+        :param tasks: sorted list of task names to show.
+        :type tasks: list
+        :param herring_tasks: all of the herring tasks
+        :type herring_tasks: dict
+        :return: None
+        """
+        graph = TaskGraph.compile(herring_tasks)
+        info('[')
+        for name in tasks:
+            task = herring_tasks[name]
+            info(json.dumps({'name': name,
+                             'description': str(task['description']),
+                             'dependencies': list(graph.depends[name]),
+                             'dependent_of': task['dependent_of'],
+                             'kwargs': task['kwargs'],
+                             'arg_prompt': task['arg_prompt']}))
+        info(']')
+
+    def _name_width(self, tasks):
+        """
+        :param tasks: list of task names
+        :type tasks: list
+        :return: the length of the longest task name
+        :rtype: int
+        """
+        return max([len(name) for name in tasks] or [0])
+
     def _header(self, message):
         """
         Output table header message followed by a horizontal rule.
@@ -207,9 +255,9 @@ class HerringCLI(object):
          :type message: str
         :return: None
         """
-        (console_width, console_height) = get_terminal_size()
+        (self._console_width, console_height) = get_terminal_size()
         info(message)
-        info("=" * console_width)
+        info("=" * self._console_width)
 
     def _footer(self, tasks):
         tasks_help = []
@@ -242,7 +290,7 @@ class HerringCLI(object):
         if dependencies is None:
             dependencies = []
 
-        (console_width, console_height) = get_terminal_size()
+        console_width = self._console_width or get_terminal_size()[0]
 
         c1_width = max_name_length + 8
         c2_width = console_width - 5 - c1_width
@@ -268,7 +316,11 @@ class HerringCLI(object):
         :return: None
         """
         # values = textwrap.fill(self._unindent(c2_value), c2_width).split("\n")
-        values = textwrap.fill(c2_value, c2_width).split("\n")
+        if len(c2_value) <= c2_width and c2_value.isprintable() and c2_value == c2_value.strip():
+            # nothing to wrap
+            values = [c2_value]
+        else:
+            values = textwrap.fill(c2_value, c2_width).split("\n")
         info(ROW_FORMAT.format(c1_value, values[0], width1=c1_width, width2=c2_width))
         for line in values[1:]:
             info(ROW_FORMAT.format(' ', line, width1=c1_width, width2=c2_width))
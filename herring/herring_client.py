@@ -0,0 +1,249 @@
+# coding=utf-8
+
+"""
+The thin client for the herring daemon (see herring.herring_daemon).  Installed as the "herringc" console
+script, it takes the same arguments as herring.
+
+If a daemon is listening for the project (the .herring/daemon.sock socket in the directory containing the
+herringfile, found with the same --herringfile argument, configuration files and search as herring), the
+client passes its arguments, working directory, environment and its stdin, stdout and stderr file
+descriptors to the daemon, which runs the request in a process forked from the already loaded tasks.  The
+output goes directly to the client's terminal.  The client then exits with the request's exit code.
+Otherwise the client runs herring in process, just like the herring command.
+
+This module only imports the standard library so the client starts quickly.
+"""
+import argparse
+import array
+import json
+import os
+import socket
+import struct
+import sys
+
+from configparser import ConfigParser, Error as ConfigError
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('main',)
+
+DAEMON_SOCKET = os.path.join('.herring', 'daemon.sock')
+HERRINGFILE = 'herringfile'
+
+# each message is a 4 byte length followed by that many bytes of JSON
+HEADER = struct.Struct('!I')
+
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """
+    Raises ValueError on bad arguments instead of exiting, herring reports them.
+    """
+
+    def error(self, message):
+        raise ValueError(message)
+
+
+def herringfile_name(argv):
+    """
+    The herringfile name herring uses with the given arguments: the --herringfile argument, else the herringfile
+    setting of the [Herring] section in the configuration files, else "herringfile".
+
+    :param argv: the herring command line arguments
+    :type argv: list(str)
+    :return: the herringfile name
+    :rtype: str
+    """
+    parser = _ArgumentParser(add_help=False)
+    parser.add_argument('-c', '--conf_file')
+    parser.add_argument('-f', '--herringfile')
+    try:
+        args = parser.parse_known_args(argv)[0]
+    except ValueError:
+        return HERRINGFILE
+    if args.herringfile:
+        return args.herringfile
+
+    # the configuration files herring.support.application_settings reads
+    config_files = ['.herringrc', os.path.expanduser('~/.herring/herring.conf'), os.path.expanduser('~/.herringrc')]
+    if args.conf_file:
+        config_files.insert(0, args.conf_file)
+    config = ConfigParser()
+    try:
+        config.read(config_files)
+        return config.get('Herring', 'herringfile', fallback=HERRINGFILE)
+    except ConfigError:
+        return HERRINGFILE
+
+
+def find_herring_file(herringfile=HERRINGFILE, directory=None):
+    """
+    Find the herringfile in the directory, if not found then in the parent directory, repeating until either
+    found or the root is hit.
+
+    :param herringfile: the herringfile name
+    :type herringfile: str
+    :param directory: the directory to start the search in, default is the current directory
+    :type directory: str|None
+    :return: the herringfile path or None if not found
+    :rtype: str|None
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    while True:
+        file_spec = os.path.join(directory, herringfile)
+        if os.path.isfile(file_spec):
+            return file_spec
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def find_daemon_socket(herringfile=HERRINGFILE, directory=None):
+    """
+    Find the daemon socket of the project containing the directory.
+
+    :param herringfile: the herringfile name
+    :type herringfile: str
+    :param directory: the directory to start the search for the herringfile in, default is the current directory
+    :type directory: str|None
+    :return: the socket path or None if the project has no daemon socket
+    :rtype: str|None
+    """
+    herring_file = find_herring_file(herringfile, directory)
+    if herring_file is None:
+        return None
+    socket_path = os.path.join(os.path.dirname(os.path.abspath(herring_file)), DAEMON_SOCKET)
+    if os.path.exists(socket_path):
+        return socket_path
+    return None
+
+
+def send_message(sock, message, fds=None):
+    """
+    Send a message, optionally passing open file descriptors.
+
+    :param sock: the connected unix domain socket
+    :type sock: socket.socket
+    :param message: a JSON serializable message
+    :type message: dict
+    :param fds: the file descriptors to pass
+    :type fds: list(int)|None
+    """
+    data = json.dumps(message).encode('utf-8')
+    header = HEADER.pack(len(data))
+    if fds:
+        sock.sendmsg([header], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    else:
+        sock.sendall(header)
+    sock.sendall(data)
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise EOFError('connection closed')
+        data += chunk
+    return data
+
+
+def recv_message(sock, max_fds=0):
+    """
+    Receive a message.
+
+    :param sock: the connected unix domain socket
+    :type sock: socket.socket
+    :param max_fds: the maximum number of file descriptors that may be passed with the message
+    :type max_fds: int
+    :return: tuple containing the message and the list of received file descriptors
+    :rtype: tuple(dict, list(int))
+    :raises EOFError: if the connection was closed
+    """
+    fds = array.array('i')
+    header, ancdata, flags, address = sock.recvmsg(HEADER.size, socket.CMSG_SPACE(max_fds * fds.itemsize))
+    if not header:
+        raise EOFError('connection closed')
+    for level, kind, data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+    header += _recv_exactly(sock, HEADER.size - len(header))
+    size, = HEADER.unpack(header)
+    return json.loads(_recv_exactly(sock, size).decode('utf-8')), list(fds)
+
+
+def request(socket_path, message, fds=None):
+    """
+    Send a request to the daemon and wait for the reply.  A keyboard interrupt while waiting is forwarded
+    to the daemon.
+
+    :param socket_path: the daemon's socket
+    :type socket_path: str
+    :param message: the request
+    :type message: dict
+    :param fds: the file descriptors to pass with the request
+    :type fds: list(int)|None
+    :return: the reply, or None if the daemon can not be reached, or {'error': message} if the connection
+        was lost after the request was sent
+    :rtype: dict|None
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+            send_message(sock, message, fds)
+        except OSError:
+            return None
+        while True:
+            try:
+                return recv_message(sock)[0]
+            except KeyboardInterrupt:
+                send_message(sock, {'interrupt': True})
+    except (OSError, EOFError, ValueError) as ex:
+        return {'error': 'lost the connection to the herring daemon: {err}'.format(err=str(ex))}
+    finally:
+        sock.close()
+
+
+def run(socket_path, argv):
+    """
+    Have the daemon run herring with the given arguments using this process's stdin, stdout and stderr.
+
+    :param socket_path: the daemon's socket
+    :type socket_path: str
+    :param argv: the herring command line arguments
+    :type argv: list(str)
+    :return: the exit code or None if the daemon did not run the request
+    :rtype: int|None
+    """
+    try:
+        fds = [stream.fileno() for stream in (sys.stdin, sys.stdout, sys.stderr)]
+    except (AttributeError, ValueError, OSError):
+        # not a real stream, ex: closed
+        return None
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    reply = request(socket_path, {'argv': argv, 'cwd': os.getcwd(), 'environ': dict(os.environ)}, fds=fds)
+    if reply is None:
+        return None
+    if 'error' in reply:
+        sys.stderr.write(reply['error'] + '\n')
+        return 1
+    return reply.get('exit')
+
+
+def main():
+    """
+    The herringc console entry point.
+    """
+    socket_path = find_daemon_socket(herringfile_name(sys.argv[1:]))
+    if socket_path is not None:
+        exit_code = run(socket_path, sys.argv[1:])
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    from herring.herring_main import main as herring_main
+    herring_main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+# coding=utf-8
+
+"""
+The herring daemon keeps a project's tasks loaded so short herring commands do not pay for parsing the
+configuration, finding the herringfile and importing the herringfile and herringlib modules every time.
+
+Start the daemon in the project with::
+
+    herring --daemon
+
+then use the "herringc" client (see herring.herring_client) instead of "herring"::
+
+    herringc test
+    herringc -T
+
+The daemon runs in the background listening on the .herring/daemon.sock unix domain socket in the
+herringfile's directory and logs to .herring/daemon.log.  Each request is ran in a child process forked
+from the daemon, with the client's stdin, stdout, stderr, working directory and environment, exactly as
+the herring command would run it.
+
+The daemon polls the herringfile and herringlib files (see herring.task_index) and, when any have changed,
+answers new requests as stale (the client then runs herring itself) and restarts to reload the tasks once
+its running requests have finished.
+
+Stop the daemon with::
+
+    herring --stop_daemon
+
+"""
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+
+from herring.herring_client import DAEMON_SOCKET, recv_message, request, send_message
+from herring.support.mkdir_p import mkdir_p
+from herring.support.simple_logger import debug, error, warning
+from herring.task_index import TaskIndex
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('HerringDaemon',)
+
+# seconds between checks for changed herringfile and herringlib files
+WATCH_INTERVAL = 1.0
+
+
+def _exit_code(status):
+    """
+    :param status: the status from os.waitpid
+    :type status: int
+    :return: the process's exit code, 128 + the signal number if it was killed
+    :rtype: int
+    """
+    if os.WIFSIGNALED(status):
+        return 128 + os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+class _Request(object):
+    """
+    A client connection and the child process running its request.
+    """
+
+    def __init__(self, conn, pid):
+        self.conn = conn
+        self.pid = pid
+
+
+class HerringDaemon(object):
+    """
+    The per project daemon.
+    """
+
+    def __init__(self, argv, settings, herring_file, library_paths):
+        """
+        :param argv: the herring command line arguments that started the daemon, used to restart it
+        :type argv: list(str)
+        :param settings: the application settings
+        :param herring_file: the herringfile path
+        :type herring_file: str
+        :param library_paths: the herringlib directories
+        :type library_paths: list(Path)
+        """
+        self.argv = argv
+        self.settings = settings
+        self.herring_file = herring_file
+        self.library_paths = library_paths
+        self.cwd = os.getcwd()
+        self.directory = os.path.dirname(os.path.abspath(herring_file))
+        self.socket_path = os.path.join(self.directory, DAEMON_SOCKET)
+        self.log_path = os.path.join(self.directory, '.herring', 'daemon.log')
+        self._index = TaskIndex()
+        self._signature = self._current_signature()
+        self._listener = None
+        self._wakeup = None
+        self._requests = {}
+        self._stale = False
+        self._running = True
+
+    def _current_signature(self):
+        return self._index.signature(self.herring_file, self.library_paths, self.settings.herringlib)
+
+    def is_running(self):
+        """
+        :return: asserted if a daemon is listening on the project's socket
+        :rtype: bool
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.close()
+
+    def stop(self):
+        """
+        Ask the project's daemon to stop.
+
+        :return: asserted if a daemon was stopped
+        :rtype: bool
+        """
+        return request(self.socket_path, {'stop': True}) is not None
+
+    def start(self):
+        """
+        Start the daemon in a detached background process.
+
+        :return: the daemon's process id
+        :rtype: int
+        """
+        mkdir_p(os.path.dirname(self.socket_path))
+        self._listen()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self._listener.close()
+            return pid
+
+        exit_code = 0
+        try:
+            os.setsid()
+            with open(os.devnull, 'rb') as null_file:
+                os.dup2(null_file.fileno(), 0)
+            with open(self.log_path, 'ab') as log_file:
+                os.dup2(log_file.fileno(), 1)
+                os.dup2(log_file.fileno(), 2)
+            self.serve()
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _listen(self):
+        """
+        Create the listening socket, replacing the socket file of a daemon that is no longer running.
+        """
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._listener.bind(self.socket_path)
+        self._listener.listen(16)
+
+    def serve(self):
+        """
+        Handle requests until stopped.  Restarts the daemon when the tasks have changed.
+        """
+        wakeup_read, self._wakeup = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(self._wakeup, False)
+        signal.set_wakeup_fd(self._wakeup)
+        # the handler lets the SIGCHLD wake up select
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._shutdown())
+        last_watch = time.time()
+        try:
+            while self._running or self._requests:
+                sockets = [wakeup_read] + [req.conn for req in self._requests.values() if req.conn is not None]
+                if self._running:
+                    sockets.append(self._listener)
+                readable = select.select(sockets, [], [], WATCH_INTERVAL)[0]
+                for sock in readable:
+                    if sock is self._listener:
+                        self._accept()
+                    elif sock == wakeup_read:
+                        self._drain(wakeup_read)
+                    else:
+                        self._client_message(sock)
+                self._reap()
+                if time.time() - last_watch >= WATCH_INTERVAL:
+                    last_watch = time.time()
+                    self._watch()
+                if self._stale and not self._requests:
+                    self._restart()
+        finally:
+            self._shutdown()
+            signal.set_wakeup_fd(-1)
+            os.close(wakeup_read)
+            os.close(self._wakeup)
+
+    # noinspection PyMethodMayBeStatic
+    def _drain(self, fd):
+        try:
+            while os.read(fd, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _shutdown(self):
+        """
+        Stop accepting requests.
+        """
+        self._running = False
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+
+    def _watch(self):
+        """
+        Check for changed herringfile and herringlib files.
+        """
+        try:
+            signature = self._current_signature()
+        except OSError as ex:
+            debug("can not check the tasks: {err}".format(err=str(ex)))
+            signature = None
+        if signature != self._signature and not self._stale:
+            warning("The tasks have changed, restarting the daemon.")
+            self._stale = True
+
+    def _accept(self):
+        """
+        Accept and start a request.
+        """
+        conn, address = self._listener.accept()
+        fds = []
+        try:
+            message, fds = recv_message(conn, max_fds=3)
+            if message.get('stop'):
+                send_message(conn, {'exit': 0})
+                conn.close()
+                self._shutdown()
+                return
+            self._watch()
+            if self._stale:
+                send_message(conn, {'stale': True})
+                conn.close()
+                return
+            pid = self._fork_request(conn, message, fds)
+            self._requests[pid] = _Request(conn, pid)
+        except EOFError:
+            # a client checking if the daemon is running
+            conn.close()
+        except (OSError, ValueError, KeyError) as ex:
+            error("bad request: {err}".format(err=str(ex)))
+            conn.close()
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _fork_request(self, conn, message, fds):
+        """
+        Fork a child process that runs the request.
+
+        :return: the child's process id
+        :rtype: int
+        """
+        argv = message['argv']
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            debug("request {pid}: herring {argv}".format(pid=pid, argv=' '.join(argv)))
+            return pid
+
+        exit_code = 1
+        try:
+            signal.set_wakeup_fd(-1)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            self._listener.close()
+            for req in self._requests.values():
+                if req.conn is not None:
+                    req.conn.close()
+            conn.close()
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+            for stream in (sys.stdout, sys.stderr):
+                stream.reconfigure(line_buffering=True)
+            os.environ.clear()
+            os.environ.update(message['environ'])
+            os.chdir(message['cwd'])
+            sys.argv = ['herring'] + argv
+            exit_code = self._run_herring()
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(exit_code)
+
+    # noinspection PyMethodMayBeStatic
+    def _run_herring(self):
+        """
+        Run herring in the request's child process.
+
+        :return: the exit code
+        :rtype: int
+        """
+        from herring.herring_app import HerringApp
+        from herring.herring_cli import HerringCLI
+
+        try:
+            HerringCLI().execute(HerringApp())
+        except SystemExit as ex:
+            if ex.code is None:
+                return 0
+            if isinstance(ex.code, int):
+                return ex.code
+            sys.stderr.write(str(ex.code) + '\n')
+            return 1
+        except KeyboardInterrupt:
+            return 130
+        return 0
+
+    def _client_message(self, conn):
+        """
+        Handle a message from a client that is waiting for its request: an interrupt or the client going away.
+        """
+        req = [req_ for req_ in self._requests.values() if req_.conn is conn][0]
+        try:
+            interrupt = recv_message(conn)[0].get('interrupt')
+        except (OSError, EOFError, ValueError):
+            interrupt = True
+            req.conn = None
+            conn.close()
+        if interrupt:
+            try:
+                os.kill(req.pid, signal.SIGINT)
+            except OSError:
+                pass
+
+    def _reap(self):
+        """
+        Send the exit codes of the finished requests to their clients.
+        """
+        for req in list(self._requests.values()):
+            pid, status = os.waitpid(req.pid, os.WNOHANG)
+            if pid == 0:
+                continue
+            del self._requests[req.pid]
+            if req.conn is not None:
+                try:
+                    send_message(req.conn, {'exit': _exit_code(status)})
+                except OSError:
+                    pass
+                req.conn.close()
+
+    def _restart(self):
+        """
+        Restart the daemon to reload the changed tasks.
+        """
+        self._shutdown()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.chdir(self.cwd)
+        os.execv(sys.executable, [sys.executable, '-m', 'herring.herring_main'] + self.argv)
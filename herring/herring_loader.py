@@ -1,22 +1,20 @@
 # coding=utf-8
 
 """
-The HerringLoader is responsible for creating a herringlib union in a temporary directory if there
-are multiple herringlib directories.  Then HerringLoader will load (import) every module in the
-herringlib union, which causes the @task decorator to populated the HerringTasks dictionary.
+The HerringLoader is responsible for forming the herringlib union of the herringlib directories (see
+HerringlibFinder).  Then HerringLoader will load (import) every module in the herringlib union, which
+causes the @task decorator to populated the HerringTasks dictionary.
 """
 import os
-import shutil
 import sys
-import tempfile
 
 from pathlib import Path
 from pprint import pformat
 
 from herring.herring_file import HerringFile
-from herring.support.mkdir_p import mkdir_p
+from herring.herringlib_finder import HerringlibFinder
 # from herring.support.path import Path
-from herring.support.simple_logger import info, debug, error, warning
+from herring.support.simple_logger import debug
 from herring.support.utils import find_files
 from herring.support.list_helper import unique_list
 
@@ -36,16 +34,14 @@ class HerringLoader(object):
         # noinspection PyArgumentEqualDefault
         self.settings = settings
         self.__sys_path = sys.path[:]
-        self.union_dir = None
+        self.library_paths = []
 
     def __enter__(self):
         return self
 
     # noinspection PyUnusedLocal
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.union_dir is not None and not self.settings.leave_union_dir:
-            # noinspection PyTypeChecker
-            shutil.rmtree(os.path.dirname(self.union_dir))
+        pass
 
     def load_tasks(self, herringfile):
         """
@@ -56,52 +52,33 @@ class HerringLoader(object):
         :return: None
         """
 
-        herringfile_path = Path(herringfile).parent
-        library_paths = self._locate_library(herringfile_path, self.settings)
-
-        # if only one herringlib directory then use it.
-        # otherwise create a temp directory and copy each of the source herringlib directories
-        # into the the temp directory without overwriting any files.  This populated temp
-        # directory is then our herringlib union directory.
-
-        if len(library_paths) == 1:
-            self._load_modules(herringfile, [Path(library_paths[0])])
-        else:
-            self.union_dir = mkdir_p(os.path.join(tempfile.mkdtemp(), 'herringlib'))
-            self._populate_union_dir(union_dir=self.union_dir,
-                                     library_paths=library_paths,
-                                     output_json=self.settings.json)
-            self._load_modules(herringfile, [Path(self.union_dir)])
-
-    def _populate_union_dir(self, union_dir, library_paths, output_json):
-        for src_dir in [os.path.abspath(str(path)) for path in reversed(library_paths)]:
-            if not output_json:
-                info("src_dir: %s" % src_dir)
-            for src_root, dirs, files in os.walk(src_dir):
-                files[:] = filter(lambda file_: not file_.startswith('.') and not file_.endswith('.pyc'), files)
-                dirs[:] = filter(lambda dir_: not dir_.startswith('.') and dir_ != '__pycache__', dirs)
-                rel_root = os.path.relpath(src_root, start=src_dir)
-                dest_root = os.path.join(union_dir, rel_root)
-                mkdir_p(dest_root)
-                # for basename in [name for name in files]:
-                for basename in files:
-                    try:
-                        shutil.copy(os.path.join(src_root, basename), os.path.join(dest_root, basename))
-                    except shutil.Error:
-                        pass
-
-    def _load_modules(self, herringfile, library_paths):
+        self.library_paths = [Path(path) for path in self.locate_library(herringfile)]
+        self.load_modules(herringfile, self.library_paths)
+
+    def locate_library(self, herringfile):
+        """
+        :param herringfile: the herringfile path
+        :type herringfile: str
+        :return: the existing herringlib directories in the order they are searched
+        :rtype: list(Path)
         """
+        return self._locate_library(Path(herringfile).parent, self.settings)
 
-        :param herringfile:
-        :type herringfile:
-        :param library_paths:
+    def load_modules(self, herringfile, library_paths):
+        """
+        Loads the herringfile and the modules in the given herringlib directories.  Modules that have
+        already been imported are not reloaded.  If a module is in more than one herringlib directory,
+        the module in the first directory is used.
+
+        :param herringfile: the herringfile path
+        :type herringfile: str
+        :param library_paths: the herringlib directories as resolved by load_tasks (see library_paths attribute)
         :type library_paths: list[Path]
-        :return:
-        :rtype:
+        :return: None
         """
         herringfile_path = Path(herringfile).parent
         debug("library_paths: %s" % repr(library_paths))
+        HerringlibFinder.install(library_paths)
         HerringFile.herringlib_paths = [str(path.parent) for path in library_paths
                                         if path.parent != herringfile_path] + [str(herringfile_path)]
         sys.path = unique_list(HerringFile.herringlib_paths + self.__sys_path[:])
@@ -118,12 +95,11 @@ class HerringLoader(object):
 
         self._import('herringlib')
 
-        for lib_path in library_paths:
-            sys.path = [lib_path] + self.__sys_path
-            debug("sys.path: %s" % repr(sys.path))
-            for file_name in self.library_files(library_paths=[lib_path]):
-                name = 'herringlib.' + str(Path(file_name).stem)
-                self._import(mod_name=name)
+        sys.path = [str(path) for path in library_paths] + self.__sys_path
+        debug("sys.path: %s" % repr(sys.path))
+        for file_name in self.library_files(library_paths=library_paths):
+            name = '.'.join(('herringlib',) + Path(file_name).with_suffix('').parts[1:])
+            self._import(mod_name=name)
 
         sys.path = self.__sys_path[:]
 
@@ -209,7 +185,12 @@ class HerringLoader(object):
             importlib.machinery.SOURCE_SUFFIXES.append('')  # empty string to allow any file
             spec = importlib.util.spec_from_file_location(plugin, pathspec)
             mod = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(mod)
+            sys.modules[plugin] = mod
+            try:
+                spec.loader.exec_module(mod)
+            except BaseException:
+                del sys.modules[plugin]
+                raise
         return mod
 
     def _load_file(self, file_name):
@@ -5,6 +5,15 @@ The HerringRunner is responsible for running the desired task(s) and any depende
 dependencies may be ran in parallel processes.  The tasks are in the HerringTasks dictionary with
 the task names being the dictionary keys.
 
+Each task is started as soon as all of its own dependencies have finished (see TaskScheduler).
+Parallel tasks are ran by a WorkerPool that is shared by every run in the herring invocation,
+including nested task_execute calls, and is stopped with HerringRunner.close_pool().  A nested
+task_execute from inside a worker runs its tasks in that worker.  Tasks that have already succeeded in
+the herring invocation are not ran again (see herring.run_once).  The timing of every task ran by the
+herring process is recorded in HerringRunner.timeline (see herring.task_timing) and reported with
+HerringRunner.report_timeline().  With --progress, a status line of the running tasks is shown while the
+WorkerPool runs them (see herring.progress).
+
 Usage
 -----
 
@@ -15,18 +24,45 @@ Usage
         fatal(ex)
 
 """
+import os
+import sqlite3
+import sys
+
+from herring.artifact_cache import ArtifactCache
+from herring.critical_path import CriticalPathAnalysis
 from herring.herring_file import HerringFile
-from herring.parallelize import parallelize_process
+from herring.parallelize import SerialExecutor
+from herring.progress import ProgressDisplay
+from herring.remote_cache import RemoteCache
+from herring.run_history import RunHistory, input_fingerprint
+from herring.run_once import RunOnceExecutor
 from herring.support.list_helper import is_sequence
-from herring.support.simple_logger import debug, info, error
+from herring.support.simple_logger import debug, info, error, warning
 from herring.support.toposort2 import toposort2
+from herring.task_output import GROUPED
+from herring.task_graph import TaskGraph
+from herring.task_scheduler import DEFAULT_ESTIMATE, STOP, TaskScheduler
+from herring.task_state import TaskState, UpToDateExecutor
+from herring.task_timing import TaskTimeline
 from herring.task_with_args import HerringTasks, TaskWithArgs
+from herring.worker_pool import WorkerPool
 
 __docformat__ = 'restructuredtext en'
 __author__ = 'wrighroy'
 
 
 class HerringRunner(object):
+    # the worker pool shared by all of the task runs in this herring invocation
+    pool = None
+    # loads the tasks into workers that are not forked from this process (see WorkerPool)
+    worker_initializer = None
+    # the herringfile and herringlib directories to preload into the forkserver
+    worker_preload = None
+    # the timing of the tasks ran in this herring invocation
+    timeline = None
+    # the progress line of the tasks ran by the worker pool
+    progress = None
+
     # noinspection PyMethodMayBeStatic
     def _get_default_tasks(self):
         """
@@ -66,11 +102,9 @@ class HerringRunner(object):
             task names
         :rtype: dict
         """
-        data = {}
-        for name in src_tasks:
-            data[name] = set(herring_tasks[name]['depends'])
-        return data
+        return TaskGraph.compile(herring_tasks).depend_dict(src_tasks)
 
+    # noinspection PyMethodMayBeStatic
     def _find_dependencies(self, src_tasks, herring_tasks):
         """
         Finds the dependent tasks for the given source tasks, building up an
@@ -83,35 +117,7 @@ class HerringRunner(object):
         :return: list of resolved (including dependencies) task names
         :rtype: list
         """
-        dependencies = []
-        for name in src_tasks:
-            if name not in dependencies:
-                dependencies.append(name)
-                depend_tasks = herring_tasks[name]['depends']
-                tasks = self._find_dependencies([task_ for task_ in depend_tasks if task_ not in dependencies],
-                                                herring_tasks)
-                dependencies.extend(tasks)
-        return dependencies
-
-    # noinspection PyMethodMayBeStatic
-    def _resolve_dependent_ofs(self, herring_tasks):
-        """
-        Find any ***dependent_of*** task decorator attributes and the task to the dependent of task's depends.
-
-        :param herring_tasks: list of tasks from the herringfile
-        :type herring_tasks: dict
-        :return: list of tasks from the herringfile with dependent_of attributes resolved to depends attributes.
-        :rtype: dict
-        """
-        for name in herring_tasks.keys():
-            task = herring_tasks[name]
-            try:
-                dependent_of = task['dependent_of']
-                if dependent_of is not None:
-                    herring_tasks[dependent_of]['depends'].append(name)
-            except KeyError:
-                pass
-        return herring_tasks
+        return TaskGraph.compile(herring_tasks).closure(src_tasks)
 
     def _resolve_dependencies(self, src_tasks, herring_tasks):
         """
@@ -124,15 +130,16 @@ class HerringRunner(object):
         :return: list of resolved (including dependencies) task names
         :rtype: list(list(str))
         """
-        herring_tasks = self._resolve_dependent_ofs(herring_tasks)
-        tasks = self._find_dependencies(src_tasks, herring_tasks)
+        graph = TaskGraph.compile(herring_tasks)
         task_lists = []
-        depend_dict = self._tasks_to_depend_dict(tasks, herring_tasks)
+        depend_dict = graph.depend_dict(graph.closure(src_tasks))
         for task_group in toposort2(depend_dict):
             task_lists.append(list(task_group))
         return task_lists
 
-    def _run_tasks(self, task_list, interactive):
+    def _run_tasks(self, task_list, interactive, jobs=None, start_method=None, force=False, cache_size=None,
+                   remote_cache=None, output=GROUPED, color='auto', on_failure=STOP,
+                   default_estimate=DEFAULT_ESTIMATE, progress=False):
         """
         Runs the tasks given on the command line.
 
@@ -140,7 +147,28 @@ class HerringRunner(object):
         :type task_list: str|list
         :param interactive: if asserted do not run the tasks in parallel
         :type interactive: bool
-        :return: None
+        :param jobs: the maximum number of tasks to run in parallel, None for no limit
+        :type jobs: int|None
+        :param start_method: the multiprocessing start method for the worker processes, None for the default
+        :type start_method: str|None
+        :param force: asserted to run tasks even if they are up to date
+        :type force: bool
+        :param cache_size: the artifact cache size limit in megabytes, None or 0 to not use the cache
+        :type cache_size: int|None
+        :param remote_cache: the URL of the remote artifact cache or None for only the local cache
+        :type remote_cache: str|None
+        :param output: how the output of the parallel tasks is written, GROUPED or STREAM
+        :type output: str
+        :param color: 'auto', 'always' or 'never' color the task names of the streamed output
+        :type color: str
+        :param on_failure: what to do when a task fails, STOP, KEEP_GOING or FAIL_FAST (see TaskScheduler)
+        :type on_failure: str
+        :param default_estimate: the expected duration in seconds of the tasks without a run history
+        :type default_estimate: float
+        :param progress: asserted to show the progress line while the worker pool runs the tasks
+        :type progress: bool
+        :return: list of any error strings
+        :rtype: list(str)
         """
         if not is_sequence(task_list):
             task_list = [task_list]
@@ -152,7 +180,16 @@ class HerringRunner(object):
             raise ValueError('No tasks given.  Run "herring -T" to see available tasks.')
         TaskWithArgs.argv = list([arg for arg in task_list if arg not in verified_task_list])
 
+        timeline = None
+        if not WorkerPool.in_worker:
+            if HerringRunner.timeline is None:
+                state = TaskState()
+                HerringRunner.timeline = TaskTimeline(fingerprint=lambda name: input_fingerprint(name, state))
+            timeline = HerringRunner.timeline
+
         def task_lookup(task_name_):
+            if timeline is not None:
+                timeline.ran(task_name_, os.getpid(), None, None)
             info("Running: {name} ({description})".format(name=task_name_,
                                                           description=HerringTasks[task_name_]['description']))
             TaskWithArgs.arg_prompt = HerringTasks[task_name_]['arg_prompt']
@@ -161,14 +198,130 @@ class HerringRunner(object):
             except Exception as ex:
                 error(str(ex))
 
-        for task_name_list in self._resolve_dependencies(verified_task_list, HerringTasks):
-            if interactive:
-                for task_name in task_name_list:
-                    task_lookup(task_name)()
-            else:
-                parallelize_process(*[task_lookup(task_name) for task_name in task_name_list])
+        graph = TaskGraph.compile(HerringTasks)
+        depend_dict = graph.depend_dict(graph.closure(verified_task_list))
+        estimates = None
+        if not (interactive or WorkerPool.in_worker):
+            estimates = self._estimates(depend_dict)
+        scheduler = TaskScheduler(depend_dict, estimates=estimates, default_estimate=default_estimate)
+        display = None
+        if interactive or WorkerPool.in_worker:
+            executor = SerialExecutor(task_lookup)
+            # the serial executor runs each task when it is started, so a failure is seen before the next start
+            jobs = 1
+        else:
+            if progress and HerringRunner.progress is None:
+                HerringRunner.progress = ProgressDisplay(timeline, jobs=jobs)
+            display = HerringRunner.progress
+            if HerringRunner.pool is None:
+                HerringRunner.pool = WorkerPool(jobs,
+                                                start_method=start_method,
+                                                initializer=HerringRunner.worker_initializer,
+                                                preload=HerringRunner.worker_preload,
+                                                output=output,
+                                                color=self._use_color(color),
+                                                timeline=timeline,
+                                                progress=HerringRunner.progress)
+            executor = HerringRunner.pool
+        cache = None
+        if cache_size:
+            remote = None
+            if remote_cache:
+                remote = RemoteCache(remote_cache)
+            cache = ArtifactCache(size_limit=cache_size * 1024 * 1024, remote=remote)
+        try:
+            return scheduler.run(RunOnceExecutor(UpToDateExecutor(executor, TaskState(), force=force, cache=cache)),
+                                 jobs=jobs, on_failure=on_failure, timeline=timeline, progress=display)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    # noinspection PyMethodMayBeStatic
+    def _estimates(self, depend_dict):
+        """
+        :param depend_dict: the tasks to run
+        :type depend_dict: dict
+        :return: the expected durations of the tasks from the run history
+        :rtype: dict
+        """
+        history = RunHistory()
+        try:
+            return history.estimates(depend_dict.keys())
+        except (sqlite3.Error, OSError) as ex:
+            debug("can not read the run history: {err}".format(err=str(ex)))
+            return {}
+        finally:
+            history.close()
+
+    # noinspection PyMethodMayBeStatic
+    def _use_color(self, color):
+        """
+        :param color: 'auto', 'always' or 'never'
+        :type color: str
+        :return: asserted if the task names should be colored
+        :rtype: bool
+        """
+        if color == 'auto':
+            return sys.stdout.isatty()
+        return color == 'always'
+
+    @staticmethod
+    def close_pool():
+        """
+        Stop the worker processes.  Called when the herring invocation is finished.
+        """
+        if HerringRunner.pool is not None:
+            HerringRunner.pool.close()
+            HerringRunner.pool = None
+
+    @staticmethod
+    def report_timeline():
+        """
+        Print the slowest tasks and, with --critical_path, the critical path analysis, write the --trace
+        file and add the tasks that were ran to the run history, then forget the timeline.  Called when the
+        herring invocation is finished.
+        """
+        if HerringRunner.progress is not None:
+            HerringRunner.progress.clear()
+            HerringRunner.progress = None
+        timeline = HerringRunner.timeline
+        HerringRunner.timeline = None
+        if timeline is None:
+            return
+        jobs = getattr(HerringFile.settings, 'jobs', None)
+        for line in timeline.summary():
+            info(line)
+        if getattr(HerringFile.settings, 'critical_path', False):
+            for line in CriticalPathAnalysis.from_timeline(timeline, jobs=jobs).report():
+                info(line)
+        trace = getattr(HerringFile.settings, 'trace', None)
+        if trace:
+            try:
+                timeline.write_trace(trace, jobs=jobs)
+            except (IOError, OSError) as ex:
+                error("Can not write the trace file {path}: {err}".format(path=trace, err=str(ex)))
+        history = RunHistory()
+        try:
+            history.record(timeline, jobs=jobs)
+        except (sqlite3.Error, OSError) as ex:
+            warning("Can not record the run history: {err}".format(err=str(ex)))
+        finally:
+            history.close()
 
     @staticmethod
     def run_tasks(task_list):
-        interactive = HerringFile.settings
-        return HerringRunner()._run_tasks(task_list, interactive)
+        interactive = getattr(HerringFile.settings, 'interactive', False)
+        jobs = getattr(HerringFile.settings, 'jobs', None)
+        start_method = getattr(HerringFile.settings, 'start_method', None)
+        force = getattr(HerringFile.settings, 'force', False)
+        cache_size = getattr(HerringFile.settings, 'cache_size', None)
+        remote_cache = getattr(HerringFile.settings, 'remote_cache', None)
+        output = getattr(HerringFile.settings, 'output', GROUPED)
+        color = getattr(HerringFile.settings, 'color', 'auto')
+        on_failure = getattr(HerringFile.settings, 'on_failure', STOP)
+        default_estimate = getattr(HerringFile.settings, 'default_estimate', DEFAULT_ESTIMATE)
+        progress = ProgressDisplay.enabled(HerringFile.settings)
+        return HerringRunner()._run_tasks(task_list, interactive, jobs=jobs, start_method=start_method, force=force,
+                                          cache_size=cache_size, remote_cache=remote_cache, output=output,
+                                          color=color, on_failure=on_failure, default_estimate=default_estimate,
+                                          progress=progress)
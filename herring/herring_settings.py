@@ -3,13 +3,17 @@
 """
 HarvesterSettings adds application specific information to the generic ApplicationSettings class.
 """
+import multiprocessing
 import os
 import textwrap
 import io
 
+from herring.artifact_cache import DEFAULT_CACHE_SIZE
 from herring.support.mkdir_p import mkdir_p
 from herring.support.simple_logger import warning
 from herring.support.application_settings import ApplicationSettings
+from herring.task_output import GROUPED, OUTPUT_MODES
+from herring.task_scheduler import DEFAULT_ESTIMATE, FAIL_FAST, KEEP_GOING, STOP
 
 __docformat__ = 'restructuredtext en'
 __all__ = ("HerringSettings",)
@@ -48,19 +52,50 @@ class HerringSettings(ApplicationSettings):
         'interactive': 'Run all the tasks in the same process without buffering the output.  The '
                        'default action is to run the tasks in parallel processes, buffering each tasks '
                        'output',
+        'jobs': 'The maximum number of tasks to run in parallel processes (default: the number of CPUs).',
+        'force': 'Run the tasks even if their inputs and outputs have not changed.',
+        'cache_size': 'The size limit of the artifact cache (~/.herring/cache) that saves the outputs of tasks '
+                      'that declare inputs and outputs, 0 disables the cache (default: 1024).',
+        'remote_cache': 'The URL of a remote artifact cache server shared with other machines (see '
+                        'herring.remote_cache_server).  Requires the local artifact cache.',
+        'keep_going': 'When a task fails, keep running every task that does not depend upon a failed task.  The '
+                      'default is to not start any more tasks and wait for the running tasks to finish.',
+        'fail_fast': 'When a task fails, cancel the running tasks.',
+        'default_estimate': 'The expected duration in seconds of the tasks without a run history, used to start '
+                            'the tasks with the longest expected remaining chain of tasks first (default: 1).',
+        'daemon': 'Start a background daemon for the project that keeps the tasks loaded, then use the "herringc" '
+                  'command instead of "herring" to have the daemon run the tasks.',
+        'stop_daemon': 'Stop the project\'s daemon.',
+        'start_method': 'How the parallel task processes are started.  "fork" processes inherit the loaded '
+                        'tasks, "spawn" processes start clean and load the tasks, "forkserver" processes '
+                        'are forked from a clean server with the tasks preloaded (default: the platform\'s '
+                        'default).',
 
         'output_group': '',
         'quiet': 'Suppress herring output.',
         'debug': 'Display task debug messages.',
         'herring_debug': 'Display herring debug messages.',
-        'leave_union_dir': 'Leave the union herringlib directory on disk (do not automatically erase).  '
-                           'Useful for debugging.',
         'json': 'Output list tasks (--tasks, --usage, --depends, --all) in JSON format.',
+        'output': 'How the output of the parallel tasks is written.  "grouped" writes each task\'s output when '
+                  'the task finishes, "stream" writes each line as it is produced, prefixed with the task name '
+                  '(default: grouped).',
+        'trace': 'Write the timing of the tasks to the file in the Chrome trace-event JSON format (view it in '
+                 'chrome://tracing or https://ui.perfetto.dev).',
+        'critical_path': 'At the end of the run, show the critical path through the tasks that ran, the slack of '
+                         'the other tasks and the minimum wall time with unlimited workers and with --jobs.',
+        'progress': 'While the tasks run, show a status line with the number of finished tasks, the estimated '
+                    'time remaining from the run history and the running tasks.  Only shown when the output '
+                    'is a terminal and --json is not given.',
+        'color': 'When to color the task names of the streamed output, "auto" colors them if the output is a '
+                 'terminal (default: auto).',
 
         'info_group': '',
         'version': "Show herring's version.",
         'longhelp': 'Long help about Herring.',
         'environment': "Show herring's environment",
+        'history': 'Show the run history of the task: the number of runs and failures, the p50 and p95 durations '
+                   'and the trend of the recent durations.',
+        'analyze_trace': 'Show the critical path analysis (see --critical_path) of a saved --trace file.',
     }
 
     def __init__(self, default_herringlib=DEFAULT_HERRINGLIB, default_herringconf=DEFAULT_HERRINGCONF):
@@ -127,6 +162,27 @@ class HerringSettings(ApplicationSettings):
                                         action='store_true', help=self._help['list_all_tasks'])
         task_options_group.add_argument('-i', '--interactive', dest='interactive', action='store_true',
                                         default=False, help=self._help['interactive'])
+        task_options_group.add_argument('--jobs', metavar='N', type=int, default=os.cpu_count(),
+                                        help=self._help['jobs'])
+        task_options_group.add_argument('--force', dest='force', action='store_true', default=False,
+                                        help=self._help['force'])
+        task_options_group.add_argument('--cache_size', metavar='MEGABYTES', type=int, default=DEFAULT_CACHE_SIZE,
+                                        help=self._help['cache_size'])
+        task_options_group.add_argument('--remote_cache', metavar='URL', default=None,
+                                        help=self._help['remote_cache'])
+        on_failure_group = task_options_group.add_mutually_exclusive_group()
+        on_failure_group.add_argument('--keep_going', dest='on_failure', action='store_const', const=KEEP_GOING,
+                                      default=STOP, help=self._help['keep_going'])
+        on_failure_group.add_argument('--fail_fast', dest='on_failure', action='store_const', const=FAIL_FAST,
+                                      help=self._help['fail_fast'])
+        task_options_group.add_argument('--default_estimate', metavar='SECONDS', type=float,
+                                        default=DEFAULT_ESTIMATE, help=self._help['default_estimate'])
+        task_options_group.add_argument('--daemon', dest='daemon', action='store_true', default=False,
+                                        help=self._help['daemon'])
+        task_options_group.add_argument('--stop_daemon', dest='stop_daemon', action='store_true', default=False,
+                                        help=self._help['stop_daemon'])
+        task_options_group.add_argument('--start_method', choices=multiprocessing.get_all_start_methods(),
+                                        default=None, help=self._help['start_method'])
 
         output_group = parser.add_argument_group(title='Output Options', description=self._help['output_group'])
         output_group.add_argument('-q', '--quiet', dest='quiet', action='store_true',
@@ -135,9 +191,18 @@ class HerringSettings(ApplicationSettings):
                                   action='store_true', help=self._help['debug'])
         output_group.add_argument('--herring_debug', dest='herring_debug',
                                   action='store_true', help=self._help['herring_debug'])
-        output_group.add_argument('--leave_union_dir', action='store_true', help=self._help['leave_union_dir'])
         output_group.add_argument('-j', '--json', dest='json', action='store_true',
                                   help=self._help['json'])
+        output_group.add_argument('--output', choices=OUTPUT_MODES, default=GROUPED,
+                                  help=self._help['output'])
+        output_group.add_argument('--trace', metavar='FILE', default=None,
+                                  help=self._help['trace'])
+        output_group.add_argument('--critical_path', dest='critical_path', action='store_true',
+                                  help=self._help['critical_path'])
+        output_group.add_argument('--progress', dest='progress', action='store_true',
+                                  help=self._help['progress'])
+        output_group.add_argument('--color', choices=('auto', 'always', 'never'), default='auto',
+                                  help=self._help['color'])
 
         info_group = parser.add_argument_group(title='Informational Commands', description=self._help['info_group'])
         info_group.add_argument('-v', '--version', dest='version',
@@ -145,6 +210,8 @@ class HerringSettings(ApplicationSettings):
         info_group.add_argument('-l', '--longhelp', dest='longhelp', action='store_true',
                                 help=self._help['longhelp'])
         info_group.add_argument('--environment', action='store_true', help=self._help['environment'])
+        info_group.add_argument('--history', metavar='TASK', default=None, help=self._help['history'])
+        info_group.add_argument('--analyze_trace', metavar='FILE', default=None, help=self._help['analyze_trace'])
 
     # noinspection PyUnresolvedReferences
     def _cli_validate(self, settings, remaining_argv):
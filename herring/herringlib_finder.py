@@ -0,0 +1,100 @@
+# coding=utf-8
+
+"""
+The herringlib union without copying files.
+
+The HerringlibFinder is installed at the front of sys.meta_path and resolves the "herringlib" package and
+its sub-modules across the ordered herringlib directories, the first directory that has a module (or
+package) wins.  The herringlib package's (and sub-packages') __path__ is the union of the matching
+directories, so tools that walk a package's __path__ see the merged contents.  Because the modules are
+loaded from their real files, tracebacks point at the real source.
+
+Usage
+-----
+
+::
+
+    HerringlibFinder.install([Path('herringlib'), Path('~/.herring/herringlib').expanduser()])
+    import herringlib.project_settings
+
+"""
+import os
+import sys
+
+from importlib.abc import MetaPathFinder
+from importlib.machinery import ModuleSpec, SourceFileLoader
+from importlib.util import spec_from_file_location
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('HerringlibFinder',)
+
+PACKAGE = 'herringlib'
+
+
+class HerringlibFinder(MetaPathFinder):
+    """
+    Finds herringlib modules in an ordered list of herringlib directories.
+    """
+
+    def __init__(self, library_paths):
+        """
+        :param library_paths: the herringlib directories, in the order searched
+        :type library_paths: list(Path)
+        """
+        self.library_paths = [os.path.abspath(str(path)) for path in library_paths]
+
+    @classmethod
+    def install(cls, library_paths):
+        """
+        Replace any installed HerringlibFinder with one for the given directories.
+
+        :param library_paths: the herringlib directories, in the order searched
+        :type library_paths: list(Path)
+        :return: the installed finder
+        :rtype: HerringlibFinder
+        """
+        sys.meta_path[:] = [finder for finder in sys.meta_path if not isinstance(finder, HerringlibFinder)]
+        finder = cls(library_paths)
+        sys.meta_path.insert(0, finder)
+        return finder
+
+    # noinspection PyUnusedLocal
+    def find_spec(self, fullname, path=None, target=None):
+        """
+        :param fullname: the full module name
+        :type fullname: str
+        :return: the module spec for a herringlib module or None to let the other finders look
+        :rtype: ModuleSpec|None
+        """
+        parts = fullname.split('.')
+        if parts[0] != PACKAGE:
+            return None
+        directories = [os.path.join(library_path, *parts[1:]) for library_path in self.library_paths]
+        for directory in directories:
+            if os.path.isdir(directory):
+                return self._package_spec(fullname, directory, [dir_ for dir_ in directories
+                                                                if os.path.isdir(dir_)])
+            module_file = directory + '.py'
+            if len(parts) > 1 and os.path.isfile(module_file):
+                return spec_from_file_location(fullname, module_file, loader=SourceFileLoader(fullname, module_file))
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def _package_spec(self, fullname, directory, search_locations):
+        """
+        :param fullname: the full package name
+        :type fullname: str
+        :param directory: the first found package directory
+        :type directory: str
+        :param search_locations: every directory of the package in the union
+        :type search_locations: list(str)
+        :return: the package spec, a namespace package if the first found directory has no __init__.py
+        :rtype: ModuleSpec
+        """
+        init_file = os.path.join(directory, '__init__.py')
+        if os.path.isfile(init_file):
+            return spec_from_file_location(fullname, init_file, loader=SourceFileLoader(fullname, init_file),
+                                           submodule_search_locations=search_locations)
+        spec = ModuleSpec(fullname, None, is_package=True)
+        spec.submodule_search_locations = search_locations
+        return spec
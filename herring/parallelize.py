@@ -32,10 +32,22 @@ then to run them in parallel::
 
     errors = parallelize_process(alpha, beta)
 
+For finer control, for example when the next function to run depends upon which functions have already
+finished, use an executor.  Executors start named functions and report them back as they finish::
+
+    functions = {'alpha': alpha, 'beta': beta}
+    executor = ProcessExecutor(functions.get)
+    executor.start('alpha')
+    executor.start('beta')
+    while executor.running:
+        name, error_msg = executor.wait()
+
 """
 import multiprocessing
 import threading
 
+from multiprocessing import connection
+
 import sys
 import queue
 
@@ -46,6 +58,211 @@ from herring.support.simple_logger import Logger, error, debug
 __docformat__ = 'restructuredtext en'
 
 
+def _exitcode_error(name, exitcode):
+    """
+    Convert a job's exit code into an error string.
+
+    :param name: the job name
+    :type name: str
+    :param exitcode: the job's exit code
+    :type exitcode: int|None
+    :return: the error string or None if the job passed
+    :rtype: str|None
+    """
+    if exitcode is None:
+        return "job {name} has not yet terminated".format(name=name)
+    elif exitcode > 0:
+        return "job {name} exited with {code}".format(name=name, code=exitcode)
+    elif exitcode < 0:
+        return "job {name} terminated by signal {code}".format(name=name, code=exitcode)
+    return None
+
+
+def _exitcode(result):
+    """
+    Functions that return anything other than an integer (usually None) are considered to have passed.
+
+    :param result: the value returned by the function
+    :return: the exit code
+    :rtype: int
+    """
+    if isinstance(result, int):
+        return result
+    return 0
+
+
+def _process_wrapper(function_, conn):
+    """
+    Wraps the function to capture the output which is returned via the connection.
+
+    If the function raises an exception, return 1
+
+    :param function_: function to execute
+    :type function_: function
+    :param conn: the sending end of the pipe used to return a string containing the output of the function
+    :type conn: multiprocessing.connection.Connection
+    :return: exits the process with zero to indicate pass or positive integer to indicate error
+    """
+    sys.stdout = sys.stderr = StringIO()
+
+    try:
+        debug("Starting process wrapped function")
+        result = function_()
+        debug("Finished process wrapped function")
+    except Exception as ex:
+        error("parallelize_process error: " + str(ex))
+        result = 1
+
+    messages = sys.stdout.getvalue() or ""
+    debug("messages: " + messages)
+    conn.send(messages)
+    conn.close()
+    sys.exit(_exitcode(result))
+
+
+class SerialExecutor(object):
+    """
+    Runs each function in the current process as soon as it is started.  The output is not buffered.
+    """
+
+    def __init__(self, function_lookup):
+        """
+        :param function_lookup: function that given a name returns the function to run
+        :type function_lookup: function
+        """
+        self._function_lookup = function_lookup
+        self._finished = []
+
+    @property
+    def running(self):
+        """
+        :return: the number of started functions that have not yet been waited upon
+        :rtype: int
+        """
+        return len(self._finished)
+
+    def start(self, name):
+        """
+        Run the named function, y = f() where y is a positive integer.
+
+        :param name: the name of the function, also used to report the function back from wait()
+        :type name: str
+        """
+        try:
+            exitcode = self._function_lookup(name)()
+        except Exception as ex:
+            error(str(ex))
+            exitcode = 1
+        error_msg = _exitcode_error(name, _exitcode(exitcode))
+        if error_msg is not None:
+            error("task error: " + error_msg)
+        self._finished.append((name, error_msg))
+
+    def wait(self):
+        """
+        Get the next finished function.
+
+        :return: tuple containing the name of the finished function and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        return self._finished.pop(0)
+
+    def cancel(self):
+        """
+        The functions run as soon as they are started so there is nothing to stop.  The finished functions
+        that have not been waited upon are still reported by wait().
+
+        :return: the names of the canceled functions, always empty
+        :rtype: list(str)
+        """
+        return []
+
+
+class ProcessExecutor(object):
+    """
+    Runs each function in its own process.  The output of each process is captured and written to
+    stdout when the process finishes.
+    """
+
+    def __init__(self, function_lookup):
+        """
+        :param function_lookup: function that given a name returns the function to run
+        :type function_lookup: function
+        """
+        self._function_lookup = function_lookup
+        self._jobs = {}
+
+    @property
+    def running(self):
+        """
+        :return: the number of started functions that have not yet been waited upon
+        :rtype: int
+        """
+        return len(self._jobs)
+
+    def start(self, name):
+        """
+        Start a process running the named function, y = f() where y is a positive integer.
+
+        :param name: the name of the function, also used to report the function back from wait()
+        :type name: str
+        """
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(name=name, target=_process_wrapper,
+                                          args=(self._function_lookup(name), writer,))
+        process.start()
+        writer.close()
+        self._jobs[name] = (process, reader)
+
+    def wait(self):
+        """
+        Block until one of the running processes finishes.
+
+        :return: tuple containing the name of the finished function and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        waitables = {}
+        for name, (process, reader) in self._jobs.items():
+            waitables[reader] = name
+            waitables[process.sentinel] = name
+        name = waitables[connection.wait(list(waitables.keys()))[0]]
+        process, reader = self._jobs.pop(name)
+
+        value = None
+        try:
+            if reader.poll():
+                value = reader.recv()
+        except EOFError:
+            pass
+        finally:
+            reader.close()
+        if value:
+            sys.stdout.write("process: " + value)
+            sys.stdout.flush()
+
+        process.join()
+        error_msg = _exitcode_error(name, process.exitcode)
+        if error_msg is not None:
+            error("process error: " + error_msg)
+        return name, error_msg
+
+    def cancel(self):
+        """
+        Terminate the running processes.
+
+        :return: the names of the canceled functions
+        :rtype: list(str)
+        """
+        names = list(self._jobs.keys())
+        for process, reader in self._jobs.values():
+            process.terminate()
+        for process, reader in self._jobs.values():
+            process.join()
+            reader.close()
+        self._jobs = {}
+        return names
+
+
 def parallelize_process(*functions):
     """
     Run each given function as a process in parallel.
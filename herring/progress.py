@@ -0,0 +1,157 @@
+# coding=utf-8
+
+"""
+A live progress line for parallel runs.
+
+With --progress, while the WorkerPool runs the tasks the last line of the terminal shows the number of
+finished tasks out of the tasks to run, the estimated time remaining and the running tasks with how long
+each has been running::
+
+    [3/12] ETA 0:42  build 12.3s, doc::sphinx 4.0s, lint 1.1s
+
+The estimated time remaining is the expected remaining work, from the run history durations (see
+herring.run_history), divided by the number of jobs.
+
+The line is redrawn at most every REFRESH_INTERVAL seconds, from the herring process while it waits for
+the workers, so the workers are not slowed down.  It is erased before any other output is written.  The
+progress line is only shown when the output is a terminal and --json is not given.
+"""
+import sys
+import time
+
+from herring.support.terminalsize import get_terminal_size
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('ProgressDisplay',)
+
+# the minimum number of seconds between redraws
+REFRESH_INTERVAL = 0.25
+
+# the width used when the terminal does not report its size
+DEFAULT_WIDTH = 80
+
+# erase to the end of the line
+CLEAR_LINE = '\r\033[K'
+
+
+def _format_eta(seconds):
+    """
+    :return: the seconds as h:mm:ss or m:ss
+    :rtype: str
+    """
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return '{0}:{1:02d}:{2:02d}'.format(hours, minutes, seconds)
+    return '{0}:{1:02d}'.format(minutes, seconds)
+
+
+class ProgressDisplay(object):
+    """
+    The progress line of the tasks recorded in a timeline.
+    """
+
+    def __init__(self, timeline, jobs=None, stream=None, interval=REFRESH_INTERVAL, clock=time.monotonic,
+                 terminal_size=get_terminal_size):
+        """
+        :param timeline: the timeline the scheduler records the tasks in
+        :type timeline: herring.task_timing.TaskTimeline
+        :param jobs: the number of tasks ran at the same time, None for no limit
+        :type jobs: int|None
+        :param stream: the terminal, None for sys.stdout
+        :type stream: file|None
+        :param interval: the minimum number of seconds between redraws
+        :type interval: float
+        :param clock: returns the current time in seconds, used to bound the refresh rate
+        :type clock: function
+        :param terminal_size: returns the terminal's (width, height)
+        :type terminal_size: function
+        """
+        self._timeline = timeline
+        self._jobs = jobs
+        self._stream = stream or sys.stdout
+        self.interval = interval
+        self._clock = clock
+        self._terminal_size = terminal_size
+        self._estimates = {}
+        self._last_draw = None
+        self._drawn = False
+
+    @staticmethod
+    def enabled(settings, stream=None):
+        """
+        :param settings: the application settings
+        :param stream: the terminal, None for sys.stdout
+        :type stream: file|None
+        :return: asserted if the progress line was asked for and can be shown
+        :rtype: bool
+        """
+        stream = stream or sys.stdout
+        if not getattr(settings, 'progress', False) or getattr(settings, 'json', False):
+            return False
+        try:
+            return stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def add(self, names, estimates=None, default_estimate=0.0):
+        """
+        Add tasks to run.
+
+        :param names: the task names
+        :type names: iterable(str)
+        :param estimates: the expected durations of the tasks in seconds
+        :type estimates: dict|None
+        :param default_estimate: the expected duration of the tasks without an estimate
+        :type default_estimate: float
+        """
+        estimates = estimates or {}
+        for name in names:
+            self._estimates.setdefault(name, estimates.get(name, default_estimate))
+
+    def line(self):
+        """
+        :return: the progress line, not limited to the terminal width
+        :rtype: str
+        """
+        now = self._timeline.now()
+        finished = set(timing.name for timing in self._timeline.completed())
+        running = self._timeline.running()
+        done = len(finished.intersection(self._estimates))
+        unfinished = [name for name in self._estimates if name not in finished]
+        remaining = sum(self._estimates[name] for name in unfinished)
+        for timing in running:
+            remaining -= min(now - timing.started, self._estimates.get(timing.name, 0.0))
+        eta = remaining / max(1, min(self._jobs or len(unfinished), len(unfinished)))
+        tasks = ', '.join('{name} {elapsed:.1f}s'.format(name=timing.name, elapsed=now - timing.started)
+                          for timing in running)
+        return '[{done}/{total}] ETA {eta}  {tasks}'.format(done=done, total=len(self._estimates),
+                                                             eta=_format_eta(max(0.0, eta)), tasks=tasks)
+
+    def refresh(self, force=False):
+        """
+        Redraw the progress line unless it was drawn less than the refresh interval ago.
+
+        :param force: asserted to redraw regardless of the refresh interval
+        :type force: bool
+        """
+        now = self._clock()
+        if not force and self._last_draw is not None and now - self._last_draw < self.interval:
+            return
+        self._last_draw = now
+        width = self._terminal_size()[0]
+        if width <= 1:
+            # a pseudo terminal without a size
+            width = DEFAULT_WIDTH
+        self._stream.write(CLEAR_LINE + self.line()[:max(0, width - 1)])
+        self._stream.flush()
+        self._drawn = True
+
+    def clear(self):
+        """
+        Erase the progress line so other output can be written.
+        """
+        if self._drawn:
+            self._stream.write(CLEAR_LINE)
+            self._stream.flush()
+            self._drawn = False
@@ -0,0 +1,207 @@
+# coding=utf-8
+
+"""
+The client for a remote artifact cache tier shared by several machines (ex: CI agents).
+
+The protocol is plain HTTP against a base URL::
+
+    GET|HEAD|PUT <url>/cas/<sha256 digest>   a gzip compressed blob (see herring.artifact_cache)
+    GET|PUT      <url>/ac/<key>              an entry, JSON: {"files": [[path, digest, mode], ...]}
+
+A GET or HEAD of a missing item answers 404.  An entry is only PUT after all of its blobs, so an entry
+found on the server can always be restored.  Any static HTTP server that accepts PUT can be used, and
+herring.remote_cache_server is a small reference server.
+
+Blobs are downloaded concurrently and streamed to disk.  Uploads are queued to a background thread so
+they do not add to the task's run time, and are drained when the herring run ends.  If the server
+can not be reached, a warning is given and the run continues with only the local cache.
+"""
+import json
+import os
+import queue
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from herring.support.simple_logger import debug, warning
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('RemoteCache',)
+
+CHUNK_SIZE = 64 * 1024
+
+# the errors that mean the server can not be used (URLError and socket errors are OSErrors, ValueError is
+# raised for malformed URLs and responses)
+REMOTE_ERRORS = (OSError, ValueError, HTTPException)
+
+
+class RemoteCache(object):
+    """
+    A remote artifact cache server.
+    """
+
+    def __init__(self, url, threads=4, timeout=10):
+        """
+        :param url: the base URL of the server
+        :type url: str
+        :param threads: the number of concurrent downloads
+        :type threads: int
+        :param timeout: the socket timeout in seconds
+        :type timeout: float
+        """
+        self.url = url.rstrip('/')
+        self.threads = threads
+        self.timeout = timeout
+        self.available = True
+        self._uploads = None
+        self._uploader = None
+
+    def _failed(self, ex):
+        """
+        Stop using the server after an error.
+        """
+        if self.available:
+            warning("Remote cache {url} is unavailable, using only the local cache: {err}".format(url=self.url,
+                                                                                                   err=str(ex)))
+        self.available = False
+
+    def _open(self, path, method='GET', data=None, headers=None):
+        """
+        :return: the response or None if the item is not on the server
+        :raises REMOTE_ERRORS: if the request failed
+        """
+        request = Request(self.url + path, data=data, headers=headers or {}, method=method)
+        try:
+            return urlopen(request, timeout=self.timeout)
+        except HTTPError as ex:
+            if ex.code == 404:
+                return None
+            raise
+
+    def _put(self, path, data, headers):
+        """
+        :raises REMOTE_ERRORS: if the upload failed
+        """
+        request = Request(self.url + path, data=data, headers=headers, method='PUT')
+        urlopen(request, timeout=self.timeout).close()
+
+    def get_entry(self, key):
+        """
+        :param key: the cache key
+        :type key: str
+        :return: the entry's list of [path, digest, mode] or None if not on the server
+        :rtype: list|None
+        """
+        if not self.available:
+            return None
+        try:
+            response = self._open('/ac/' + key)
+            if response is None:
+                return None
+            with response:
+                return json.loads(response.read().decode('utf-8'))['files']
+        except REMOTE_ERRORS + (KeyError,) as ex:
+            self._failed(ex)
+            return None
+
+    def _get_blob(self, digest, receive):
+        """
+        Download a blob, passing the streamed response to receive(digest, chunks).
+
+        :return: asserted if the blob was received
+        :rtype: bool
+        """
+        response = self._open('/cas/' + digest)
+        if response is None:
+            return False
+        with response:
+            chunks = iter(lambda: response.read(CHUNK_SIZE), b'')
+            return receive(digest, chunks)
+
+    def get_blobs(self, digests, receive):
+        """
+        Concurrently download blobs.
+
+        :param digests: the content digests
+        :type digests: list(str)
+        :param receive: function(digest, chunks) that saves the compressed blob from an iterator of bytes and
+            returns asserted if the blob is valid.  Called from several threads at once.
+        :type receive: function
+        :return: asserted if all of the blobs were received
+        :rtype: bool
+        """
+        if not self.available:
+            return False
+        if not digests:
+            return True
+        try:
+            with ThreadPoolExecutor(min(self.threads, len(digests))) as executor:
+                return all(executor.map(lambda digest_: self._get_blob(digest_, receive), digests))
+        except REMOTE_ERRORS as ex:
+            self._failed(ex)
+            return False
+
+    def put(self, key, files, blob_path):
+        """
+        Queue the upload of an entry and its blobs to the background thread.
+
+        :param key: the cache key
+        :type key: str
+        :param files: list of [path, digest, mode]
+        :type files: list
+        :param blob_path: function(digest) returning the local compressed blob's file path
+        :type blob_path: function
+        """
+        if not self.available:
+            return
+        if self._uploader is None:
+            self._uploads = queue.Queue()
+            self._uploader = threading.Thread(target=self._upload_loop, name='herring-cache-upload')
+            self._uploader.daemon = True
+            self._uploader.start()
+        self._uploads.put((key, files, blob_path))
+
+    def _upload_loop(self):
+        while True:
+            job = self._uploads.get()
+            if job is None:
+                break
+            if self.available:
+                try:
+                    self._upload(*job)
+                except REMOTE_ERRORS as ex:
+                    self._failed(ex)
+
+    def _upload(self, key, files, blob_path):
+        """
+        Upload the blobs the server does not have, then the entry.
+        """
+        for digest in sorted(set(digest for path, digest, mode in files)):
+            response = self._open('/cas/' + digest, method='HEAD')
+            if response is not None:
+                response.close()
+                continue
+            try:
+                blob_file = open(blob_path(digest), 'rb')
+            except (IOError, OSError) as ex:
+                # evicted from the local cache since the task finished
+                debug("not uploading {key}: {err}".format(key=key, err=str(ex)))
+                return
+            with blob_file:
+                headers = {'Content-Type': 'application/octet-stream',
+                           'Content-Length': str(os.fstat(blob_file.fileno()).st_size)}
+                self._put('/cas/' + digest, blob_file, headers)
+        data = json.dumps({'files': files}).encode('utf-8')
+        self._put('/ac/' + key, data, {'Content-Type': 'application/json'})
+
+    def drain(self):
+        """
+        Wait for the queued uploads to finish.
+        """
+        if self._uploader is not None:
+            self._uploads.put(None)
+            self._uploader.join()
+            self._uploader = None
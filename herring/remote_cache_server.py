@@ -0,0 +1,151 @@
+# coding=utf-8
+
+"""
+A small reference server for the remote artifact cache protocol (see herring.remote_cache), for local
+testing or a small team.  Items are stored as files in a directory::
+
+    python -m herring.remote_cache_server --port 8080 --directory /var/cache/herring
+
+and herring is then ran with::
+
+    herring --remote_cache http://localhost:8080 build
+
+The server does not authenticate or evict.
+"""
+import argparse
+import os
+import re
+import shutil
+import tempfile
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from herring.support.mkdir_p import mkdir_p
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('RemoteCacheServer', 'main')
+
+# /cas/<digest> or /ac/<key>
+ITEM_PATH = re.compile(r'^/(cas|ac)/([0-9a-f]{64})$')
+
+
+class RemoteCacheHandler(BaseHTTPRequestHandler):
+    """
+    Handles GET, HEAD and PUT requests for the items in the server's directory.
+    """
+
+    def _item_path(self):
+        """
+        :return: the item's file path or None (after sending an error) if the request path is invalid
+        :rtype: str|None
+        """
+        match = ITEM_PATH.match(self.path)
+        if match is None:
+            self.send_error(400, 'Invalid path')
+            return None
+        return os.path.join(self.server.directory, match.group(1), match.group(2))
+
+    def _send_item(self, body):
+        item_path = self._item_path()
+        if item_path is None:
+            return
+        try:
+            item_file = open(item_path, 'rb')
+        except (IOError, OSError):
+            self.send_error(404)
+            return
+        with item_file:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(os.fstat(item_file.fileno()).st_size))
+            self.end_headers()
+            if body:
+                shutil.copyfileobj(item_file, self.wfile)
+
+    def do_GET(self):
+        self._send_item(body=True)
+
+    def do_HEAD(self):
+        self._send_item(body=False)
+
+    def do_PUT(self):
+        item_path = self._item_path()
+        if item_path is None:
+            return
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            self.send_error(411)
+            return
+        remaining = int(length)
+        with tempfile.NamedTemporaryFile('wb', dir=mkdir_p(os.path.dirname(item_path)), prefix='.tmp',
+                                         delete=False) as temp_file:
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 64 * 1024))
+                if not chunk:
+                    break
+                temp_file.write(chunk)
+                remaining -= len(chunk)
+        if remaining:
+            os.remove(temp_file.name)
+            self.send_error(400, 'Incomplete body')
+            return
+        os.replace(temp_file.name, item_path)
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format_, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format_, *args)
+
+
+class RemoteCacheServer(ThreadingHTTPServer):
+    """
+    The remote cache server.  Requests are handled in threads.
+
+    Usage::
+
+        server = RemoteCacheServer(('localhost', 0), directory)
+        threading.Thread(target=server.serve_forever).start()
+        url = 'http://localhost:{port}'.format(port=server.server_port)
+        ...
+        server.shutdown()
+    """
+    daemon_threads = True
+
+    def __init__(self, address, directory, verbose=False):
+        """
+        :param address: the (host, port) to listen on
+        :type address: tuple(str, int)
+        :param directory: the directory the items are stored in
+        :type directory: str
+        :param verbose: asserted to log every request
+        :type verbose: bool
+        """
+        self.directory = mkdir_p(directory)
+        self.verbose = verbose
+        ThreadingHTTPServer.__init__(self, address, RemoteCacheHandler)
+
+
+def main():
+    """
+    Run the server until interrupted.
+    """
+    parser = argparse.ArgumentParser(description='Herring remote artifact cache server.')
+    parser.add_argument('--host', default='localhost', help='The interface to listen on (default: localhost).')
+    parser.add_argument('--port', type=int, default=8080, help='The port to listen on (default: 8080).')
+    parser.add_argument('--directory', default=os.path.expanduser('~/.herring/remote_cache'),
+                        help='The directory the artifacts are stored in (default: ~/.herring/remote_cache).')
+    parser.add_argument('--verbose', action='store_true', help='Log every request.')
+    args = parser.parse_args()
+    server = RemoteCacheServer((args.host, args.port), args.directory, verbose=args.verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+# coding=utf-8
+
+"""
+The project's run history.
+
+At the end of each herring invocation, the duration, result, host and input fingerprint of every task that
+was ran (not skipped as already ran, up to date or restored from the artifact cache) are added to the
+project's history database (.herring/history.sqlite in the herringfile's directory)::
+
+    runs(id, started, host, jobs, wall_time)
+    task_runs(run_id, task, started, duration, result, exitcode, host, input_fingerprint)
+
+The input fingerprint is a hash of the contents of the task's declared input files (see
+herring.task_state), taken when the task finishes (see herring.task_timing), so durations may be compared
+for the same inputs.
+
+"herring --history TASK" shows the number of runs and failures, the p50 and p95 durations and the trend of
+the recent durations of the task.  The scheduler uses the median of the recent durations of each task as
+its estimate (see estimates()) to start the longest chains of tasks first.
+"""
+import hashlib
+import json
+import math
+import os
+import socket
+import sqlite3
+import time
+
+from herring.herring_file import HerringFile
+from herring.support.mkdir_p import mkdir_p
+from herring.support.simple_logger import debug
+from herring.task_with_args import HerringTasks
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('RunHistory', 'percentile', 'input_fingerprint')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    host TEXT NOT NULL,
+    jobs INTEGER,
+    wall_time REAL
+);
+CREATE TABLE IF NOT EXISTS task_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    task TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    result TEXT NOT NULL,
+    exitcode INTEGER,
+    host TEXT NOT NULL,
+    input_fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS task_runs_task ON task_runs (task, started);
+"""
+
+# the number of latest runs compared with the earlier runs for the trend
+TREND_RUNS = 5
+
+# the number of latest successful runs of a task its estimate is made from
+ESTIMATE_RUNS = 10
+
+# the number of task names per estimates query
+QUERY_CHUNK = 500
+
+# a change of the median duration smaller than this fraction is steady
+TREND_THRESHOLD = 0.1
+
+
+def percentile(values, fraction):
+    """
+    :param values: the values
+    :type values: list(float)
+    :param fraction: 0.0 to 1.0, ex: 0.95 for the 95th percentile
+    :type fraction: float
+    :return: the nearest-rank percentile of the values, None if there are no values
+    :rtype: float|None
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(1, math.ceil(fraction * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+
+def input_fingerprint(name, state):
+    """
+    :param name: the task name
+    :type name: str
+    :param state: the state database used to hash the files
+    :type state: herring.task_state.TaskState
+    :return: the hash of the task's input files, None if the task does not declare inputs or they can not be read
+    :rtype: str|None
+    """
+    inputs = HerringTasks[name].get('inputs') if name in HerringTasks else None
+    if not inputs:
+        return None
+    try:
+        fingerprint = state.fingerprint(inputs)
+    except OSError as ex:
+        debug("can not fingerprint the inputs of {name}: {err}".format(name=name, err=str(ex)))
+        return None
+    return hashlib.sha256(json.dumps(sorted(fingerprint.items())).encode('utf-8')).hexdigest()
+
+
+class RunHistory(object):
+    """
+    The run history database.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: the database file, the default is .herring/history.sqlite in the herringfile's directory
+        :type path: str|None
+        """
+        if path is None:
+            path = os.path.join(HerringFile.directory or os.getcwd(), '.herring', 'history.sqlite')
+        self.path = path
+        self._db = None
+
+    def _connection(self):
+        """
+        :return: the database connection, creating the database if needed
+        :rtype: sqlite3.Connection
+        """
+        if self._db is None:
+            mkdir_p(os.path.dirname(self.path))
+            self._db = sqlite3.connect(self.path, timeout=10)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def record(self, timeline, jobs=None):
+        """
+        Add the tasks that were ran in a herring invocation, with the input fingerprints the timeline
+        recorded when they finished.
+
+        :param timeline: the timeline of the invocation
+        :type timeline: herring.task_timing.TaskTimeline
+        :param jobs: the --jobs setting
+        :type jobs: int|None
+        :return: the number of task runs added
+        :rtype: int
+        """
+        timings = [timing for timing in timeline.completed() if timing.pid is not None]
+        if not timings:
+            return 0
+        host = socket.gethostname()
+        wall_time = max(timing.finished for timing in timings) - min(timing.queued for timing in timings)
+        db = self._connection()
+        with db:
+            run_id = db.execute('INSERT INTO runs (started, host, jobs, wall_time) VALUES (?, ?, ?, ?)',
+                                (timeline.epoch, host, jobs, wall_time)).lastrowid
+            db.executemany('INSERT INTO task_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                           [(run_id, timing.name, timeline.epoch + timing.started, timing.duration,
+                             'failed' if timing.error else 'ok', timing.exitcode, host, timing.fingerprint)
+                            for timing in timings])
+        return len(timings)
+
+    def runs(self, task):
+        """
+        :param task: the task name
+        :type task: str
+        :return: the (started, duration, result, host) of the task's runs, oldest first
+        :rtype: list(tuple)
+        """
+        return self._connection().execute('SELECT started, duration, result, host FROM task_runs '
+                                          'WHERE task = ? ORDER BY started', (task,)).fetchall()
+
+    def durations(self, task):
+        """
+        :param task: the task name
+        :type task: str
+        :return: the durations of the task's successful runs, oldest first
+        :rtype: list(float)
+        """
+        return [duration for started, duration, result, host in self.runs(task) if result == 'ok']
+
+    def estimates(self, tasks, runs=ESTIMATE_RUNS):
+        """
+        :param tasks: the task names
+        :type tasks: iterable(str)
+        :param runs: the number of latest successful runs of each task to use
+        :type runs: int
+        :return: the median duration of the latest successful runs of the tasks that have any
+        :rtype: dict
+        """
+        tasks = list(tasks)
+        durations = {}
+        db = self._connection()
+        for index in range(0, len(tasks), QUERY_CHUNK):
+            chunk = tasks[index:index + QUERY_CHUNK]
+            rows = db.execute("SELECT task, duration FROM task_runs WHERE result = 'ok' AND task IN ({marks}) "
+                              "ORDER BY started".format(marks=', '.join('?' * len(chunk))), chunk)
+            for task, duration in rows:
+                durations.setdefault(task, []).append(duration)
+        return dict((task, percentile(values[-runs:], 0.5)) for task, values in durations.items())
+
+    # noinspection PyMethodMayBeStatic
+    def trend(self, durations, count=TREND_RUNS):
+        """
+        :param durations: durations, oldest first
+        :type durations: list(float)
+        :param count: the number of latest durations compared with the earlier durations
+        :type count: int
+        :return: the relative change of the median duration of the latest runs, None if there are too few runs
+        :rtype: float|None
+        """
+        if len(durations) < count + 1:
+            return None
+        earlier = percentile(durations[:-count], 0.5)
+        if not earlier:
+            return None
+        return percentile(durations[-count:], 0.5) / earlier - 1.0
+
+    def report(self, task):
+        """
+        :param task: the task name
+        :type task: str
+        :return: the lines of the task's history report
+        :rtype: list(str)
+        """
+        runs = self.runs(task)
+        if not runs:
+            return ["No history for {task}".format(task=task)]
+        durations = [duration for started, duration, result, host in runs if result == 'ok']
+        failures = len(runs) - len(durations)
+        started, duration, result, host = runs[-1]
+        lines = ["History of {task}: {count} runs, {failures} failed, last ran {when} on {host} ({result})".format(
+            task=task, count=len(runs), failures=failures, host=host, result=result,
+            when=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(started)))]
+        if durations:
+            lines.append("  p50 {p50:.3f}s  p95 {p95:.3f}s  last {last:.3f}s".format(
+                p50=percentile(durations, 0.5), p95=percentile(durations, 0.95), last=durations[-1]))
+            change = self.trend(durations)
+            if change is None:
+                lines.append("  trend: not enough runs")
+            elif abs(change) < TREND_THRESHOLD:
+                lines.append("  trend: steady over the last {count} runs".format(count=TREND_RUNS))
+            else:
+                lines.append("  trend: {percent:.0f}% {direction} over the last {count} runs".format(
+                    percent=abs(change) * 100, direction='slower' if change > 0 else 'faster', count=TREND_RUNS))
+            lines.append("  recent: " + ' '.join("{0:.2f}s".format(value) for value in durations[-10:]))
+        return lines
@@ -0,0 +1,347 @@
+# coding=utf-8
+
+"""
+Run-once coordination of the tasks within a herring invocation.
+
+A task that has already succeeded in this herring invocation is not ran again when it is a dependency of
+a later run, for example when tasks call task_execute('clean') or task_execute('doc::generate').  A task
+that must run every time it is asked for is declared with::
+
+    @task(always_run=True)
+    def clean():
+        \"\"\"remove the build directory\"\"\"
+
+Every run asks the TaskCoordinator, kept in the herring process, before starting a task.  The
+coordinator answers with one of:
+
+* RUN - the task is now claimed by the asking process, which runs it then reports it finished,
+* SKIP - the task has already succeeded (it is in CompletedTasks),
+* WAIT - the task is claimed and still running elsewhere, the asker waits for its result instead of
+  running it a second time.
+
+Nested task_execute calls in the WorkerPool's workers reach the coordinator through a CoordinatorClient
+that sends the claims over the worker's pipe to the pool (see herring.worker_pool).  The client blocks
+while the task is running elsewhere, so in a worker a claim only ever results in running or skipping the
+task.  Waiting that can never end (ex: two workers each waiting for a task the other is running, or a task
+that task_executes itself) raises a CyclicDependencyError.
+
+The RunOnceExecutor wraps another executor (see herring.parallelize) and does the claiming, skipping,
+waiting and reporting.
+"""
+from herring.support.simple_logger import info
+from herring.support.toposort import CyclicDependencyError
+from herring.task_with_args import HerringTasks
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('CompletionRegistry', 'CompletedTasks', 'TaskCoordinator', 'CoordinatorClient', 'RunOnceExecutor',
+           'RUN', 'SKIP', 'WAIT')
+
+RUN = 'run'
+SKIP = 'skip'
+WAIT = 'wait'
+
+
+class CompletionRegistry(object):
+    """
+    The names of the tasks that have succeeded, in the order they were added.
+    """
+
+    def __init__(self):
+        self.names = []
+        self._names = set()
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        """
+        :param name: the name of a task that succeeded
+        :type name: str
+        """
+        if name not in self._names:
+            self._names.add(name)
+            self.names.append(name)
+
+
+# the tasks that have succeeded in this herring invocation
+CompletedTasks = CompletionRegistry()
+
+
+class TaskCoordinator(object):
+    """
+    The claims on the tasks of the herring invocation.  The owner of a claim is None for the herring
+    process or the id of the worker whose nested task_execute made the claim.
+    """
+
+    def __init__(self, registry=None):
+        """
+        :param registry: the completion registry, the default is CompletedTasks
+        :type registry: CompletionRegistry|None
+        """
+        self.registry = CompletedTasks if registry is None else registry
+        self._claims = {}
+        self._waiters = {}
+        self._holdings = {}
+        self._waiting_for = {}
+        self._results = {}
+        # the tasks the herring process is running in its own call stack, outermost first
+        self.holding = []
+
+    def claim(self, name, owner=None, holding=None, notify=None):
+        """
+        Claim the task.
+
+        :param name: the task name
+        :type name: str
+        :param owner: the claiming worker's id, None for the herring process
+        :type owner: int|None
+        :param holding: the tasks the claiming worker is running, outermost first
+        :type holding: list(str)|None
+        :param notify: called with the task name and error string (or None) when the task a WAIT is for finishes
+        :type notify: function|None
+        :return: RUN, SKIP or WAIT
+        :rtype: str
+        :raises CyclicDependencyError: if the wait would never end
+        """
+        if owner is not None and holding is not None:
+            self._holdings[owner] = list(holding)
+        if name in self.registry:
+            return SKIP
+        if name not in self._claims:
+            self._claims[name] = owner
+            self._results.pop(name, None)
+            return RUN
+        cycle = self._cycle(name, owner)
+        if cycle is not None:
+            raise CyclicDependencyError(cycle)
+        if notify is not None:
+            self._waiters.setdefault(name, []).append((owner, notify))
+            self._waiting_for[owner] = name
+        return WAIT
+
+    def _holder(self, name):
+        """
+        :return: the owner running the claimed task.  A claim of the herring process is either in the herring
+            process's call stack or ran by the worker the task was dispatched to, if known.
+        :rtype: int|None|object
+        """
+        owner = self._claims[name]
+        if owner is None and name not in self.holding:
+            for holder, holding in self._holdings.items():
+                if holding and holding[0] == name:
+                    return holder
+            # not yet known
+            return object()
+        return owner
+
+    def _cycle(self, name, owner):
+        """
+        Follow the waits from the holder of the task.
+
+        :return: the tasks in the cycle if the waits lead back to the owner, else None
+        :rtype: list(str)|None
+        """
+        holding = self.holding if owner is None else self._holdings.get(owner, [])
+        tasks = holding[-1:] + [name]
+        visited = set()
+        holder = self._holder(name)
+        while holder not in visited:
+            if holder == owner:
+                if len(tasks) > 1 and tasks[0] == tasks[-1]:
+                    return tasks
+                return tasks + tasks[:1]
+            visited.add(holder)
+            waiting_for = self._waiting_for.get(holder)
+            if waiting_for is None or waiting_for not in self._claims:
+                return None
+            tasks.append(waiting_for)
+            holder = self._holder(waiting_for)
+        return None
+
+    def finish(self, name, error_msg):
+        """
+        Report that a claimed task finished and notify the waiters.
+
+        :param name: the task name
+        :type name: str
+        :param error_msg: the error string or None if the task succeeded
+        :type error_msg: str|None
+        """
+        self._claims.pop(name, None)
+        if error_msg is None:
+            self.registry.add(name)
+        self._results[name] = error_msg
+        for owner, notify in self._waiters.pop(name, []):
+            self._waiting_for.pop(owner, None)
+            notify(name, error_msg)
+
+    def result(self, name):
+        """
+        :param name: the task name
+        :type name: str
+        :return: tuple containing asserted if the task has finished and its error string or None
+        :rtype: tuple(bool, str|None)
+        """
+        if name in self._claims:
+            return False, None
+        return True, self._results.get(name)
+
+    def release(self, owner, error_msg=None):
+        """
+        Forget a worker's holdings and waits, finishing any tasks it still has claimed.
+
+        :param owner: the worker's id
+        :type owner: int
+        :param error_msg: the error string for the tasks still claimed, None for the default
+        :type error_msg: str|None
+        """
+        self._holdings.pop(owner, None)
+        waiting_for = self._waiting_for.pop(owner, None)
+        if waiting_for is not None:
+            self._waiters[waiting_for] = [waiter for waiter in self._waiters.get(waiting_for, [])
+                                          if waiter[0] != owner]
+        for name in [name_ for name_, owner_ in self._claims.items() if owner_ == owner]:
+            self.finish(name, error_msg or "{name} did not finish".format(name=name))
+
+
+class CoordinatorClient(object):
+    """
+    Reaches the TaskCoordinator from a worker over the worker's pipe to the pool.
+    """
+
+    def __init__(self, conn):
+        """
+        :param conn: the worker's end of the pipe to the pool
+        :type conn: multiprocessing.connection.Connection
+        """
+        self._conn = conn
+        # the tasks this worker is running, outermost first
+        self.holding = []
+
+    def claim(self, name):
+        """
+        Claim the task, waiting for it if it is running elsewhere.
+
+        :param name: the task name
+        :type name: str
+        :return: RUN, SKIP, or the error string of the task that was waited for
+        :rtype: str
+        :raises ValueError: if the wait would never end
+        """
+        self._conn.send(('claim', name, self.holding))
+        reply = self._conn.recv()
+        if reply[0] == 'cycle':
+            raise ValueError(reply[1])
+        if reply[0] in (RUN, SKIP):
+            return reply[0]
+        return reply[1]
+
+    def finish(self, name, error_msg):
+        """
+        Report that a claimed task finished.
+
+        :param name: the task name
+        :type name: str
+        :param error_msg: the error string or None if the task succeeded
+        :type error_msg: str|None
+        """
+        self._conn.send(('finish', name, error_msg))
+
+
+class RunOnceExecutor(object):
+    """
+    Wraps an executor, claiming each task from the coordinator before starting it.  Tasks that have already
+    succeeded in this herring invocation are skipped unless they are declared always_run, and tasks that are
+    running elsewhere are waited for.
+    """
+
+    # the herring process's coordinator, a worker replaces it with a CoordinatorClient
+    coordinator = TaskCoordinator()
+
+    def __init__(self, executor, coordinator=None):
+        """
+        :param executor: the executor that runs the claimed tasks
+        :param coordinator: the coordinator, the default is RunOnceExecutor.coordinator
+        :type coordinator: TaskCoordinator|CoordinatorClient|None
+        """
+        self._executor = executor
+        self._coordinator = RunOnceExecutor.coordinator if coordinator is None else coordinator
+        self._skipped = []
+        self._waiting = []
+
+    @property
+    def running(self):
+        """
+        :return: the number of started tasks that have not yet been waited upon
+        :rtype: int
+        """
+        return len(self._skipped) + len(self._waiting) + self._executor.running
+
+    def start(self, name):
+        """
+        Start the task unless it has already succeeded or is running elsewhere.
+
+        :param name: the task name
+        :type name: str
+        """
+        if HerringTasks[name].get('always_run'):
+            self._executor.start(name)
+            return
+        outcome = self._coordinator.claim(name)
+        if outcome == RUN:
+            # a serial executor runs the task, and any nested task_execute, right here
+            self._coordinator.holding.append(name)
+            try:
+                self._executor.start(name)
+            finally:
+                self._coordinator.holding.remove(name)
+        elif outcome == SKIP:
+            info("Already ran: {name}".format(name=name))
+            self._skipped.append((name, None))
+        elif outcome == WAIT:
+            info("Waiting for: {name}".format(name=name))
+            self._waiting.append(name)
+        else:
+            self._skipped.append((name, outcome))
+
+    def wait(self):
+        """
+        Get the next finished task.
+
+        :return: tuple containing the name of the finished task and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        if self._skipped:
+            return self._skipped.pop(0)
+        for name in self._waiting:
+            finished, error_msg = self._coordinator.result(name)
+            if finished:
+                self._waiting.remove(name)
+                return name, error_msg
+        if not self._executor.running:
+            # only possible if a waited for task was lost
+            name = self._waiting.pop(0)
+            return name, "{name} did not finish".format(name=name)
+        name, error_msg = self._executor.wait()
+        if not HerringTasks[name].get('always_run'):
+            self._coordinator.finish(name, error_msg)
+        return name, error_msg
+
+    def cancel(self):
+        """
+        Cancel the running tasks, finishing their claims, and stop waiting for the tasks running elsewhere.
+        The skipped tasks that have not been waited upon are still reported by wait().
+
+        :return: the names of the canceled tasks
+        :rtype: list(str)
+        """
+        names = self._executor.cancel()
+        for name in names:
+            if not HerringTasks[name].get('always_run'):
+                self._coordinator.finish(name, "{name} was canceled".format(name=name))
+        names.extend(self._waiting)
+        self._waiting = []
+        return names
@@ -0,0 +1,172 @@
+# coding=utf-8
+
+"""
+Linear time, O(V+E), topological ordering using in-degree counts (Kahn's algorithm).
+
+Dependencies are expressed as a dictionary whose keys are items and whose values are iterables of the
+items they depend upon.  Dependency items that are not keys are treated as items without dependencies,
+and self dependencies are ignored.
+
+>>> graph = DependencyGraph({2: [11], 9: [11, 8], 10: [11, 3], 11: [7, 5], 8: [7, 3]})
+>>> [sorted(level) for level in graph.levels()]
+[[3, 5, 7], [8, 11], [2, 9, 10]]
+
+On a cycle a CyclicDependencyError naming the cycle is raised:
+
+>>> try:
+...     list(DependencyGraph({'a': ['b'], 'b': ['c'], 'c': ['a'], 'd': ['a']}).order())
+... except CyclicDependencyError as ex:
+...     print(ex)
+Cyclic dependency: a -> b -> c -> a
+"""
+from collections import deque
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('CyclicDependencyError', 'DependencyGraph', 'toposort')
+
+
+class CyclicDependencyError(ValueError):
+    """
+    Raised when the dependencies contain a cycle.
+    """
+
+    def __init__(self, cycle):
+        """
+        :param cycle: the items in the cycle, each depending upon the next, ending with the first item
+        :type cycle: list
+        """
+        self.cycle = cycle
+        ValueError.__init__(self, "Cyclic dependency: {path}".format(path=' -> '.join(str(item) for item in cycle)))
+
+
+class DependencyGraph(object):
+    """
+    The dependency graph with in-degree counts, built in O(V+E).
+    """
+
+    def __init__(self, data):
+        """
+        :param data: dict where key is an item and value is an iterable of the items it depends upon
+        :type data: dict
+        """
+        self.in_degree = {}
+        self.depends = {}
+        self.dependents = {}
+        for item, depends in data.items():
+            depends = set(depends)
+            depends.discard(item)
+            self.depends[item] = depends
+            self.in_degree[item] = len(depends)
+            self.dependents.setdefault(item, [])
+            for depend in depends:
+                self.in_degree.setdefault(depend, 0)
+                self.dependents.setdefault(depend, []).append(item)
+        for item in self.in_degree:
+            self.depends.setdefault(item, set())
+
+    def _ready(self, in_degree):
+        """
+        :return: the items without dependencies
+        :rtype: list
+        """
+        return [item for item, count in in_degree.items() if count == 0]
+
+    def order(self):
+        """
+        Yield the items in a streaming topological order, each item after all of its dependencies.
+
+        :return: generator of items
+        :raises CyclicDependencyError: once no more items can be ordered because of a cycle
+        """
+        in_degree = dict(self.in_degree)
+        ready = deque(self._ready(in_degree))
+        remaining = len(in_degree)
+        while ready:
+            item = ready.popleft()
+            remaining -= 1
+            yield item
+            for dependent in self.dependents[item]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
+        if remaining:
+            raise CyclicDependencyError(self.find_cycle(in_degree))
+
+    def levels(self):
+        """
+        Yield the items in levels.  The first set consists of items with no dependencies, each subsequent
+        set consists of items that depend upon items in the preceding sets.
+
+        :return: generator of sets
+        :raises CyclicDependencyError: once no more levels can be ordered because of a cycle
+        """
+        in_degree = dict(self.in_degree)
+        level = self._ready(in_degree)
+        remaining = len(in_degree)
+        while level:
+            remaining -= len(level)
+            yield set(level)
+            next_level = []
+            for item in level:
+                for dependent in self.dependents[item]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        next_level.append(dependent)
+            level = next_level
+        if remaining:
+            raise CyclicDependencyError(self.find_cycle(in_degree))
+
+    def verify(self):
+        """
+        :raises CyclicDependencyError: if there is a cycle
+        """
+        for _ in self.order():
+            pass
+
+    def find_cycle(self, in_degree=None):
+        """
+        Find a cycle.  Every item that could not be ordered still has an unordered dependency, so following
+        unordered dependencies from any of them must arrive back at an item already on the path.
+
+        :param in_degree: the remaining in-degree counts after ordering, if None the graph is ordered first
+        :type in_degree: dict|None
+        :return: the items in the cycle, each depending upon the next, ending with the first item, or None
+        :rtype: list|None
+        """
+        if in_degree is None:
+            in_degree = dict(self.in_degree)
+            ready = deque(self._ready(in_degree))
+            while ready:
+                for dependent in self.dependents[ready.popleft()]:
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        ready.append(dependent)
+        unordered = [item for item, count in in_degree.items() if count > 0]
+        if not unordered:
+            return None
+        item = min(unordered, key=str)
+        path = []
+        position = {}
+        while item not in position:
+            position[item] = len(path)
+            path.append(item)
+            item = min((depend for depend in self.depends[item] if in_degree[depend] > 0), key=str)
+        return path[position[item]:] + [item]
+
+
+def toposort(data):
+    """
+    Yield the levels of a dependency dictionary.
+
+    :param data: dict where key is an item and value is an iterable of the items it depends upon
+    :type data: dict
+    :return: generator of sets in topological order
+    :raises CyclicDependencyError: if there is a cycle
+    """
+    return DependencyGraph(data).levels()
+
+
+if __name__ == '__main__':
+    import doctest
+
+    doctest.testmod()
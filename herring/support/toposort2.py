@@ -7,14 +7,15 @@ From: Topological Sort (Python recipe)
 
 * Changed dictionary comprehensions to dictionary generators to support
     python 2.6. (Roy)
+
+* Replaced the set difference per level implementation with herring.support.toposort.
 """
 
-import six
+from herring.support.toposort import toposort
 
 __docformat__ = "restructuredtext en"
 
 
-# noinspection PySetFunctionToLiteral
 def toposort2(data):
     """
     Dependencies are expressed as a dictionary whose keys are items
@@ -23,6 +24,8 @@ def toposort2(data):
     dependencies, each subsequent set consists of items that depend upon
     items in the preceding sets.
 
+    Now a wrapper of the linear time herring.support.toposort.toposort.
+
     >>> print('\\n'.join(repr(sorted(x)) for x in toposort2({
     ...     2: set([11]),
     ...     9: set([11,8]),
@@ -36,38 +39,9 @@ def toposort2(data):
 
     :param data: a dict with set values
     :return: generator returns lists of sets in topological order
+    :raises herring.support.toposort.CyclicDependencyError: if there are cyclic dependencies
     """
-
-    # pylint: disable=W0622
-    from functools import reduce
-
-    # Ignore self dependencies.
-    for key, value in data.items():
-        value.discard(key)
-
-    # Find all items that don't depend on anything.
-    extra_items_in_deps = reduce(set.union,
-                                 six.itervalues(data)) - set(six.iterkeys(data))
-
-    # Add empty dependencies where needed
-    # data.update({item: set() for item in extra_items_in_deps})
-    # {item: word.count(item) for item in set(word)}
-    # dict((item, word.count(item)) for item in set(word))
-    data.update(dict((item, set()) for item in extra_items_in_deps))
-    while True:
-        ordered = set(item for item, dep in six.iteritems(data) if not dep)
-        if not ordered:
-            break
-        yield ordered
-        # data = {item: (dep - ordered)
-        #         for item, dep in data.iteritems()
-        #         if item not in ordered}
-        data = dict((item, (dep - ordered))
-                    for item, dep in six.iteritems(data)
-                    if item not in ordered)
-
-    error_format = "Cyclic dependencies exist among these items:\n%s"
-    assert not data, error_format % '\n'.join(repr(x) for x in six.iteritems(data))
+    return toposort(data)
 
 
 if __name__ == '__main__':
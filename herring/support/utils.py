@@ -5,6 +5,8 @@ Various utility functions
 """
 
 import fnmatch
+import glob
+import hashlib
 import os
 import re
 
@@ -46,3 +48,66 @@ def find_files(directory, includes=None, excludes=None):
 
         for filename in files:
             yield filename
+
+
+def file_digest(file_name, block_size=1024 * 1024):
+    """
+    Calculate the sha256 digest of a file's contents.
+
+    :param file_name: the file path
+    :type file_name: str
+    :param block_size: the number of bytes to read at a time
+    :type block_size: int
+    :return: the hex digest
+    :rtype: str
+    """
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as in_file:
+        for block in iter(lambda: in_file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_globs(patterns):
+    """
+    Find the files that match any of the glob patterns.  Patterns may use "**" to match any number
+    of directories.
+
+    :param patterns: file glob patterns (ex: ['docs/**/*.rst', 'setup.py'])
+    :type patterns: list(str)
+    :return: sorted list of unique matching file paths
+    :rtype: list(str)
+    """
+    files = set()
+    for pattern in patterns or []:
+        files.update(os.path.normpath(path) for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+
+def _match_parts(parts, pattern_parts):
+    """
+    :return: asserted if the path components match the pattern components, "**" matching any number of them
+    :rtype: bool
+    """
+    if not pattern_parts:
+        return not parts
+    if pattern_parts[0] == '**':
+        return any(_match_parts(parts[index:], pattern_parts[1:]) for index in range(len(parts) + 1))
+    return bool(parts) and fnmatch.fnmatchcase(parts[0], pattern_parts[0]) and \
+        _match_parts(parts[1:], pattern_parts[1:])
+
+
+def match_globs(path, patterns):
+    """
+    Check if a file path matches any of the glob patterns, as find_globs would find it.  The file does not
+    have to exist.
+
+    :param path: the file path
+    :type path: str
+    :param patterns: file glob patterns (ex: ['docs/**/*.rst', 'setup.py'])
+    :type patterns: list(str)
+    :return: asserted if the path matches one of the patterns
+    :rtype: bool
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    return any(_match_parts(parts, os.path.normpath(pattern).split(os.sep)) for pattern in patterns or [])
@@ -0,0 +1,163 @@
+# coding=utf-8
+
+"""
+The compiled task graph.
+
+The TaskGraph is built once from the loaded tasks (HerringTasks or the task index) and is not changed
+afterwards.  Building it:
+
+* resolves the dependency names: a name used by a task in a namespace is first looked up in the task's
+  namespace then as a fully qualified name, so within "with namespace('foo')" or
+  @task(namespace='foo') both "bar" and "foo::bar" name the task "foo::bar",
+* adds the dependent_of edges: @task(dependent_of='foo') on task "bar" makes "foo" depend on "bar",
+* records the names that do not resolve to a task in "unknown".
+
+The tasks dictionary is not modified, so compiling the graph again, as every nested task_execute does,
+gives the same graph.  The compiled graph is kept until a task is registered (see invalidate()).
+
+Usage
+-----
+
+::
+
+    graph = TaskGraph.compile(HerringTasks)
+    for name, missing in graph.unknown:
+        warning("Unknown task {missing} in {name}".format(name=name, missing=missing))
+    tasks = graph.closure(['test'])
+    levels = toposort(graph.depend_dict(tasks))
+
+"""
+from types import MappingProxyType
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskGraph',)
+
+
+class TaskGraph(object):
+    """
+    The immutable dependency graph of the tasks.
+    """
+
+    # the tasks dictionary and its compiled graph
+    _compiled = (None, None)
+
+    def __init__(self, herring_tasks):
+        """
+        :param herring_tasks: the tasks dictionary, name => task attributes ('depends', 'dependent_of',
+            'namespace')
+        :type herring_tasks: dict
+        """
+        depends = dict((name, []) for name in herring_tasks)
+        unknown = []
+        for name, attributes in herring_tasks.items():
+            namespace = attributes.get('namespace')
+            for depend in attributes.get('depends') or ():
+                resolved = self._resolve(depend, namespace, depends)
+                if resolved is None:
+                    unknown.append((name, depend))
+                elif resolved not in depends[name]:
+                    depends[name].append(resolved)
+            dependent_of = attributes.get('dependent_of')
+            if dependent_of is not None:
+                resolved = self._resolve(dependent_of, namespace, depends)
+                if resolved is None:
+                    unknown.append((name, dependent_of))
+                elif name not in depends[resolved]:
+                    depends[resolved].append(name)
+        self.depends = MappingProxyType(dict((name, tuple(names)) for name, names in depends.items()))
+        self.unknown = tuple(unknown)
+        self._closures = {}
+
+    @staticmethod
+    def _resolve(name, namespace, tasks):
+        """
+        :return: the task name that the name used in the namespace refers to or None if there is no such task
+        :rtype: str|None
+        """
+        if namespace:
+            qualified = namespace + '::' + name
+            if qualified in tasks:
+                return qualified
+        if name in tasks:
+            return name
+        return None
+
+    @classmethod
+    def compile(cls, herring_tasks):
+        """
+        Get the graph of the tasks dictionary, only building it when the dictionary is not the one last
+        compiled or a task has been registered since.
+
+        :param herring_tasks: the tasks dictionary
+        :type herring_tasks: dict
+        :return: the compiled graph
+        :rtype: TaskGraph
+        """
+        tasks, graph = cls._compiled
+        if tasks is not herring_tasks:
+            graph = cls(herring_tasks)
+            TaskGraph._compiled = (herring_tasks, graph)
+        return graph
+
+    @staticmethod
+    def invalidate():
+        """
+        Forget the compiled graph.  Called by the @task decorator when a task is registered or re-registered.
+        """
+        TaskGraph._compiled = (None, None)
+
+    def closure(self, src_tasks):
+        """
+        Finds the given tasks and their dependencies, iterative so deep dependency chains do not hit the
+        recursion limit.  The result is memoized, so nested task_execute calls for the same tasks reuse it.
+
+        :param src_tasks: list of task names that may have dependencies
+        :type src_tasks: list
+        :return: list of the task names in the order first visited (each task before its dependencies)
+        :rtype: list
+        :raises ValueError: if one of the tasks depends upon an unknown task
+        """
+        key = tuple(src_tasks)
+        if key not in self._closures:
+            self._closures[key] = tuple(self._walk(src_tasks))
+        return list(self._closures[key])
+
+    def _walk(self, src_tasks):
+        """
+        Depth first walk of the dependencies.
+
+        :return: list of the task names in the order first visited
+        :rtype: list
+        """
+        unknown = dict(self.unknown)
+        dependencies = []
+        visited = set()
+        for name in src_tasks:
+            if name in visited:
+                continue
+            visited.add(name)
+            dependencies.append(name)
+            stack = [iter(self.depends[name])]
+            while stack:
+                for depend in stack[-1]:
+                    if depend not in visited:
+                        visited.add(depend)
+                        dependencies.append(depend)
+                        stack.append(iter(self.depends[depend]))
+                        break
+                else:
+                    stack.pop()
+        for name in dependencies:
+            if name in unknown:
+                raise ValueError("Task {name} depends upon the unknown task {missing}".format(name=name,
+                                                                                             missing=unknown[name]))
+        return dependencies
+
+    def depend_dict(self, src_tasks):
+        """
+        :param src_tasks: the task names
+        :type src_tasks: list
+        :return: dict where key is task name and value is the set of its dependency task names
+        :rtype: dict
+        """
+        return dict((name, set(self.depends[name])) for name in src_tasks)
@@ -0,0 +1,128 @@
+# coding=utf-8
+
+"""
+A persisted index of the tasks so the task listings (-T, -U, -D) do not have to import the herringfile
+and every herringlib module.
+
+After the tasks are loaded, the listing attributes of every task in HerringTasks are saved in the project's
+.herring/task_index.json along with a signature of the sources the tasks were loaded from: the herring
+version, the herringlib settings, and the path, size and modification time of the herringfile and of every
+file in the herringlib directories.  A listing first computes the current signature (which only requires
+stat calls) and uses the saved tasks if the signature matches, otherwise the tasks are imported and the
+index is rewritten.  Running tasks neither reads nor writes the index.
+
+Usage
+-----
+
+::
+
+    index = TaskIndex()
+    signature = index.signature(herringfile, library_paths, settings.herringlib)
+    herring_tasks = index.load(signature)
+    if herring_tasks is None:
+        # load the tasks into HerringTasks
+        index.save(signature, HerringTasks)
+
+"""
+import json
+import os
+import tempfile
+
+from herring import __version__
+from herring.herring_file import HerringFile
+from herring.support.mkdir_p import mkdir_p
+from herring.support.simple_logger import debug
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskIndex',)
+
+# the HerringTasks attributes used by the task listings
+INDEX_ATTRIBUTES = ('name', 'fullname', 'namespace', 'description', 'depends', 'dependent_of', 'kwargs',
+                    'arg_prompt', 'help', 'private', 'configured')
+
+
+class TaskIndex(object):
+    """
+    The task index file.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: the index file, the default is .herring/task_index.json in the herringfile's directory.
+        :type path: str|None
+        """
+        if path is None:
+            path = os.path.join(HerringFile.directory or os.getcwd(), '.herring', 'task_index.json')
+        self.path = path
+
+    # noinspection PyMethodMayBeStatic
+    def _file_stats(self, directory):
+        """
+        :return: list of [path, size, mtime] for every file in the directory tree
+        :rtype: list
+        """
+        stats = []
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = sorted(dir_ for dir_ in dirs if not dir_.startswith('.') and dir_ != '__pycache__')
+            for file_name in sorted(files):
+                if file_name.startswith('.') or file_name.endswith('.pyc'):
+                    continue
+                file_path = os.path.join(root, file_name)
+                stat = os.stat(file_path)
+                stats.append([file_path, stat.st_size, stat.st_mtime_ns])
+        return stats
+
+    def signature(self, herringfile, library_paths, herringlib_settings):
+        """
+        Compute the signature of the sources the tasks are loaded from.
+
+        :param herringfile: the herringfile path
+        :type herringfile: str
+        :param library_paths: the herringlib directories
+        :type library_paths: list(Path)
+        :param herringlib_settings: the herringlib setting (the configured herringlib directories)
+        :type herringlib_settings: list(str)
+        :return: the signature
+        :rtype: list
+        """
+        stat = os.stat(herringfile)
+        return [__version__,
+                list(herringlib_settings or []),
+                [os.path.abspath(herringfile), stat.st_size, stat.st_mtime_ns],
+                [self._file_stats(os.path.abspath(str(path))) for path in library_paths]]
+
+    def load(self, signature):
+        """
+        :param signature: the current signature (see signature())
+        :type signature: list
+        :return: the indexed tasks, a dict like HerringTasks with only the listing attributes, or None if the
+            index is missing or out of date.
+        :rtype: dict|None
+        """
+        try:
+            with open(self.path) as index_file:
+                index = json.load(index_file)
+            if index['signature'] == signature:
+                return index['tasks']
+        except (IOError, ValueError, KeyError, TypeError) as ex:
+            debug("can not read {path}: {err}".format(path=self.path, err=str(ex)))
+        return None
+
+    def save(self, signature, herring_tasks):
+        """
+        Save the index.
+
+        :param signature: the signature of the sources the tasks were loaded from (see signature())
+        :type signature: list
+        :param herring_tasks: the loaded tasks
+        :type herring_tasks: dict
+        """
+        tasks = {}
+        for name, attributes in herring_tasks.items():
+            tasks[name] = dict((key, attributes.get(key)) for key in INDEX_ATTRIBUTES)
+            if tasks[name]['description'] is not None:
+                tasks[name]['description'] = str(tasks[name]['description'])
+        index_dir = mkdir_p(os.path.dirname(self.path))
+        with tempfile.NamedTemporaryFile('w', dir=index_dir, delete=False) as index_file:
+            json.dump({'signature': signature, 'tasks': tasks}, index_file)
+        os.replace(index_file.name, self.path)
@@ -0,0 +1,265 @@
+# coding=utf-8
+
+"""
+How the output of the tasks ran by the WorkerPool's workers reaches herring's output.
+
+There are two output modes:
+
+* GROUPED - each task's output (both stdout and stderr) is captured in a temporary spill file then
+  written as one block when the task finishes, so the output of parallel tasks is not interleaved.
+* STREAM - each line is sent from the worker to the herring process as soon as it is written and is
+  immediately written prefixed with the task name, optionally colored.
+
+In both modes the worker's file descriptors 1 and 2 are redirected (see redirect_output), so the output
+of the processes the task starts (ex: os.system or subprocess calls) is captured too, in the same order
+as the task's own output.
+
+In the STREAM mode the output is redirected to a pipe that a thread of the worker reads in chunks of up to
+MAX_LINE_LENGTH bytes (see stream_output).  The StreamWriter sends the complete lines of each chunk at once
+and only keeps the current partial line, and the herring process's PrefixedOutput writes the lines as they
+arrive, so the memory used per task does not grow with the size of the task's output.
+
+In the GROUPED mode the output is redirected to the spill file.  The spill file is copied to herring's
+output with os.sendfile when possible (see copy_spilled), so the output is not held in memory nor passed
+through the worker's pipe.
+"""
+import codecs
+import io
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('GROUPED', 'STREAM', 'OUTPUT_MODES', 'MAX_LINE_LENGTH', 'StreamWriter', 'PrefixedOutput',
+           'redirect_output', 'stream_output', 'copy_spilled')
+
+GROUPED = 'grouped'
+STREAM = 'stream'
+OUTPUT_MODES = (GROUPED, STREAM)
+
+# longer lines are split
+MAX_LINE_LENGTH = 64 * 1024
+
+# the size of the chunks the spill files are copied in when os.sendfile can not be used
+COPY_CHUNK_SIZE = 64 * 1024
+
+# how long to wait for the rest of the streamed output after a task finishes, in seconds.  A process
+# started by the task that is still running may keep the pipe open.
+DRAIN_TIMEOUT = 1.0
+
+# the ANSI foreground colors given to the task names in turn
+COLORS = ('36', '33', '32', '35', '34', '31')
+
+
+class StreamWriter(io.TextIOBase):
+    """
+    A text file that sends each complete line written to it, used by stream_output to send the output a
+    task writes to the pipe.
+    """
+
+    def __init__(self, send, limit=MAX_LINE_LENGTH):
+        """
+        :param send: called with each chunk of one or more lines
+        :type send: function
+        :param limit: the maximum number of characters sent at once and kept of a partial line
+        :type limit: int
+        """
+        super(StreamWriter, self).__init__()
+        self._send = send
+        self._limit = limit
+        self._partial = ''
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        """
+        Send the complete lines, keeping the partial last line until the rest of it is written.
+
+        :param text: the text to write
+        :type text: str
+        :return: the number of characters written
+        :rtype: int
+        """
+        self._partial += text
+        while True:
+            end = self._partial.rfind('\n', 0, self._limit) + 1
+            if not end:
+                if len(self._partial) < self._limit:
+                    break
+                end = self._limit
+            chunk, self._partial = self._partial[:end], self._partial[end:]
+            self._send(chunk)
+        return len(text)
+
+    def finish(self):
+        """
+        Send the partial last line, if any.  Called when the task finishes.
+        """
+        if self._partial:
+            self._send(self._partial)
+            self._partial = ''
+
+
+class PrefixedOutput(object):
+    """
+    Writes the streamed task output, each line prefixed with the name of the task that wrote it.
+    """
+
+    def __init__(self, color=False, stream=None):
+        """
+        :param color: asserted to color the task names
+        :type color: bool
+        :param stream: the output stream, None for sys.stdout at the time of writing
+        :type stream: file|None
+        """
+        self._color = color
+        self._stream = stream
+        self._prefixes = {}
+
+    def _prefix(self, name):
+        """
+        :param name: the task name
+        :type name: str
+        :return: the line prefix of the task
+        :rtype: str
+        """
+        prefix = self._prefixes.get(name)
+        if prefix is None:
+            prefix = '[{name}] '.format(name=name)
+            if self._color:
+                prefix = '\033[{color}m{prefix}\033[0m'.format(color=COLORS[len(self._prefixes) % len(COLORS)],
+                                                              prefix=prefix)
+            self._prefixes[name] = prefix
+        return prefix
+
+    def write(self, name, text):
+        """
+        Write the lines of a task's output.  A chunk that does not end with a newline (a line longer than
+        MAX_LINE_LENGTH or the partial last line of the task) is written as a line.
+
+        :param name: the task name
+        :type name: str
+        :param text: one or more lines of output
+        :type text: str
+        """
+        stream = self._stream or sys.stdout
+        prefix = self._prefix(name)
+        stream.write(''.join(prefix + line + '\n' for line in text.splitlines()))
+        stream.flush()
+
+
+@contextmanager
+def redirect_output(fd):
+    """
+    Redirect this process's file descriptors 1 and 2, and sys.stdout and sys.stderr, to the file
+    descriptor.  Child processes started within the context inherit the redirection.
+
+    :param fd: the file descriptor to write the output to
+    :type fd: int
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    previous_stdout = sys.stdout
+    previous_stderr = sys.stderr
+    saved = (os.dup(1), os.dup(2))
+    os.dup2(fd, 1)
+    os.dup2(fd, 2)
+    # line buffered so the task's prints are ordered with the output of the processes it starts
+    sys.stdout = sys.stderr = open(1, 'w', buffering=1, errors='backslashreplace', closefd=False)
+    try:
+        yield
+    finally:
+        try:
+            sys.stdout.flush()
+        finally:
+            sys.stdout = previous_stdout
+            sys.stderr = previous_stderr
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            os.close(saved[0])
+            os.close(saved[1])
+
+
+@contextmanager
+def stream_output(send):
+    """
+    Redirect this process's output to a pipe and send the lines written to it, including the output of
+    the child processes started within the context.
+
+    :param send: called with each chunk of one or more lines
+    :type send: function
+    """
+    read_fd, write_fd = os.pipe()
+    thread = threading.Thread(target=_pump, args=(read_fd, StreamWriter(send)), name='herring-output')
+    thread.daemon = True
+    thread.start()
+    try:
+        with redirect_output(write_fd):
+            yield
+    finally:
+        os.close(write_fd)
+        thread.join(DRAIN_TIMEOUT)
+
+
+def _pump(read_fd, writer):
+    """
+    Read the pipe until every writer has closed it, sending the lines.
+
+    :param read_fd: the pipe's read end
+    :type read_fd: int
+    :param writer: sends the lines
+    :type writer: StreamWriter
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    try:
+        while True:
+            chunk = os.read(read_fd, MAX_LINE_LENGTH)
+            writer.write(decoder.decode(chunk, final=not chunk))
+            if not chunk:
+                break
+        writer.finish()
+    finally:
+        os.close(read_fd)
+
+
+def copy_spilled(fd, prefix='', stream=None):
+    """
+    Write the contents of a spill file to the stream, with os.sendfile when the stream has a file
+    descriptor, else in chunks.
+
+    :param fd: the spill file's file descriptor
+    :type fd: int
+    :param prefix: written before the contents if there are any
+    :type prefix: str
+    :param stream: the output stream, None for sys.stdout
+    :type stream: file|None
+    :return: the size of the spill file in bytes
+    :rtype: int
+    """
+    stream = stream or sys.stdout
+    size = os.fstat(fd).st_size
+    if not size:
+        return size
+    stream.write(prefix)
+    stream.flush()
+    offset = 0
+    try:
+        out_fd = stream.fileno()
+        while offset < size:
+            sent = os.sendfile(out_fd, fd, offset, size - offset)
+            if not sent:
+                break
+            offset += sent
+    except (AttributeError, OSError, ValueError):
+        # not a real file (ex: StringIO) or sendfile is not supported
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        os.lseek(fd, offset, os.SEEK_SET)
+        while True:
+            chunk = os.read(fd, COPY_CHUNK_SIZE)
+            stream.write(decoder.decode(chunk, final=not chunk))
+            if not chunk:
+                break
+        stream.flush()
+    return size
@@ -0,0 +1,177 @@
+# coding=utf-8
+
+"""
+The TaskScheduler runs a dependency graph of tasks, starting each task as soon as all of its own
+dependencies have completed (Kahn's algorithm).  Unlike running a topological sort one level at a time,
+a slow task only delays the tasks that actually depend upon it.
+
+The actual running of the tasks is delegated to an executor (see herring.parallelize) which starts
+named functions and reports them back as they finish.
+
+The tasks that depend upon a failed task are never ran.  What happens to the other tasks depends upon
+the on_failure mode:
+
+* STOP - no more tasks are started, the running tasks are waited for (the default),
+* KEEP_GOING - every task that does not depend upon a failed task is ran,
+* FAIL_FAST - the running tasks are canceled (see the executor's cancel()), the tasks that had already
+  finished are still reported with their results.
+
+When more tasks are ready than there are available jobs and duration estimates are given (ex: from the
+run history, see herring.run_history), the ready task with the longest expected remaining path (its own
+duration plus the longest chain of durations of the tasks that depend upon it) is started first, so long
+chains start early and the tail of the run shrinks.  Tasks without an estimate are expected to take the
+default estimate.  Without estimates the ready tasks are started in the order they became ready.
+
+Usage
+-----
+
+::
+
+    depend_dict = {'alpha': set(), 'beta': set(['alpha']), 'charlie': set()}
+    scheduler = TaskScheduler(depend_dict)
+    errors = scheduler.run(ProcessExecutor(lambda name: HerringTasks[name]['task']))
+
+"""
+import heapq
+from itertools import count
+
+from herring.support.simple_logger import debug, info
+from herring.support.toposort import DependencyGraph
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskScheduler', 'STOP', 'KEEP_GOING', 'FAIL_FAST', 'ON_FAILURE_MODES', 'DEFAULT_ESTIMATE')
+
+STOP = 'stop'
+KEEP_GOING = 'keep_going'
+FAIL_FAST = 'fail_fast'
+ON_FAILURE_MODES = (STOP, KEEP_GOING, FAIL_FAST)
+
+# the expected duration in seconds of a task without an estimate
+DEFAULT_ESTIMATE = 1.0
+
+
+class _ReadyQueue(object):
+    """
+    The ready tasks, highest priority first then in the order they became ready.
+    """
+
+    def __init__(self, priority=None):
+        """
+        :param priority: the priority of each task, None for first in first out
+        :type priority: dict|None
+        """
+        self._priority = priority or {}
+        self._heap = []
+        self._sequence = count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def append(self, name):
+        heapq.heappush(self._heap, (-self._priority.get(name, 0.0), next(self._sequence), name))
+
+    def pop(self):
+        return heapq.heappop(self._heap)[2]
+
+
+class TaskScheduler(object):
+    """
+    Dependency graph scheduler with in-degree tracking.
+    """
+
+    def __init__(self, depend_dict, estimates=None, default_estimate=DEFAULT_ESTIMATE):
+        """
+        :param depend_dict: dict where key is task name and value is the set of dependency task names.
+            Dependency names that are not keys are treated as tasks without dependencies.
+        :type depend_dict: dict
+        :param estimates: the expected duration in seconds of the tasks, None to not prioritize the ready tasks
+        :type estimates: dict|None
+        :param default_estimate: the expected duration in seconds of the tasks without an estimate
+        :type default_estimate: float
+        :raises herring.support.toposort.CyclicDependencyError: if there are cyclic dependencies
+        """
+        graph = DependencyGraph(depend_dict)
+        order = list(graph.order())
+        self._in_degree = graph.in_degree
+        self._depends = graph.depends
+        self._dependents = graph.dependents
+        self.estimates = estimates
+        self.default_estimate = default_estimate
+        self.priority = None
+        if estimates is not None:
+            self.priority = {}
+            for name in reversed(order):
+                self.priority[name] = estimates.get(name, default_estimate) + max(
+                    [self.priority[dependent] for dependent in self._dependents[name]] or [0.0])
+
+    def run(self, executor, jobs=None, on_failure=STOP, timeline=None, progress=None):
+        """
+        Run all of the tasks, each as soon as its dependencies have finished.  When more tasks are ready
+        than there are available jobs, the excess tasks are queued until a running task finishes.
+
+        :param executor: the executor used to run the tasks
+        :type executor: herring.parallelize.SerialExecutor|herring.parallelize.ProcessExecutor|
+            herring.worker_pool.WorkerPool
+        :param jobs: the maximum number of tasks to run at the same time, None for no limit
+        :type jobs: int|None
+        :param on_failure: what to do when a task fails, STOP, KEEP_GOING or FAIL_FAST
+        :type on_failure: str
+        :param timeline: records when each task is queued, started and finished
+        :type timeline: herring.task_timing.TaskTimeline|None
+        :param progress: the progress line of the tasks, erased before each task is started
+        :type progress: herring.progress.ProgressDisplay|None
+        :return: list of any error strings
+        :rtype: list(str)
+        """
+        if jobs is not None:
+            jobs = max(1, jobs)
+        errors = []
+        in_degree = dict(self._in_degree)
+        ready = _ReadyQueue(self.priority)
+        for name, degree in in_degree.items():
+            if degree == 0:
+                ready.append(name)
+                if timeline is not None:
+                    timeline.queued(name, self._depends[name])
+        if progress is not None:
+            progress.add(in_degree, self.estimates, self.default_estimate)
+        started = set()
+        stopping = False
+        while (ready and not stopping) or executor.running:
+            while ready and not stopping and (jobs is None or executor.running < jobs):
+                name = ready.pop()
+                debug("starting: {name}".format(name=name))
+                started.add(name)
+                if timeline is not None:
+                    timeline.started(name)
+                if progress is not None:
+                    progress.clear()
+                executor.start(name)
+            name, error_msg = executor.wait()
+            debug("finished: {name}".format(name=name))
+            if timeline is not None:
+                timeline.finished(name, error_msg)
+            if error_msg is not None:
+                errors.append(error_msg)
+                if on_failure == FAIL_FAST:
+                    canceled = executor.cancel()
+                    if canceled:
+                        info("Canceled: {names}".format(names=', '.join(sorted(canceled))))
+                    if timeline is not None:
+                        for canceled_name in canceled:
+                            timeline.finished(canceled_name, "{name} was canceled".format(name=canceled_name))
+                stopping = stopping or on_failure in (STOP, FAIL_FAST)
+                # the dependents of a failed task are never ready
+                continue
+            for dependent in self._dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
+                    if timeline is not None:
+                        timeline.queued(dependent, self._depends[dependent])
+        if progress is not None:
+            progress.clear()
+        not_ran = set(in_degree) - started
+        if errors and not_ran:
+            info("Not ran because of the failures: {names}".format(names=', '.join(sorted(not_ran))))
+        return errors
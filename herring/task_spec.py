@@ -0,0 +1,87 @@
+# coding=utf-8
+
+"""
+The compact record of a task in HerringTasks.
+
+A TaskSpec stores the task's attributes in slots instead of a per task dictionary, with the task,
+namespace and dependency names interned so the many references to the same name share one string.  Each
+task gets an integer id in the order the tasks are registered.
+
+For the herringfiles and herringlib modules that read HerringTasks, a TaskSpec is also a read only
+mapping of the attribute names to their values, so both of these work::
+
+    HerringTasks['build']['task']
+    HerringTasks['build'].task
+
+"""
+import sys
+from collections.abc import Mapping
+from itertools import count
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskSpec',)
+
+
+def _intern(name):
+    """
+    :return: the interned name, None stays None
+    :rtype: str|None
+    """
+    if name is None:
+        return None
+    return sys.intern(str(name))
+
+
+class TaskSpec(Mapping):
+    """
+    The attributes of a task, see HerringTasks in herring.task_with_args for their descriptions.
+    """
+
+    # the attributes that are also the mapping's keys
+    FIELDS = ('task', 'function', 'depends', 'dependent_of', 'private', 'help', 'description', 'namespace',
+              'fullname', 'name', 'kwargs', 'arg_prompt', 'configured', 'inputs', 'outputs', 'always_run')
+
+    __slots__ = FIELDS + ('task_id',)
+
+    _field_set = frozenset(FIELDS)
+
+    _ids = count()
+
+    # noinspection PyShadowingBuiltins
+    def __init__(self, task=None, function=None, depends=None, dependent_of=None, private=False, help=None,
+                 description=None, namespace=None, fullname=None, name=None, kwargs=None, arg_prompt=None,
+                 configured='required', inputs=None, outputs=None, always_run=False):
+        self.task_id = next(TaskSpec._ids)
+        self.task = task
+        self.function = function
+        self.depends = tuple(_intern(depend) for depend in depends or ())
+        self.dependent_of = _intern(dependent_of)
+        self.private = private
+        self.help = help
+        self.description = description
+        self.namespace = _intern(namespace)
+        self.fullname = _intern(fullname)
+        self.name = _intern(name)
+        self.kwargs = kwargs
+        self.arg_prompt = arg_prompt
+        self.configured = configured
+        self.inputs = inputs
+        self.outputs = outputs
+        self.always_run = always_run
+
+    def __getitem__(self, key):
+        if key not in TaskSpec._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(TaskSpec.FIELDS)
+
+    def __len__(self):
+        return len(TaskSpec.FIELDS)
+
+    def __contains__(self, key):
+        return key in TaskSpec._field_set
+
+    def __repr__(self):
+        return 'TaskSpec({id}, {name!r})'.format(id=self.task_id, name=self.fullname)
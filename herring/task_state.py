@@ -0,0 +1,329 @@
+# coding=utf-8
+
+"""
+Up-to-date checking for tasks that declare their inputs and/or outputs::
+
+    @task(inputs=['docs/**/*.rst', 'docs/conf.py'], outputs=['build/html/**/*.html'])
+    def html():
+        \"\"\"build the documentation\"\"\"
+
+After a task with inputs or outputs succeeds, the content hashes of its input and output files (and the
+task's command line arguments) are saved in the project's state database (.herring/state.json in the
+herringfile's directory).  The next time the task is to be ran, if none of those files were added, removed
+or changed, then the task is skipped.
+
+A file's digest is only recalculated when its size or modification time has changed.
+
+Tasks that declare both inputs and outputs may also have their outputs restored from the artifact cache
+(see herring.artifact_cache) instead of being ran.
+
+The UpToDateExecutor wraps another executor (see herring.parallelize) and does the checking.
+"""
+import json
+import os
+import tempfile
+
+from herring.herring_file import HerringFile
+from herring.support.mkdir_p import mkdir_p
+from herring.support.simple_logger import debug, info, warning
+from herring.support.utils import file_digest, find_globs
+from herring.task_with_args import HerringTasks, TaskWithArgs
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskState', 'UpToDateExecutor')
+
+STATE_VERSION = 1
+
+
+class TaskState(object):
+    """
+    The state database.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: the state database file, the default is .herring/state.json in the herringfile's directory.
+        :type path: str|None
+        """
+        if path is None:
+            path = os.path.join(HerringFile.directory or os.getcwd(), '.herring', 'state.json')
+        self.path = path
+        self._tasks = None
+        self._files = {}
+        self._changed_tasks = {}
+
+    def _read(self):
+        """
+        :return: the saved state (version, tasks, and files)
+        :rtype: dict
+        """
+        try:
+            with open(self.path) as state_file:
+                state = json.load(state_file)
+            if state.get('version') == STATE_VERSION:
+                return state
+        except (IOError, ValueError) as ex:
+            debug("can not read {path}: {err}".format(path=self.path, err=str(ex)))
+        return {'version': STATE_VERSION, 'tasks': {}, 'files': {}}
+
+    def _load(self):
+        if self._tasks is None:
+            state = self._read()
+            self._tasks = state['tasks']
+            self._files = state['files']
+
+    def digest(self, file_name):
+        """
+        The file's content digest, reusing the previous digest if the file's size and modification time
+        have not changed.
+
+        :param file_name: the file path
+        :type file_name: str
+        :return: the hex digest
+        :rtype: str
+        """
+        self._load()
+        stat = os.stat(file_name)
+        cached = self._files.get(file_name)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = file_digest(file_name)
+        self._files[file_name] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def fingerprint(self, patterns):
+        """
+        :param patterns: file glob patterns
+        :type patterns: list(str)|None
+        :return: dict where key is the file path and value is the file's digest
+        :rtype: dict(str, str)
+        """
+        return dict((file_name, self.digest(file_name)) for file_name in find_globs(patterns))
+
+    def _record(self, inputs, outputs, argv):
+        """
+        :return: the fingerprint of the task's files and arguments
+        :rtype: dict
+        """
+        return {'inputs': self.fingerprint(inputs),
+                'outputs': self.fingerprint(outputs),
+                'argv': list(argv)}
+
+    def is_up_to_date(self, name, inputs, outputs, argv):
+        """
+        :param name: the task name
+        :type name: str
+        :param inputs: the task's input glob patterns
+        :type inputs: list(str)|None
+        :param outputs: the task's output glob patterns
+        :type outputs: list(str)|None
+        :param argv: the task's command line arguments
+        :type argv: list(str)
+        :return: asserted if the task has succeeded and its files have not changed since
+        :rtype: bool
+        """
+        self._load()
+        saved = self._tasks.get(name)
+        if saved is None:
+            return False
+        if outputs and not saved['outputs']:
+            return False
+        return saved == self._record(inputs, outputs, argv)
+
+    def record(self, name, inputs, outputs, argv):
+        """
+        Save the current fingerprint of the task's files after the task succeeded.
+
+        :param name: the task name
+        :type name: str
+        :param inputs: the task's input glob patterns
+        :type inputs: list(str)|None
+        :param outputs: the task's output glob patterns
+        :type outputs: list(str)|None
+        :param argv: the task's command line arguments
+        :type argv: list(str)
+        :return: the saved fingerprint, a dict with 'inputs' and 'outputs' dicts of file digests and 'argv'
+        :rtype: dict
+        """
+        self._load()
+        self._tasks[name] = self._changed_tasks[name] = self._record(inputs, outputs, argv)
+        return self._tasks[name]
+
+    def forget(self, name):
+        """
+        Forget the task's fingerprint, for example when the task failed.
+
+        :param name: the task name
+        :type name: str
+        """
+        self._load()
+        self._tasks.pop(name, None)
+        self._changed_tasks[name] = None
+
+    def save(self):
+        """
+        Merge the changes into the state database.  The file is locked while being updated so other herring
+        processes (ex: workers running nested tasks) do not lose their changes.
+        """
+        if self._tasks is None:
+            return
+        state_dir = mkdir_p(os.path.dirname(self.path))
+        with open(self.path + '.lock', 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            state = self._read()
+            for name, saved in self._changed_tasks.items():
+                if saved is None:
+                    state['tasks'].pop(name, None)
+                else:
+                    state['tasks'][name] = saved
+            state['files'].update(self._files)
+            state['files'] = dict((file_name, cached) for file_name, cached in state['files'].items()
+                                  if os.path.isfile(file_name))
+            with tempfile.NamedTemporaryFile('w', dir=state_dir, delete=False) as state_file:
+                json.dump(state, state_file)
+            os.replace(state_file.name, self.path)
+        self._changed_tasks = {}
+
+
+class UpToDateExecutor(object):
+    """
+    Wraps an executor, skipping the tasks that are up to date or whose outputs can be restored from the
+    artifact cache, and recording the state (and caching the outputs) of the tasks that succeed.
+    """
+
+    def __init__(self, executor, state, force=False, cache=None):
+        """
+        :param executor: the executor that runs the tasks that are not up to date
+        :param state: the state database
+        :type state: TaskState
+        :param force: asserted to run the tasks even if they are up to date
+        :type force: bool
+        :param cache: the artifact cache or None to not cache outputs
+        :type cache: herring.artifact_cache.ArtifactCache|None
+        """
+        self._executor = executor
+        self._state = state
+        self._force = force
+        self._cache = cache
+        self._skipped = []
+
+    @property
+    def running(self):
+        """
+        :return: the number of started tasks that have not yet been waited upon
+        :rtype: int
+        """
+        return len(self._skipped) + self._executor.running
+
+    # noinspection PyMethodMayBeStatic
+    def _files(self, name):
+        """
+        :return: the task's input and output glob patterns
+        :rtype: tuple(list(str)|None, list(str)|None)
+        """
+        return HerringTasks[name].get('inputs'), HerringTasks[name].get('outputs')
+
+    # noinspection PyMethodMayBeStatic
+    def _arguments(self, name):
+        """
+        :return: the command line arguments relevant to the task, the declared kwargs if any else all of argv.
+        :rtype: dict|list
+        """
+        kwargs = HerringTasks[name].get('kwargs')
+        if kwargs:
+            return dict((key, TaskWithArgs.kwargs.get(key)) for key in kwargs)
+        return list(TaskWithArgs.argv)
+
+    def _restore(self, name, inputs, outputs):
+        """
+        Try to restore the task's outputs from the artifact cache.
+
+        :return: asserted if restored
+        :rtype: bool
+        """
+        key = self._cache.key(name, HerringTasks[name]['function'], self._state.fingerprint(inputs),
+                              self._arguments(name))
+        if self._cache.restore(key, outputs):
+            info("Restored from cache: {name}".format(name=name))
+            self._state.record(name, inputs, outputs, TaskWithArgs.argv)
+            self._state.save()
+            return True
+        return False
+
+    def start(self, name):
+        """
+        Start the task unless it is up to date or restored from the artifact cache.
+
+        :param name: the task name
+        :type name: str
+        """
+        inputs, outputs = self._files(name)
+        if (inputs or outputs) and not self._force:
+            try:
+                if self._state.is_up_to_date(name, inputs, outputs, TaskWithArgs.argv):
+                    info("Up to date: {name}".format(name=name))
+                    self._skipped.append(name)
+                    return
+                if inputs and outputs and self._cache is not None and self._restore(name, inputs, outputs):
+                    self._skipped.append(name)
+                    return
+            except OSError as ex:
+                warning("Can not check if {name} is up to date: {err}".format(name=name, err=str(ex)))
+        self._executor.start(name)
+
+    def wait(self):
+        """
+        Get the next finished task.
+
+        :return: tuple containing the name of the finished task and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        if self._skipped:
+            return self._skipped.pop(0), None
+        name, error_msg = self._executor.wait()
+        inputs, outputs = self._files(name)
+        if inputs or outputs:
+            try:
+                if error_msg is None:
+                    saved = self._state.record(name, inputs, outputs, TaskWithArgs.argv)
+                    self._cache_outputs(name, saved)
+                else:
+                    self._state.forget(name)
+                self._state.save()
+            except OSError as ex:
+                warning("Can not save the state of {name}: {err}".format(name=name, err=str(ex)))
+        return name, error_msg
+
+    def cancel(self):
+        """
+        Cancel the running tasks.  The skipped tasks that have not been waited upon are still reported by
+        wait().
+
+        :return: the names of the canceled tasks
+        :rtype: list(str)
+        """
+        return self._executor.cancel()
+
+    def _cache_outputs(self, name, saved):
+        """
+        Store the outputs of a task that succeeded in the artifact cache.
+
+        :param name: the task name
+        :type name: str
+        :param saved: the task's saved fingerprint
+        :type saved: dict
+        """
+        inputs, outputs = self._files(name)
+        if not (inputs and outputs) or self._cache is None or not saved['outputs']:
+            return
+        key = self._cache.key(name, HerringTasks[name]['function'], saved['inputs'], self._arguments(name))
+        try:
+            self._cache.store(key, saved['outputs'])
+        except (IOError, OSError) as ex:
+            warning("Can not cache the outputs of {name}: {err}".format(name=name, err=str(ex)))
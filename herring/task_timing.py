@@ -0,0 +1,256 @@
+# coding=utf-8
+
+"""
+Per task timing of a herring invocation.
+
+The TaskTimeline records, for every task the TaskScheduler runs, when the task was queued (all of its
+dependencies had finished), started and finished, and, for the tasks ran by the WorkerPool, the pid of
+the worker, the exit code and the size of the task's output.  Given a fingerprint function, the timeline
+also records the input fingerprint of each task that was ran as the task finishes, before later tasks can
+change its inputs.
+
+The timeline can be written as a Chrome trace-event JSON file, viewable in chrome://tracing or
+https://ui.perfetto.dev, with one row per worker process::
+
+    herring build --trace build-trace.json
+
+and summarized as a table of the slowest tasks, printed at the end of each herring invocation.
+"""
+import json
+import os
+import time
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('TaskTiming', 'TaskTimeline')
+
+# the number of tasks in the slowest tasks summary
+SLOWEST_COUNT = 5
+
+
+class TaskTiming(object):
+    """
+    The timing of one run of a task.  The times are in seconds since the timeline started.
+    """
+
+    __slots__ = ('name', 'depends', 'queued', 'started', 'finished', 'pid', 'exitcode', 'output_size', 'error',
+                 'fingerprint')
+
+    def __init__(self, name, depends=(), queued=None):
+        self.name = name
+        self.depends = sorted(depends)
+        self.queued = queued
+        self.started = None
+        self.finished = None
+        self.pid = None
+        self.exitcode = None
+        self.output_size = None
+        self.error = None
+        self.fingerprint = None
+
+    @property
+    def duration(self):
+        """
+        :return: the seconds from the start to the finish of the task, None if it has not finished
+        :rtype: float|None
+        """
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    @property
+    def wait(self):
+        """
+        :return: the seconds the task was queued before it was started, None if it has not started
+        :rtype: float|None
+        """
+        if self.queued is None or self.started is None:
+            return None
+        return self.started - self.queued
+
+
+class TaskTimeline(object):
+    """
+    The timings of the tasks ran in a herring invocation, in the order the tasks were queued.
+    """
+
+    def __init__(self, clock=time.perf_counter, fingerprint=None):
+        """
+        :param clock: returns the current time in seconds
+        :type clock: function
+        :param fingerprint: function that given a task name returns its input fingerprint or None, called
+            when a task that was ran finishes
+        :type fingerprint: function|None
+        """
+        self._clock = clock
+        self._fingerprint = fingerprint
+        self._origin = clock()
+        # wall clock time of the origin
+        self.epoch = time.time()
+        self.timings = []
+        self._open = {}
+
+    def now(self):
+        """
+        :return: the seconds since the timeline started
+        :rtype: float
+        """
+        return self._clock() - self._origin
+
+    def queued(self, name, depends=()):
+        """
+        Record that the task is ready to run.
+
+        :param name: the task name
+        :type name: str
+        :param depends: the names of the tasks it depends upon
+        :type depends: iterable(str)
+        """
+        timing = TaskTiming(name, depends, self.now())
+        self.timings.append(timing)
+        self._open[name] = timing
+
+    def _timing(self, name):
+        """
+        :return: the timing of the task's current run, recording a queued time if it was not queued
+        :rtype: TaskTiming
+        """
+        if name not in self._open:
+            self.queued(name)
+        return self._open[name]
+
+    def started(self, name):
+        """
+        Record that the task started.
+
+        :param name: the task name
+        :type name: str
+        """
+        self._timing(name).started = self.now()
+
+    def ran(self, name, pid, exitcode, output_size):
+        """
+        Record where a task ran and its results.
+
+        :param name: the task name
+        :type name: str
+        :param pid: the pid of the process that ran the task
+        :type pid: int
+        :param exitcode: the task's exit code
+        :type exitcode: int|None
+        :param output_size: the size of the task's output in bytes
+        :type output_size: int
+        """
+        timing = self._timing(name)
+        timing.pid = pid
+        timing.exitcode = exitcode
+        timing.output_size = output_size
+
+    def finished(self, name, error_msg):
+        """
+        Record that the task finished.
+
+        :param name: the task name
+        :type name: str
+        :param error_msg: the error string or None if the task succeeded
+        :type error_msg: str|None
+        """
+        timing = self._timing(name)
+        timing.finished = self.now()
+        timing.error = error_msg
+        if timing.started is None:
+            timing.started = timing.finished
+        if timing.pid is not None and self._fingerprint is not None:
+            timing.fingerprint = self._fingerprint(name)
+        del self._open[name]
+
+    def running(self):
+        """
+        :return: the timings of the task runs that started and have not finished, earliest started first
+        :rtype: list(TaskTiming)
+        """
+        return sorted((timing for timing in self._open.values() if timing.started is not None),
+                      key=lambda timing: timing.started)
+
+    def completed(self):
+        """
+        :return: the timings of the task runs that finished
+        :rtype: list(TaskTiming)
+        """
+        return [timing for timing in self.timings if timing.finished is not None]
+
+    def slowest(self, count=SLOWEST_COUNT):
+        """
+        :param count: the maximum number of timings
+        :type count: int
+        :return: the timings of the longest running tasks, longest first
+        :rtype: list(TaskTiming)
+        """
+        return sorted(self.completed(), key=lambda timing: timing.duration, reverse=True)[:count]
+
+    def summary(self, count=SLOWEST_COUNT):
+        """
+        :param count: the maximum number of tasks in the table
+        :type count: int
+        :return: the lines of the slowest tasks table, empty if no tasks finished
+        :rtype: list(str)
+        """
+        slowest = self.slowest(count)
+        if not slowest:
+            return []
+        width = max(len(timing.name) for timing in slowest)
+        lines = ["Slowest tasks:",
+                 "  {name:<{width}} {duration:>9} {wait:>9} {pid:>8} {result}".format(
+                     name='task', width=width, duration='duration', wait='queued', pid='pid', result='result')]
+        for timing in slowest:
+            lines.append("  {name:<{width}} {duration:>8.3f}s {wait:>8.3f}s {pid:>8} {result}".format(
+                name=timing.name, width=width, duration=timing.duration, wait=timing.wait,
+                pid=timing.pid or '-', result='failed' if timing.error else 'ok'))
+        return lines
+
+    def trace(self, jobs=None):
+        """
+        :param jobs: the --jobs setting, kept in the trace for the critical path analysis
+        :type jobs: int|None
+        :return: the Chrome trace-event format object of the finished tasks
+        :rtype: dict
+        """
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': pid, 'args': {'name': 'herring'}}]
+        workers = []
+        for timing in self.completed():
+            tid = timing.pid or pid
+            if tid not in workers:
+                workers.append(tid)
+                events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                               'args': {'name': 'herring' if tid == pid else 'worker {tid}'.format(tid=tid)}})
+            events.append({
+                'name': timing.name,
+                'cat': 'task',
+                'ph': 'X',
+                'pid': pid,
+                'tid': tid,
+                'ts': round(timing.started * 1e6),
+                'dur': round(timing.duration * 1e6),
+                'args': {
+                    'depends': timing.depends,
+                    'queued': round(timing.queued * 1e6),
+                    'exitcode': timing.exitcode,
+                    'output_size': timing.output_size,
+                    'error': timing.error,
+                },
+            })
+        return {'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'epoch': self.epoch, 'jobs': jobs}}
+
+    def write_trace(self, path, jobs=None):
+        """
+        Write the Chrome trace-event JSON file.
+
+        :param path: the file path
+        :type path: str
+        :param jobs: the --jobs setting
+        :type jobs: int|None
+        """
+        with open(path, 'w') as trace_file:
+            json.dump(self.trace(jobs), trace_file, indent=1)
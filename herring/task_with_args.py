@@ -13,6 +13,11 @@ Supported attributes for the @task decorator are:
 * private=boolean where boolean is True or False.  If private is True, then the task is not listed in the task list.
   Setting private=True is useful if you want to keep the task's docstring.  The presence of a docstring normally
   indicates a public task.
+* inputs=[string, ...] where string is a file glob pattern for the files the task reads.
+* outputs=[string, ...] where string is a file glob pattern for the files the task writes.  A task with inputs
+  or outputs is skipped when none of its input and output files have changed since it last succeeded.
+* always_run=boolean where boolean is True or False.  If always_run is True, then the task is ran every time it is
+  asked for, even if it has already succeeded in this herring invocation (see herring.run_once).
 
 """
 import os
@@ -22,6 +27,8 @@ import sys
 # from typing import Dict, Any, List
 
 from herring.support.simple_logger import error
+from herring.task_graph import TaskGraph
+from herring.task_spec import TaskSpec
 
 # noinspection PyUnusedName
 __docformat__ = 'restructuredtext en'  # type: str
@@ -30,16 +37,21 @@ __all__ = ('TaskWithArgs', 'HerringTasks', 'NameSpace')  # type: tuple
 
 # HerringTasks dictionary
 # key is task name as string
-# value is dictionary with keys in ['task', 'name', 'fullname', 'depends', 'namespace', 'help', 'description',
-# 'kwargs', 'private', 'configured']
+# value is a TaskSpec, also readable as a dictionary with keys in ['task', 'name', 'fullname', 'depends',
+# 'namespace', 'help', 'description', 'kwargs', 'private', 'configured']
 # where value['task'] is the task function reference,
+# value['function'] is the decorated function,
 # value['name'] is the method name,
 # value['fullname'] combines the namespace with the method name,
 # value['namespace'] is the task's namespace,
-# value['depends'] is a list of string task names that are this task's dependencies,
+# value['depends'] is a tuple of string task names that are this task's dependencies, as given to the decorator
+#     (a name used in a namespace is resolved by herring.task_graph.TaskGraph),
 # value['help'] is None or a string,
 # value['description'] is the task's docstring,
 # value['configured'] must be 'no', 'optional', or 'required', the default is 'required'.
+# value['inputs'] is None or a list of file glob patterns the task reads,
+# value['outputs'] is None or a list of file glob patterns the task writes,
+# value['always_run'] is asserted to run the task even if it already succeeded in this herring invocation.
 HerringTasks = {}  # type: Dict[str, Any]
 
 name_spaces = []  # type: List[str]
@@ -138,6 +150,21 @@ class TaskWithArgs(object):
         global name_spaces
         self.namespace = "::".join(name_spaces)
 
+    def _patterns(self, patterns):
+        """
+        Normalize an inputs or outputs decorator argument.
+
+        :param patterns: None, a glob pattern, or a list of glob patterns
+        :type patterns: None|str|list(str)
+        :return: None or list of glob patterns
+        :rtype: None|list(str)
+        """
+        if patterns is None:
+            return None
+        if isinstance(patterns, str):
+            return [patterns]
+        return list(patterns)
+
     def __call__(self, func):
         """
         Invoked once when the module is loaded so we hook in here
@@ -146,11 +173,9 @@ class TaskWithArgs(object):
         :param func: the function being decorated
         :returns: function that simply invokes the decorated function
         """
+        # the names are resolved in the task's namespace by herring.task_graph.TaskGraph
         depends = self.deco_kwargs.get('depends', [])
 
-        if self.namespace:
-            depends = [self.namespace + '::' + name for name in depends]
-
         private = self.deco_kwargs.get('private', False)
 
         dependent_of = self.deco_kwargs.get('dependent_of', None)
@@ -159,6 +184,11 @@ class TaskWithArgs(object):
         arg_prompt = self.deco_kwargs.get('arg_prompt', None)
         name_space = self.deco_kwargs.get('namespace', self.namespace)
 
+        inputs = self._patterns(self.deco_kwargs.get('inputs', None))
+        outputs = self._patterns(self.deco_kwargs.get('outputs', None))
+
+        always_run = self.deco_kwargs.get('always_run', False)
+
         configured = self.deco_kwargs.get('configured', 'required').lower()
         if configured not in ['no', 'optional', 'required']:
             configured = 'required'
@@ -185,19 +215,24 @@ class TaskWithArgs(object):
                 return 1
 
         # save task info into HerringTasks
-        HerringTasks[full_name] = {
-            'task': _wrap,
-            'depends': depends,
-            'dependent_of': dependent_of,
-            'private': private,
-            'help': task_help,
-            'description': func.__doc__,
-            'namespace': name_space,
-            'fullname': full_name,
-            'name': func.__name__,
-            'kwargs': task_kwargs,
-            'arg_prompt': arg_prompt,
-            'configured': configured,
-        }
+        HerringTasks[full_name] = TaskSpec(
+            task=_wrap,
+            function=func,
+            depends=depends,
+            dependent_of=dependent_of,
+            private=private,
+            help=task_help,
+            description=func.__doc__,
+            namespace=name_space,
+            fullname=full_name,
+            name=func.__name__,
+            kwargs=task_kwargs,
+            arg_prompt=arg_prompt,
+            configured=configured,
+            inputs=inputs,
+            outputs=outputs,
+            always_run=always_run,
+        )
+        TaskGraph.invalidate()
         # debug("HerringTasks[{name}]: {value}".format(name=full_name, value=repr(HerringTasks[full_name])))
         return _wrap
@@ -0,0 +1,484 @@
+# coding=utf-8
+
+"""
+The WorkerPool is a set of long lived worker processes that run tasks from the HerringTasks dictionary.
+
+The workers are forked after the herringfile and herringlib modules have been loaded, so each worker
+already has every task imported.  Tasks are dispatched to an idle worker by their full task name
+instead of pickling the task function, and the worker sends back the task's exit code.  A worker is only
+forked when a task is dispatched and no idle worker is available, up to the pool size, so the process
+startup cost is paid at most once per worker for the whole herring invocation.
+
+In the default GROUPED output mode the pool creates a temporary spill file for each dispatched task, the
+worker redirects the task's output to it and the pool copies it to the output when the task finishes or
+its worker dies (see herring.task_output).
+
+The multiprocessing start method may be selected.  With "fork" (the default on most POSIX platforms)
+the workers inherit the loaded tasks.  With "spawn" and "forkserver" the workers start from a clean
+image, without the parent's open file handles or replaced sys.stdout, and run an initializer that loads
+the tasks.  The "forkserver" mode preloads herring.herring_app and the herringfile and herringlib modules
+(see herring.worker_preload) into the forkserver, so the workers forked from it only have to load what
+could not be preloaded.
+
+The pool is also the channel between the nested task_execute calls in the workers and the run-once
+coordinator in the herring process (see herring.run_once): while waiting for the dispatched tasks, the
+pool answers the workers' claims, so a task is ran once per herring invocation no matter which process
+asked for it.
+
+In the STREAM output mode (see herring.task_output) the workers send each line of the tasks' output as it
+is written instead of the whole output when the task finishes, and the pool writes the lines prefixed with
+the task names while waiting.
+
+The WorkerPool is an executor (see herring.parallelize) so it can be driven by the TaskScheduler.
+
+Usage
+-----
+
+::
+
+    pool = WorkerPool(4)
+    try:
+        errors = TaskScheduler(depend_dict).run(pool, jobs=4)
+    finally:
+        pool.close()
+
+"""
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+
+from functools import partial
+from multiprocessing import connection
+
+from herring.parallelize import _exitcode, _exitcode_error
+from herring.run_once import CoordinatorClient, RunOnceExecutor, WAIT
+from herring.support.simple_logger import debug, info, error
+from herring.support.toposort import CyclicDependencyError
+from herring.task_output import GROUPED, STREAM, PrefixedOutput, copy_spilled, redirect_output, stream_output
+from herring.task_with_args import HerringTasks, TaskWithArgs
+
+__docformat__ = 'restructuredtext en'
+__all__ = ('WorkerPool',)
+
+# environment variables used to pass the modules to preload to herring.worker_preload
+PRELOAD_FILE_ENV = 'HERRING_PRELOAD_FILE'
+PRELOAD_PATH_ENV = 'HERRING_PRELOAD_PATH'
+
+
+def _run_task(name, argv, kwargs, send=None, spill=None):
+    """
+    Run the named task in this process spilling or streaming the output.
+
+    :param name: the full task name
+    :type name: str
+    :param argv: the unused command line arguments for the task
+    :type argv: list(str)
+    :param kwargs: the unused command line arguments parsed into a dictionary
+    :type kwargs: dict
+    :param send: called with each chunk of lines to stream the output
+    :type send: function|None
+    :param spill: the path of the spill file to write the output to when it is not streamed
+    :type spill: str|None
+    :return: the exit code
+    :rtype: int
+    """
+    TaskWithArgs.argv = argv
+    TaskWithArgs.kwargs = kwargs
+    if send is not None:
+        with stream_output(send):
+            return _call_task(name)
+    fd = os.open(spill, os.O_WRONLY | os.O_APPEND)
+    try:
+        with redirect_output(fd):
+            return _call_task(name)
+    finally:
+        os.close(fd)
+
+
+def _call_task(name):
+    """
+    :param name: the full task name
+    :type name: str
+    :return: the task's exit code
+    :rtype: int
+    """
+    try:
+        TaskWithArgs.arg_prompt = HerringTasks[name]['arg_prompt']
+        result = HerringTasks[name]['task']()
+    except Exception as ex:
+        error("worker error: {name} - {err}".format(name=name, err=str(ex)))
+        result = 1
+    return _exitcode(result)
+
+
+def _worker_main(conn, initializer):
+    """
+    The worker process loop.  Receives (name, argv, kwargs, spill) jobs and replies with ('done', name,
+    exitcode) until it receives None or the pool closes the connection.  While running a job, the nested
+    task_execute calls send their ('claim', name, holding) and ('finish', name, error) messages to the
+    pool's coordinator (see herring.run_once).  The output is written to the spill file or, if spill is
+    None, sent as ('output', name, lines) messages.
+
+    :param conn: the worker's end of the pipe to the pool
+    :type conn: multiprocessing.connection.Connection
+    :param initializer: None or a function that loads the tasks into a freshly started worker
+    :type initializer: function|None
+    """
+    WorkerPool.in_worker = True
+    # the parent handles keyboard interrupts and terminates the workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        initializer()
+    # the streamed output is sent from another thread
+    conn = _LockedConnection(conn)
+    client = CoordinatorClient(conn)
+    RunOnceExecutor.coordinator = client
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        name, argv, kwargs, spill = job
+        client.holding = [name]
+        send = None
+        if spill is None:
+            send = partial(_send_output, conn, name)
+        exitcode = _run_task(name, argv, kwargs, send, spill)
+        conn.send(('done', name, exitcode))
+    conn.close()
+
+
+class _LockedConnection(object):
+    """
+    The worker's end of the pipe, serializing the messages sent by the worker's threads.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    def send(self, message):
+        with self._lock:
+            self._conn.send(message)
+
+    def recv(self):
+        return self._conn.recv()
+
+    def close(self):
+        self._conn.close()
+
+
+def _send_output(conn, name, lines):
+    """
+    Stream a chunk of a task's output to the pool.
+    """
+    conn.send(('output', name, lines))
+
+
+class _Worker(object):
+    """
+    A worker process and the pool's end of the pipe to it.
+    """
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.task = None
+        # the pool's file descriptor and the path of the running task's spill file
+        self.spill = None
+        # the size of the running task's output
+        self.output_size = 0
+
+
+class WorkerPool(object):
+    """
+    A pool of persistent worker processes that run tasks by name.
+    """
+
+    # asserted in the worker processes
+    in_worker = False
+
+    def __init__(self, size=None, start_method=None, initializer=None, preload=None, coordinator=None,
+                 output=GROUPED, color=False, timeline=None, progress=None):
+        """
+        :param size: the maximum number of worker processes, None for the number of CPUs
+        :type size: int|None
+        :param start_method: 'fork', 'forkserver', 'spawn' or None for the platform's default
+        :type start_method: str|None
+        :param initializer: picklable function that loads the tasks in workers that are not forked
+            from this process, required unless the start method is 'fork'
+        :type initializer: function|None
+        :param preload: the herringfile path and the herringlib directories to preload into the forkserver
+        :type preload: tuple(str, list(Path))|None
+        :param coordinator: the coordinator the workers' nested task_execute calls claim their tasks from,
+            the default is RunOnceExecutor.coordinator
+        :type coordinator: herring.run_once.TaskCoordinator|None
+        :param output: the output mode, GROUPED or STREAM (see herring.task_output)
+        :type output: str
+        :param color: asserted to color the task names of the streamed output
+        :type color: bool
+        :param timeline: records the worker pid, exit code and output size of each task
+        :type timeline: herring.task_timing.TaskTimeline|None
+        :param progress: the progress line redrawn while waiting for the tasks
+        :type progress: herring.progress.ProgressDisplay|None
+        """
+        self.size = max(1, size or os.cpu_count() or 1)
+        self._context = multiprocessing.get_context(start_method)
+        self._initializer = None
+        if self._context.get_start_method() != 'fork':
+            self._initializer = initializer
+        if self._context.get_start_method() == 'forkserver':
+            self._preload(preload)
+        self._coordinator = RunOnceExecutor.coordinator if coordinator is None else coordinator
+        self._stream = output == STREAM
+        self._output = PrefixedOutput(color=color)
+        self._timeline = timeline
+        self._progress = progress
+        self._workers = []
+
+    def _preload(self, preload):
+        """
+        Have the forkserver preload herring and the herringfile and herringlib modules.  Only effective if
+        the forkserver has not yet been started.
+
+        :param preload: the herringfile path and the herringlib directories
+        :type preload: tuple(str, list(Path))|None
+        """
+        if preload is not None:
+            herringfile, library_paths = preload
+            os.environ[PRELOAD_FILE_ENV] = herringfile
+            os.environ[PRELOAD_PATH_ENV] = os.pathsep.join(str(path) for path in library_paths)
+        self._context.set_forkserver_preload(['herring.herring_app', 'herring.worker_preload'])
+
+    @property
+    def running(self):
+        """
+        :return: the number of dispatched tasks that have not yet been waited upon
+        :rtype: int
+        """
+        return len([worker for worker in self._workers if worker.task is not None])
+
+    def _spawn(self):
+        """
+        Start a new worker process.
+
+        :return: the new worker
+        :rtype: _Worker
+        """
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(name='herring-worker-{index}'.format(index=len(self._workers)),
+                                        target=_worker_main, args=(child_conn, self._initializer))
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        self._workers.append(worker)
+        debug("spawned worker pid {pid}".format(pid=process.pid))
+        return worker
+
+    def _idle_worker(self):
+        """
+        :return: an idle worker, forking a new one if needed.
+        :rtype: _Worker
+        """
+        for worker in self._workers:
+            if worker.task is None:
+                return worker
+        if len(self._workers) >= self.size:
+            raise ValueError("All {size} workers are busy".format(size=self.size))
+        return self._spawn()
+
+    def start(self, name):
+        """
+        Dispatch the named task to an idle worker.
+
+        :param name: the full task name
+        :type name: str
+        """
+        info("Running: {name} ({description})".format(name=name, description=HerringTasks[name]['description']))
+        worker = self._idle_worker()
+        worker.task = name
+        worker.output_size = 0
+        spill_path = None
+        if not self._stream:
+            worker.spill = tempfile.mkstemp(prefix='herring-', suffix='.out')
+            spill_path = worker.spill[1]
+        worker.conn.send((name, TaskWithArgs.argv, TaskWithArgs.kwargs, spill_path))
+
+    def wait(self):
+        """
+        Block until one of the dispatched tasks finishes, meanwhile writing the streamed output, answering
+        the coordinator messages from the nested task_execute calls in the workers and redrawing the progress
+        line.
+
+        :return: tuple containing the name of the finished task and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        while True:
+            waitables = {}
+            for worker in self._workers:
+                if worker.task is not None:
+                    waitables[worker.conn] = worker
+                    waitables[worker.process.sentinel] = worker
+            if self._progress is None:
+                ready = connection.wait(list(waitables.keys()))
+            else:
+                self._progress.refresh()
+                ready = connection.wait(list(waitables.keys()), timeout=self._progress.interval)
+                if not ready:
+                    continue
+                self._progress.clear()
+            worker = waitables[ready[0]]
+
+            message = None
+            try:
+                if worker.conn.poll():
+                    message = worker.conn.recv()
+            except EOFError:
+                pass
+            if message is None or message[0] == 'done':
+                return self._finished(worker, message)
+            if message[0] == 'output':
+                worker.output_size += len(message[2])
+                self._output.write(message[1], message[2])
+                continue
+            self._coordinate(worker, message)
+
+    def _finished(self, worker, reply):
+        """
+        :param worker: the worker that finished its task or died
+        :type worker: _Worker
+        :param reply: the worker's ('done', name, exitcode) reply or None if the worker died
+        :type reply: tuple|None
+        :return: tuple containing the name of the finished task and either an error string or None
+        :rtype: tuple(str, str|None)
+        """
+        name = worker.task
+        worker.task = None
+        self._copy_spill(worker)
+        if reply is None:
+            # the worker died while running the task
+            self._workers.remove(worker)
+            worker.conn.close()
+            worker.process.join()
+            exitcode = worker.process.exitcode
+            error_msg = (_exitcode_error(name, exitcode) or
+                         "job {name} exited without a result".format(name=name))
+        else:
+            name, exitcode = reply[1:]
+            error_msg = _exitcode_error(name, exitcode)
+        self._coordinator.release(worker.process.pid, error_msg)
+        if self._timeline is not None:
+            self._timeline.ran(name, worker.process.pid, exitcode, worker.output_size)
+        if error_msg is not None:
+            error("process error: " + error_msg)
+        return name, error_msg
+
+    # noinspection PyMethodMayBeStatic
+    def _copy_spill(self, worker):
+        """
+        Write the output of the worker's task from its spill file then remove the spill file.
+
+        :param worker: the worker whose task finished or that died
+        :type worker: _Worker
+        """
+        if worker.spill is None:
+            return
+        fd, path = worker.spill
+        worker.spill = None
+        try:
+            worker.output_size = copy_spilled(fd, prefix="process: ")
+        finally:
+            os.close(fd)
+            os.remove(path)
+
+    def _coordinate(self, worker, message):
+        """
+        Pass a worker's ('claim', name, holding) or ('finish', name, error) message to the coordinator.
+
+        :param worker: the worker that sent the message
+        :type worker: _Worker
+        :param message: the message
+        :type message: tuple
+        """
+        if message[0] == 'finish':
+            self._coordinator.finish(message[1], message[2])
+            return
+        name, holding = message[1:]
+        try:
+            outcome = self._coordinator.claim(name, worker.process.pid, holding, partial(self._reply, worker))
+        except CyclicDependencyError as ex:
+            self._reply(worker, name, None, kind='cycle', text=str(ex))
+            return
+        if outcome != WAIT:
+            self._reply(worker, name, None, kind=outcome)
+
+    # noinspection PyMethodMayBeStatic
+    def _reply(self, worker, name, error_msg, kind=None, text=None):
+        """
+        Answer a worker's claim.  Called by the coordinator when the task the worker waits for finishes.
+
+        :param worker: the worker waiting for the reply
+        :type worker: _Worker
+        :param name: the claimed task name
+        :type name: str
+        :param error_msg: the error string of the task that was waited for or None if it succeeded
+        :type error_msg: str|None
+        :param kind: RUN, SKIP or 'cycle', the default is the result of the task that was waited for
+        :type kind: str|None
+        :param text: the reason for a 'cycle'
+        :type text: str|None
+        """
+        if kind is None:
+            kind = 'skip' if error_msg is None else 'error'
+            text = error_msg
+        try:
+            worker.conn.send((kind, text))
+        except (OSError, ValueError) as ex:
+            debug("can not answer the claim of {name}: {err}".format(name=name, err=str(ex)))
+
+    def cancel(self):
+        """
+        Terminate the workers that are running tasks, writing the output the tasks spilled so far.  The idle
+        workers are kept for later runs.
+
+        :return: the names of the canceled tasks
+        :rtype: list(str)
+        """
+        busy = [worker for worker in self._workers if worker.task is not None]
+        for worker in busy:
+            worker.process.terminate()
+        names = []
+        for worker in busy:
+            worker.process.join()
+            self._workers.remove(worker)
+            worker.conn.close()
+            names.append(worker.task)
+            worker.task = None
+            self._copy_spill(worker)
+            self._coordinator.release(worker.process.pid, "{name} was canceled".format(name=names[-1]))
+        return names
+
+    def close(self):
+        """
+        Stop all of the worker processes.
+        """
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
+            if worker.spill is not None:
+                os.close(worker.spill[0])
+                os.remove(worker.spill[1])
+        self._workers = []
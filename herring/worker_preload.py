@@ -0,0 +1,37 @@
+# coding=utf-8
+
+"""
+Imported by the multiprocessing forkserver (see WorkerPool) to warm its image with the herringfile and
+herringlib modules that the parent process loaded, so every forked worker starts with them already imported.
+
+The parent passes the herringfile path in the HERRING_PRELOAD_FILE environment variable and the herringlib
+directories in HERRING_PRELOAD_PATH (os.pathsep separated).  The modules are loaded in the same order as in
+the parent.  A module that fails to import here is simply loaded again by each worker, where any error is
+reported.
+"""
+import os
+
+from pathlib import Path
+
+from herring.herring_loader import HerringLoader
+from herring.worker_pool import PRELOAD_FILE_ENV, PRELOAD_PATH_ENV
+
+__docformat__ = 'restructuredtext en'
+
+
+def preload():
+    """
+    Load the herringfile and herringlib modules named in the environment.
+    """
+    herringfile = os.environ.get(PRELOAD_FILE_ENV)
+    if herringfile:
+        library_paths = [Path(path) for path in os.environ.get(PRELOAD_PATH_ENV, '').split(os.pathsep) if path]
+        # noinspection PyBroadException
+        try:
+            HerringLoader(None).load_modules(herringfile, library_paths)
+        except Exception:
+            # any exception would kill the forkserver
+            pass
+
+
+preload()
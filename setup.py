@@ -81,7 +81,8 @@ setup(
     long_description=long_description,
     install_requires=required_imports,
     entry_points={
-        'console_scripts': ['herring = herring.herring_main:main']
+        'console_scripts': ['herring = herring.herring_main:main',
+                            'herringc = herring.herring_client:main']
     },
     classifiers=[
         "Development Status :: 5 - Production/Stable",
@@ -0,0 +1,119 @@
+# coding=utf-8
+
+"""
+Unit tests for the artifact cache
+"""
+import os
+import shutil
+
+from tempfile import mkdtemp
+
+from herring.artifact_cache import ArtifactCache
+from herring.support.utils import file_digest
+
+
+def cat():
+    """ a task function """
+    pass
+
+
+def dog():
+    """ another task function """
+    pass
+
+
+class TestArtifactCache(object):
+    """ Test suite for ArtifactCache """
+
+    def setup_method(self):
+        self.cwd = os.getcwd()
+        self.base_dir = mkdtemp()
+        os.chdir(self.base_dir)
+        self.cache = ArtifactCache(os.path.join(self.base_dir, 'cache'))
+
+    def teardown_method(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.base_dir)
+
+    # noinspection PyMethodMayBeStatic
+    def write(self, file_name, text):
+        with open(file_name, 'w') as out_file:
+            out_file.write(text)
+        return file_digest(file_name)
+
+    # noinspection PyMethodMayBeStatic
+    def read(self, file_name):
+        with open(file_name) as in_file:
+            return in_file.read()
+
+    def restore(self, key):
+        return self.cache.restore(key, ['*.txt'], self.base_dir)
+
+    def blob_count(self):
+        return len(self.cache._scan(os.path.join(self.cache.directory, 'blobs')))
+
+    def test_key(self):
+        key = self.cache.key('cat', cat, {'a.txt': '1'}, [])
+        assert key == self.cache.key('cat', cat, {'a.txt': '1'}, [])
+        assert key != self.cache.key('cat', cat, {'a.txt': '2'}, [])
+        assert key != self.cache.key('cat', cat, {'a.txt': '1'}, ['--verbose'])
+        assert key != self.cache.key('cat', dog, {'a.txt': '1'}, [])
+
+    def test_round_trip(self):
+        outputs = {'out.txt': self.write('out.txt', 'alphabeta')}
+        os.chmod('out.txt', 0o750)
+        self.cache.store('key1', outputs)
+        self.write('out.txt', 'changed')
+        assert self.restore('key1')
+        assert self.read('out.txt') == 'alphabeta'
+        assert os.stat('out.txt').st_mode & 0o777 == 0o750
+
+    def test_miss(self):
+        assert not self.restore('missing')
+
+    def test_shared_blobs(self):
+        self.cache.store('key1', {'out1.txt': self.write('out1.txt', 'same')})
+        self.cache.store('key2', {'out2.txt': self.write('out2.txt', 'same')})
+        assert self.blob_count() == 1
+
+    def test_evict_least_recently_used(self):
+        self.cache.size_limit = 0
+        self.cache.store('key1', {'out1.txt': self.write('out1.txt', 'one')})
+        assert not self.restore('key1')
+        assert self.blob_count() == 0
+
+        self.cache.size_limit = 1024 * 1024
+        self.cache.store('key1', {'out1.txt': self.write('out1.txt', 'one')})
+        self.cache.store('key2', {'out2.txt': self.write('out2.txt', 'two')})
+        os.utime(self.cache._entry_path('key1'), (1, 1))
+        self.cache.size_limit = os.path.getsize(self.cache._blob_path(file_digest('out2.txt')))
+        self.cache.evict()
+        assert not self.restore('key1')
+        assert self.restore('key2')
+        assert self.blob_count() == 1
+
+    def test_evict_many(self):
+        keys = ['key{index:02d}'.format(index=index) for index in range(20)]
+        for index, key in enumerate(keys):
+            self.cache.store(key, {'out.txt': self.write('out.txt', 'contents {key}'.format(key=key))})
+            os.utime(self.cache._entry_path(key), (index + 1, index + 1))
+        newest = keys[-5:]
+        self.cache.size_limit = sum(os.path.getsize(self.cache._blob_path(digest))
+                                    for path, digest, mode in (self.cache._load_entry(key)[0] for key in newest))
+        self.cache.evict()
+        assert sorted(name[:-len('.json')] for name in os.listdir(self.cache._entries_dir)) == newest
+        assert self.blob_count() == 5
+
+    def test_restore_only_outputs(self):
+        digest = self.write('out.txt', 'alphabeta')
+        self.cache.store('key1', {'out.txt': digest})
+        os.remove('out.txt')
+        for path in ('../escaped.txt', os.path.join(self.base_dir, 'absolute.txt'), 'other.dat'):
+            self.cache.write_entry('bad', [['out.txt', digest, 0o644], [path, digest, 0o644]])
+            assert not self.restore('bad')
+        assert not os.path.exists('out.txt')
+        assert not os.path.exists(os.path.join(self.base_dir, 'absolute.txt'))
+        self.cache.write_entry('nested', [['build/out.txt', digest, 0o644]])
+        assert not self.restore('nested')
+        assert self.cache.restore('nested', ['build/**/*.txt'], self.base_dir)
+        assert self.read('build/out.txt') == 'alphabeta'
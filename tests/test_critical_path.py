@@ -0,0 +1,58 @@
+# coding=utf-8
+
+"""
+Unit tests for the critical path analysis
+"""
+import pytest
+
+from herring.critical_path import CriticalPathAnalysis
+from herring.task_timing import TaskTimeline
+
+# compile and docs can run in parallel, link needs compile, package needs link and docs
+DURATIONS = {'compile': 4.0, 'docs': 2.0, 'link': 1.0, 'package': 1.0, 'lint': 3.0}
+DEPENDS = {'compile': [], 'docs': [], 'link': ['compile'], 'package': ['link', 'docs'], 'lint': []}
+
+
+class TestCriticalPath(object):
+    """ Test suite for CriticalPathAnalysis """
+
+    def setup_method(self):
+        self.analysis = CriticalPathAnalysis(DURATIONS, DEPENDS, jobs=1, wall_time=11.5)
+
+    def test_critical_path(self):
+        assert self.analysis.critical_path() == ['compile', 'link', 'package']
+        assert self.analysis.minimum_wall_time == pytest.approx(6.0)
+
+    def test_slack(self):
+        assert self.analysis.slack['compile'] == pytest.approx(0.0)
+        assert self.analysis.slack['docs'] == pytest.approx(3.0)
+        assert self.analysis.slack['lint'] == pytest.approx(3.0)
+
+    def test_simulated_wall_time(self):
+        assert self.analysis.simulated_wall_time() == pytest.approx(11.0)
+        assert self.analysis.simulated_wall_time(2) == pytest.approx(6.0)
+        assert self.analysis.simulated_wall_time(10) == pytest.approx(6.0)
+
+    def test_report(self):
+        lines = self.analysis.report()
+        assert lines[0] == 'Critical path (6.000s): compile -> link -> package'
+        assert lines[1] == ('Minimum wall time: 6.000s with unlimited workers, 11.000s with 1 jobs, '
+                            'measured 11.500s')
+        assert [line.split()[0] for line in lines[3:]] == ['docs', 'lint']
+
+    def test_unknown_depends_are_ignored(self):
+        analysis = CriticalPathAnalysis({'b': 1.0}, {'b': ['a']})
+        assert analysis.critical_path() == ['b']
+
+    def test_from_timeline_and_trace(self):
+        clock = iter(range(100))
+        timeline = TaskTimeline(clock=lambda: float(next(clock)))
+        for name in ['compile', 'link']:
+            timeline.queued(name, DEPENDS[name])
+            timeline.started(name)
+            timeline.finished(name, None)
+        analysis = CriticalPathAnalysis.from_timeline(timeline, jobs=2)
+        assert analysis.critical_path() == ['compile', 'link']
+        assert analysis.durations == {'compile': 1.0, 'link': 1.0}
+        from_trace = CriticalPathAnalysis.from_trace(timeline.trace(jobs=2))
+        assert from_trace.report() == analysis.report()
@@ -115,6 +115,14 @@ class TestHerring(TestCase):
         self.verify_resolveDependencies(['phi'], [['phi']])
         self.verify_resolveDependencies(['sigma'], [['phi', 'beta', 'alpha'], ['delta'], ['sigma']])
 
+    def test__find_dependencies_deep_chain(self):
+        """ a dependency chain deeper than the recursion limit """
+        herring_tasks = dict(('t%d' % index, {'task': dummy_task, 'depends': ['t%d' % (index - 1)] if index else []})
+                             for index in range(5000))
+        # noinspection PyProtectedMember
+        depends = HerringRunner()._find_dependencies(['t4999'], herring_tasks)
+        self.assertEqual(depends, ['t%d' % index for index in range(4999, -1, -1)])
+
     # def test__wrap(self):
     #     """ verify the _wrap method correctly wraps strings """
     #     quotes = """
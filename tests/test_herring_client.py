@@ -0,0 +1,75 @@
+# coding=utf-8
+
+"""
+Unit tests for the herring daemon client protocol
+"""
+import os
+import shutil
+import socket
+
+from tempfile import mkdtemp, TemporaryFile
+
+from herring.herring_client import find_daemon_socket, herringfile_name, recv_message, send_message
+
+
+class TestHerringClient(object):
+    """ Test suite for the herring daemon client """
+
+    def setup_method(self):
+        self.base_dir = mkdtemp()
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir)
+
+    def test_message(self):
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            send_message(client, {'argv': ['-T'], 'environ': {'X': 'y' * 100000}})
+            message, fds = recv_message(server)
+            assert message['argv'] == ['-T']
+            assert len(message['environ']['X']) == 100000
+            assert fds == []
+        finally:
+            client.close()
+            server.close()
+
+    def test_pass_fds(self):
+        client, server = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            with TemporaryFile() as out_file:
+                send_message(client, {'argv': []}, fds=[out_file.fileno()])
+                message, fds = recv_message(server, max_fds=3)
+                assert len(fds) == 1
+                os.write(fds[0], b'hello')
+                os.close(fds[0])
+                out_file.seek(0)
+                assert out_file.read() == b'hello'
+        finally:
+            client.close()
+            server.close()
+
+    def test_find_daemon_socket(self):
+        sub_dir = os.path.join(self.base_dir, 'src', 'pkg')
+        os.makedirs(sub_dir)
+        os.makedirs(os.path.join(self.base_dir, '.herring'))
+        open(os.path.join(self.base_dir, 'herringfile'), 'w').close()
+        assert find_daemon_socket(directory=sub_dir) is None
+
+        socket_path = os.path.join(self.base_dir, '.herring', 'daemon.sock')
+        open(socket_path, 'w').close()
+        assert find_daemon_socket(directory=sub_dir) == socket_path
+        assert find_daemon_socket('tasks.py', sub_dir) is None
+
+        os.rename(os.path.join(self.base_dir, 'herringfile'), os.path.join(self.base_dir, 'tasks.py'))
+        assert find_daemon_socket(directory=sub_dir) is None
+        assert find_daemon_socket('tasks.py', sub_dir) == socket_path
+
+    def test_herringfile_name(self):
+        conf_file = os.path.join(self.base_dir, 'herring.conf')
+        with open(conf_file, 'w') as config:
+            config.write('[Herring]\nherringfile: build.py\n')
+        assert herringfile_name(['-f', 'tasks.py', 'test']) == 'tasks.py'
+        assert herringfile_name(['--herringfile=tasks.py']) == 'tasks.py'
+        assert herringfile_name(['-c', conf_file, 'test']) == 'build.py'
+        assert herringfile_name(['-c', conf_file, '--herringfile', 'tasks.py']) == 'tasks.py'
+        assert herringfile_name(['test', '-f']) == 'herringfile'
@@ -0,0 +1,99 @@
+# coding=utf-8
+
+"""
+Unit tests for the herring daemon
+"""
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from tempfile import mkdtemp, TemporaryFile
+
+from herring.herring_client import find_daemon_socket, herringfile_name, request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TASKS = '''\
+from herring.herring_app import task
+
+@task()
+def hello():
+    """says hello"""
+    print('hello')
+'''
+
+MORE_TASKS = '''
+@task()
+def goodbye():
+    """says goodbye"""
+    print('goodbye')
+'''
+
+
+class TestHerringDaemon(object):
+    """ Test suite for the herring daemon """
+
+    def setup_method(self):
+        self.base_dir = mkdtemp()
+        self.project_dir = os.path.join(self.base_dir, 'project')
+        self.sub_dir = os.path.join(self.project_dir, 'src')
+        os.makedirs(self.sub_dir)
+        self.herring_file = os.path.join(self.project_dir, 'tasks.py')
+        with open(self.herring_file, 'w') as tasks_file:
+            tasks_file.write(TASKS)
+        self.environ = dict(os.environ, HOME=self.base_dir, PYTHONPATH=ROOT_DIR)
+        self.socket_path = os.path.join(self.project_dir, '.herring', 'daemon.sock')
+
+    def teardown_method(self):
+        request(self.socket_path, {'stop': True})
+        shutil.rmtree(self.base_dir)
+
+    def herring(self, *args):
+        return subprocess.run([sys.executable, '-m', 'herring.herring_main', '--herringfile', 'tasks.py'] + list(args),
+                              cwd=self.sub_dir, env=self.environ, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True, timeout=60)
+
+    def request(self, *argv):
+        """
+        :return: the daemon's reply and the request's output
+        :rtype: tuple(dict|None, str)
+        """
+        with TemporaryFile() as in_file, TemporaryFile() as out_file:
+            reply = request(self.socket_path,
+                            {'argv': ['--herringfile', 'tasks.py'] + list(argv), 'cwd': self.sub_dir,
+                             'environ': self.environ},
+                            fds=[in_file.fileno(), out_file.fileno(), out_file.fileno()])
+            out_file.seek(0)
+            return reply, out_file.read().decode('utf-8')
+
+    def test_daemon(self):
+        assert 'Started the herring daemon' in self.herring('--daemon').stdout
+        assert find_daemon_socket(herringfile_name(['-f', 'tasks.py']), self.sub_dir) == self.socket_path
+
+        reply, output = self.request('hello')
+        assert reply == {'exit': 0}
+        assert 'hello' in output
+        reply, output = self.request('missing')
+        assert reply['exit'] != 0
+
+        # a changed herringfile is answered as stale until the daemon has restarted with the new tasks
+        with open(self.herring_file, 'a') as tasks_file:
+            tasks_file.write(MORE_TASKS)
+        assert self.request('-T')[0] == {'stale': True}
+        deadline = time.time() + 30
+        while True:
+            reply, output = self.request('-T')
+            if reply == {'exit': 0}:
+                break
+            assert time.time() < deadline
+            time.sleep(0.1)
+        assert 'herring goodbye' in output
+
+        assert 'Stopped the herring daemon' in self.herring('--stop_daemon').stdout
+        deadline = time.time() + 30
+        while os.path.exists(self.socket_path):
+            assert time.time() < deadline
+            time.sleep(0.1)
+        assert self.request('-T')[0] is None
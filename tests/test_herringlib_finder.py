@@ -0,0 +1,70 @@
+# coding=utf-8
+
+"""
+Unit tests for the herringlib union import hook
+"""
+import os
+import shutil
+import sys
+
+from importlib import import_module
+from pathlib import Path
+from tempfile import mkdtemp
+
+from herring.herringlib_finder import HerringlibFinder
+
+
+class TestHerringlibFinder(object):
+    """ Test suite for HerringlibFinder """
+
+    def setup_method(self):
+        self.base_dir = mkdtemp()
+        self.write('first/herringlib/__init__.py', 'ORIGIN = "first"')
+        self.write('first/herringlib/common.py', 'ORIGIN = "first"')
+        self.write('first/herringlib/sub/__init__.py', '')
+        self.write('second/herringlib/__init__.py', 'ORIGIN = "second"')
+        self.write('second/herringlib/common.py', 'ORIGIN = "second"')
+        self.write('second/herringlib/only_second.py', 'ORIGIN = "second"')
+        self.write('second/herringlib/sub/deep.py', 'ORIGIN = "second"')
+        self.write('second/herringlib/nested/module.py', 'ORIGIN = "second"')
+        self.library_paths = [Path(self.base_dir, 'first', 'herringlib'), Path(self.base_dir, 'second', 'herringlib')]
+        self.meta_path = sys.meta_path[:]
+        self.forget_modules()
+        HerringlibFinder.install(self.library_paths)
+
+    def teardown_method(self):
+        sys.meta_path[:] = self.meta_path
+        self.forget_modules()
+        shutil.rmtree(self.base_dir)
+
+    # noinspection PyMethodMayBeStatic
+    def forget_modules(self):
+        for name in [name for name in sys.modules if name == 'herringlib' or name.startswith('herringlib.')]:
+            del sys.modules[name]
+
+    def write(self, file_name, text):
+        file_path = os.path.join(self.base_dir, file_name)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with open(file_path, 'w') as out_file:
+            out_file.write(text)
+
+    def test_first_found_wins(self):
+        assert import_module('herringlib').ORIGIN == 'first'
+        assert import_module('herringlib.common').ORIGIN == 'first'
+        assert import_module('herringlib.common').__file__ == os.path.join(self.base_dir, 'first', 'herringlib',
+                                                                           'common.py')
+
+    def test_union(self):
+        assert import_module('herringlib.only_second').ORIGIN == 'second'
+        assert import_module('herringlib.sub.deep').ORIGIN == 'second'
+        assert import_module('herringlib.nested.module').ORIGIN == 'second'
+
+    def test_merged_path(self):
+        assert list(import_module('herringlib').__path__) == [str(path) for path in self.library_paths]
+        assert len(import_module('herringlib.sub').__path__) == 2
+
+    def test_install_replaces(self):
+        HerringlibFinder.install(self.library_paths[1:])
+        assert len([finder for finder in sys.meta_path if isinstance(finder, HerringlibFinder)]) == 1
+        assert import_module('herringlib').ORIGIN == 'second'
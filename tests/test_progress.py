@@ -0,0 +1,100 @@
+# coding=utf-8
+
+"""
+Unit tests for the progress line
+"""
+import io
+
+from herring.progress import CLEAR_LINE, ProgressDisplay
+from herring.task_timing import TaskTimeline
+
+
+class ManualClock(object):
+    """a clock that only advances when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Settings(object):
+    def __init__(self, progress=True, json=False):
+        self.progress = progress
+        self.json = json
+
+
+class Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestProgressDisplay(object):
+    """ Test suite for ProgressDisplay """
+
+    def setup_method(self):
+        self.clock = ManualClock()
+        self.timeline = TaskTimeline(clock=self.clock)
+        self.stream = io.StringIO()
+        self.width = 80
+        self.progress = ProgressDisplay(self.timeline, jobs=2, stream=self.stream, interval=0.25, clock=self.clock,
+                                        terminal_size=lambda: (self.width, 25))
+        self.progress.add(['build', 'test', 'doc'], {'build': 10.0, 'test': 4.0}, default_estimate=2.0)
+
+    def run(self, name, duration):
+        self.timeline.started(name)
+        self.clock.now += duration
+        self.timeline.finished(name, None)
+
+    def test_line(self):
+        self.run('doc', 1.0)
+        self.timeline.started('build')
+        self.clock.now += 2.0
+        self.timeline.started('test')
+        self.clock.now += 1.0
+        # (10 - 3) + (4 - 1) seconds of remaining work on 2 jobs
+        assert self.progress.line() == '[1/3] ETA 0:05  build 3.0s, test 1.0s'
+
+    def test_overdue_tasks(self):
+        self.timeline.started('test')
+        self.clock.now += 100.0
+        assert self.progress.line() == '[0/3] ETA 0:06  test 100.0s'
+
+    def test_finished(self):
+        for name in ('build', 'test', 'doc'):
+            self.run(name, 1.0)
+        assert self.progress.line() == '[3/3] ETA 0:00  '
+
+    def test_truncated(self):
+        self.width = 20
+        self.timeline.started('build')
+        self.progress.refresh()
+        assert self.stream.getvalue() == CLEAR_LINE + '[0/3] ETA 0:08  bui'
+
+    def test_refresh_rate(self):
+        self.progress.refresh()
+        self.progress.refresh()
+        self.clock.now += 0.1
+        self.progress.refresh()
+        assert self.stream.getvalue().count(CLEAR_LINE) == 1
+        self.clock.now += 0.2
+        self.progress.refresh()
+        assert self.stream.getvalue().count(CLEAR_LINE) == 2
+        self.progress.refresh(force=True)
+        assert self.stream.getvalue().count(CLEAR_LINE) == 3
+
+    def test_clear(self):
+        self.progress.clear()
+        assert self.stream.getvalue() == ''
+        self.progress.refresh()
+        self.progress.clear()
+        assert self.stream.getvalue().endswith(CLEAR_LINE)
+        self.progress.clear()
+        assert self.stream.getvalue().count(CLEAR_LINE) == 2
+
+    def test_enabled(self):
+        assert ProgressDisplay.enabled(Settings(), stream=Terminal())
+        assert not ProgressDisplay.enabled(Settings(), stream=io.StringIO())
+        assert not ProgressDisplay.enabled(Settings(json=True), stream=Terminal())
+        assert not ProgressDisplay.enabled(Settings(progress=False), stream=Terminal())
@@ -0,0 +1,102 @@
+# coding=utf-8
+
+"""
+Unit tests for the remote artifact cache tier using the reference server
+"""
+import os
+import shutil
+import socket
+import threading
+
+from tempfile import mkdtemp
+
+from herring.artifact_cache import ArtifactCache
+from herring.remote_cache import RemoteCache
+from herring.remote_cache_server import RemoteCacheServer
+from herring.support.utils import file_digest
+
+KEY = 'a' * 64
+
+
+class TestRemoteCache(object):
+    """ Test suite for RemoteCache """
+
+    def setup_method(self):
+        self.cwd = os.getcwd()
+        self.base_dir = mkdtemp()
+        os.chdir(self.base_dir)
+        self.server = RemoteCacheServer(('localhost', 0), os.path.join(self.base_dir, 'server'))
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.start()
+        self.url = 'http://localhost:{port}'.format(port=self.server.server_port)
+
+    def teardown_method(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.base_dir)
+
+    # noinspection PyMethodMayBeStatic
+    def write(self, file_name, text):
+        with open(file_name, 'w') as out_file:
+            out_file.write(text)
+        return file_digest(file_name)
+
+    # noinspection PyMethodMayBeStatic
+    def read(self, file_name):
+        with open(file_name) as in_file:
+            return in_file.read()
+
+    def cache(self, name, url):
+        return ArtifactCache(os.path.join(self.base_dir, name), remote=RemoteCache(url))
+
+    def test_shared_between_machines(self):
+        outputs = {'out1.txt': self.write('out1.txt', 'one'), 'out2.txt': self.write('out2.txt', 'two')}
+        agent1 = self.cache('agent1', self.url)
+        agent1.store(KEY, outputs)
+        agent1.close()
+
+        os.remove('out1.txt')
+        os.remove('out2.txt')
+        agent2 = self.cache('agent2', self.url)
+        assert agent2.restore(KEY, ['*.txt'], self.base_dir)
+        assert self.read('out1.txt') == 'one'
+        assert self.read('out2.txt') == 'two'
+        assert agent2.remote.available
+
+    def test_miss(self):
+        agent = self.cache('agent', self.url)
+        assert not agent.restore(KEY, ['*.txt'], self.base_dir)
+        assert agent.remote.available
+
+    def test_corrupt_blob(self):
+        digest = self.write('out.txt', 'one')
+        agent1 = self.cache('agent1', self.url)
+        agent1.store(KEY, {'out.txt': digest})
+        agent1.close()
+        with open(os.path.join(self.base_dir, 'server', 'cas', digest), 'wb') as blob_file:
+            blob_file.write(b'garbage')
+        assert not self.cache('agent2', self.url).restore(KEY, ['*.txt'], self.base_dir)
+
+    def test_unavailable(self):
+        sock = socket.socket()
+        sock.bind(('localhost', 0))
+        url = 'http://localhost:{port}'.format(port=sock.getsockname()[1])
+        sock.close()
+
+        agent = self.cache('agent', url)
+        assert not agent.restore(KEY, ['*.txt'], self.base_dir)
+        assert not agent.remote.available
+        agent.store(KEY, {'out.txt': self.write('out.txt', 'one')})
+        agent.close()
+        assert agent.restore(KEY, ['*.txt'], self.base_dir)
+
+    def test_tampered_entry(self):
+        digest = self.write('out.txt', 'one')
+        agent1 = self.cache('agent1', self.url)
+        agent1.store(KEY, {'out.txt': digest})
+        agent1.remote.put(KEY, [['../escaped.txt', digest, 0o644]], agent1._blob_path)
+        agent1.close()
+        assert not self.cache('agent2', self.url).restore(KEY, ['*.txt'], self.base_dir)
+        assert not os.path.exists(os.path.join(os.path.dirname(self.base_dir), 'escaped.txt'))
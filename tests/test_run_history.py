@@ -0,0 +1,81 @@
+# coding=utf-8
+
+"""
+Unit tests for the run history
+"""
+import os
+import shutil
+import tempfile
+
+from herring.run_history import RunHistory, percentile
+from herring.task_timing import TaskTimeline
+
+
+def timeline_of(durations, failed=(), skipped=(), fingerprint=None):
+    """a timeline where each task ran for the given number of seconds, one after the other"""
+    clock = [0.0]
+    timeline = TaskTimeline(clock=lambda: clock[0], fingerprint=fingerprint)
+    for name, duration in durations.items():
+        timeline.queued(name)
+        timeline.started(name)
+        if name not in skipped:
+            timeline.ran(name, 42, 1 if name in failed else 0, 10)
+        clock[0] += duration
+        timeline.finished(name, 'job {name} failed'.format(name=name) if name in failed else None)
+    return timeline
+
+
+class TestRunHistory(object):
+    """ Test suite for RunHistory """
+
+    def setup_method(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = RunHistory(os.path.join(self.directory, '.herring', 'history.sqlite'))
+
+    def teardown_method(self):
+        self.history.close()
+        shutil.rmtree(self.directory)
+
+    def test_percentile(self):
+        values = [5.0, 1.0, 4.0, 2.0, 3.0]
+        assert percentile(values, 0.5) == 3.0
+        assert percentile(values, 0.95) == 5.0
+        assert percentile(values, 0.0) == 1.0
+        assert percentile([], 0.5) is None
+
+    def test_record(self):
+        inputs = {'build': 'abc'}
+        timeline = timeline_of({'build': 2.0, 'test': 1.0, 'clean': 0.0}, failed=['test'], skipped=['clean'],
+                               fingerprint=lambda name: inputs.get(name))
+        # the inputs change after build finished
+        inputs['build'] = 'def'
+        count = self.history.record(timeline, jobs=4)
+        assert count == 2
+        # noinspection PyProtectedMember
+        assert self.history._connection().execute('SELECT task, input_fingerprint FROM task_runs '
+                                                  'ORDER BY task').fetchall() == [('build', 'abc'), ('test', None)]
+        assert self.history.durations('build') == [2.0]
+        assert self.history.durations('test') == []
+        assert [run[2] for run in self.history.runs('test')] == ['failed']
+        assert self.history.runs('clean') == []
+
+    def test_report(self):
+        for duration in [1.0, 1.0, 1.0, 1.0, 1.0, 2.0, 2.0, 2.0, 2.0, 2.0]:
+            self.history.record(timeline_of({'build': duration}))
+        self.history.record(timeline_of({'build': 9.0}, failed=['build']))
+        lines = self.history.report('build')
+        assert lines[0].startswith('History of build: 11 runs, 1 failed, last ran ')
+        assert lines[0].endswith('(failed)')
+        assert lines[1] == '  p50 1.000s  p95 2.000s  last 2.000s'
+        assert lines[2] == '  trend: 100% slower over the last 5 runs'
+
+    def test_no_history(self):
+        assert self.history.report('build') == ['No history for build']
+
+    def test_estimates(self):
+        for duration in [9.0, 1.0, 2.0, 3.0]:
+            self.history.record(timeline_of({'build': duration, 'test': 1.0}))
+        self.history.record(timeline_of({'build': 100.0}, failed=['build']))
+        assert self.history.estimates(['build', 'unknown']) == {'build': 2.0}
+        assert self.history.estimates(['build'], runs=3) == {'build': 2.0}
+        assert self.history.estimates(['build'], runs=1) == {'build': 3.0}
@@ -0,0 +1,173 @@
+# coding=utf-8
+
+"""
+Unit tests for the run-once coordination
+"""
+import time
+
+import pytest
+
+from herring.parallelize import SerialExecutor
+from herring.run_once import CompletionRegistry, RunOnceExecutor, TaskCoordinator, RUN, SKIP, WAIT
+from herring.support.toposort import CyclicDependencyError
+from herring.task_scheduler import FAIL_FAST, TaskScheduler
+from herring.task_timing import TaskTimeline
+from herring.task_with_args import HerringTasks, TaskWithArgs
+from herring.worker_pool import WorkerPool
+
+RAN = []
+TASKS = ['once_clean', 'once_always', 'once_fail', 'once_recursive', 'once_slow', 'once_nested']
+
+
+def register(name, function, **kwargs):
+    """register the function as a task with the given name"""
+    function.__name__ = name
+    TaskWithArgs(**kwargs)(function)
+
+
+def nested_execute(name):
+    """what a nested task_execute does in a worker"""
+    executor = RunOnceExecutor(SerialExecutor(lambda name_: HerringTasks[name_]['task']))
+    return TaskScheduler({name: set()}).run(executor)
+
+
+def once_clean():
+    RAN.append('once_clean')
+
+
+def once_always():
+    RAN.append('once_always')
+
+
+def once_fail():
+    RAN.append('once_fail')
+    return 1
+
+
+def once_recursive():
+    nested_execute('once_recursive')
+
+
+def once_slow():
+    time.sleep(0.3)
+    print('once_slow ran')
+
+
+def once_nested():
+    print('nested errors: {errors}'.format(errors=nested_execute('once_slow')))
+
+
+class TestRunOnce(object):
+    """ Test suite for TaskCoordinator and RunOnceExecutor """
+
+    def setup_method(self):
+        del RAN[:]
+        self.saved_coordinator = RunOnceExecutor.coordinator
+        self.coordinator = RunOnceExecutor.coordinator = TaskCoordinator(CompletionRegistry())
+        register('once_clean', once_clean)
+        register('once_always', once_always, always_run=True)
+        register('once_fail', once_fail)
+        register('once_recursive', once_recursive)
+        register('once_slow', once_slow)
+        register('once_nested', once_nested)
+
+    def teardown_method(self):
+        RunOnceExecutor.coordinator = self.saved_coordinator
+        for name in TASKS:
+            del HerringTasks[name]
+
+    # noinspection PyMethodMayBeStatic
+    def run(self, depend_dict):
+        executor = RunOnceExecutor(SerialExecutor(lambda name: HerringTasks[name]['task']))
+        return TaskScheduler(depend_dict).run(executor)
+
+    def test_registry(self):
+        registry = CompletionRegistry()
+        registry.add('a')
+        registry.add('b')
+        registry.add('a')
+        assert registry.names == ['a', 'b']
+        assert 'b' in registry
+        assert len(registry) == 2
+
+    def test_claims(self):
+        notified = []
+        assert self.coordinator.claim('a') == RUN
+        assert self.coordinator.claim('a', 1, ['b'], lambda *args: notified.append(args)) == WAIT
+        assert self.coordinator.result('a') == (False, None)
+        self.coordinator.finish('a', None)
+        assert notified == [('a', None)]
+        assert self.coordinator.result('a') == (True, None)
+        assert self.coordinator.claim('a', 2) == SKIP
+
+    def test_cycle(self):
+        assert self.coordinator.claim('x', 1, ['t1']) == RUN
+        assert self.coordinator.claim('y', 2, ['t2']) == RUN
+        assert self.coordinator.claim('y', 1, ['t1', 'x'], lambda *args: None) == WAIT
+        with pytest.raises(CyclicDependencyError) as info:
+            self.coordinator.claim('x', 2, ['t2', 'y'], lambda *args: None)
+        assert info.value.cycle == ['y', 'x', 'y']
+
+    def test_release(self):
+        notified = []
+        assert self.coordinator.claim('x', 1, ['t1']) == RUN
+        assert self.coordinator.claim('x', 2, ['t2'], lambda *args: notified.append(args)) == WAIT
+        self.coordinator.release(1, 'worker died')
+        assert notified == [('x', 'worker died')]
+        assert self.coordinator.claim('x', 2, ['t2']) == RUN
+
+    def test_ran_once(self):
+        for _ in range(3):
+            assert self.run({'once_clean': set()}) == []
+        assert RAN == ['once_clean']
+        assert 'once_clean' in self.coordinator.registry
+
+    def test_always_run(self):
+        for _ in range(3):
+            self.run({'once_always': set()})
+        assert RAN == ['once_always'] * 3
+
+    def test_failed_task_is_ran_again(self):
+        for _ in range(2):
+            assert len(self.run({'once_fail': set()})) == 1
+        assert RAN == ['once_fail'] * 2
+        assert 'once_fail' not in self.coordinator.registry
+
+    def test_recursive(self):
+        errors = self.run({'once_recursive': set()})
+        assert errors == ['job once_recursive exited with 1']
+
+    def test_workers(self, capsys):
+        pool = WorkerPool(2)
+        try:
+            executor = RunOnceExecutor(pool)
+            # once_nested's nested run waits for the once_slow ran by the other worker
+            assert TaskScheduler({'once_slow': set(), 'once_nested': set()}).run(executor, jobs=2) == []
+            assert TaskScheduler({'once_slow': set()}).run(executor) == []
+        finally:
+            pool.close()
+        out = capsys.readouterr().out
+        assert out.count('once_slow ran') == 1
+        assert 'nested errors: []' in out
+        assert self.coordinator.registry.names == ['once_slow', 'once_nested']
+
+    def test_worker_recursive(self):
+        pool = WorkerPool(1)
+        try:
+            errors = TaskScheduler({'once_recursive': set()}).run(RunOnceExecutor(pool))
+        finally:
+            pool.close()
+        assert errors == ['job once_recursive exited with 1']
+
+    def test_fail_fast_reports_finished(self):
+        """ the tasks a serial run finished before the failure was seen keep their results """
+        timeline = TaskTimeline()
+        executor = RunOnceExecutor(SerialExecutor(lambda name: HerringTasks[name]['task']))
+        errors = TaskScheduler({'once_fail': set(), 'once_clean': set()}).run(executor, on_failure=FAIL_FAST,
+                                                                             timeline=timeline)
+        assert errors == ['job once_fail exited with 1']
+        assert RAN == ['once_fail', 'once_clean']
+        assert self.coordinator.result('once_clean') == (True, None)
+        assert 'once_clean' in self.coordinator.registry
+        assert dict((timing.name, timing.error) for timing in timeline.completed()) == \
+            {'once_fail': 'job once_fail exited with 1', 'once_clean': None}
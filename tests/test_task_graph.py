@@ -0,0 +1,122 @@
+# coding=utf-8
+
+"""
+Test the compiled task graph.
+"""
+import pytest
+
+from herring.herring_runner import HerringRunner
+from herring.task_graph import TaskGraph
+from herring.task_with_args import HerringTasks, NameSpace, TaskWithArgs
+
+
+class TestTaskGraph(object):
+    """
+    Test suite for TaskGraph, the tasks are registered with the @task decorator
+    """
+
+    def setup_method(self):
+        self.saved_tasks = dict(HerringTasks)
+        HerringTasks.clear()
+
+        @TaskWithArgs()
+        def build():
+            """build"""
+
+        @TaskWithArgs(depends=['build'])
+        def test():
+            """test"""
+
+        @TaskWithArgs(dependent_of='test')
+        def lint():
+            """lint"""
+
+        with NameSpace('doc'):
+            @TaskWithArgs(depends=['html'])
+            def api():
+                """api"""
+
+            @TaskWithArgs(depends=['doc::setup'])
+            def html():
+                """html"""
+
+            @TaskWithArgs(depends=['build'])
+            def setup():
+                """setup"""
+
+        @TaskWithArgs(namespace='doc', dependent_of='api')
+        def extra():
+            """extra"""
+
+        self.herring_tasks = HerringTasks
+
+    def teardown_method(self):
+        HerringTasks.clear()
+        HerringTasks.update(self.saved_tasks)
+
+    def test_dependent_of(self):
+        graph = TaskGraph(self.herring_tasks)
+        assert graph.depends['test'] == ('build', 'lint')
+        assert graph.depends['lint'] == ()
+
+    def test_namespace(self):
+        graph = TaskGraph(self.herring_tasks)
+        assert graph.depends['doc::api'] == ('doc::html', 'doc::extra')
+        assert graph.depends['doc::html'] == ('doc::setup',)
+        assert graph.depends['doc::setup'] == ('build',)
+        assert graph.unknown == ()
+        assert graph.closure(['doc::api']) == ['doc::api', 'doc::html', 'doc::setup', 'build', 'doc::extra']
+
+    def test_unknown(self):
+        @TaskWithArgs(depends=['test', 'package'])
+        def deploy():
+            """deploy"""
+
+        @TaskWithArgs(dependent_of='release')
+        def notify():
+            """notify"""
+
+        graph = TaskGraph(self.herring_tasks)
+        assert sorted(graph.unknown) == [('deploy', 'package'), ('notify', 'release')]
+        assert graph.depends['deploy'] == ('test',)
+        assert graph.closure(['test']) == ['test', 'build', 'lint']
+        with pytest.raises(ValueError):
+            graph.closure(['deploy'])
+
+    def test_tasks_not_modified(self):
+        graph = TaskGraph(self.herring_tasks)
+        assert self.herring_tasks['test']['depends'] == ('build',)
+        assert self.herring_tasks['doc::api']['depends'] == ('html',)
+        with pytest.raises(TypeError):
+            # noinspection PyUnresolvedReferences
+            graph.depends['test'] = ()
+
+    def test_compile(self):
+        graph = TaskGraph.compile(self.herring_tasks)
+        assert TaskGraph.compile(self.herring_tasks) is graph
+
+        @TaskWithArgs()
+        def new():
+            """new"""
+
+        graph = TaskGraph.compile(self.herring_tasks)
+        assert 'new' in graph.depends
+
+        # re-registering a task with other dependencies does not change the number of tasks
+        @TaskWithArgs(depends=['build'])
+        def lint():
+            """lint"""
+
+        assert TaskGraph.compile(self.herring_tasks) is not graph
+        assert TaskGraph.compile(self.herring_tasks).depends['lint'] == ('build',)
+
+    def test_repeated_resolve(self):
+        """ resolving the dependencies again, like a nested task_execute, gives the same graph """
+        runner = HerringRunner()
+        # noinspection PyProtectedMember
+        first = runner._resolve_dependencies(['test'], self.herring_tasks)
+        for _ in range(3):
+            # noinspection PyProtectedMember
+            assert runner._resolve_dependencies(['test'], dict(self.herring_tasks)) == first
+        assert [set(level) for level in first] == [{'build', 'lint'}, {'test'}]
+        assert self.herring_tasks['test']['depends'] == ('build',)
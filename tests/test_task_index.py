@@ -0,0 +1,65 @@
+# coding=utf-8
+
+"""
+Unit tests for the task index
+"""
+import os
+import shutil
+
+from pathlib import Path
+from tempfile import mkdtemp
+
+from herring.task_index import TaskIndex
+
+TASKS = {'foo': {'task': len, 'name': 'foo', 'fullname': 'foo', 'namespace': None, 'description': 'foo task',
+                 'depends': ['bar'], 'dependent_of': None, 'kwargs': ['verbose'], 'arg_prompt': None,
+                 'help': None, 'private': False, 'configured': 'required'}}
+
+
+class TestTaskIndex(object):
+    """ Test suite for TaskIndex """
+
+    def setup_method(self):
+        self.base_dir = mkdtemp()
+        self.herringfile = os.path.join(self.base_dir, 'herringfile')
+        self.library_paths = [Path(self.base_dir, 'herringlib')]
+        os.makedirs(str(self.library_paths[0]))
+        self.write('herringfile', 'from herring.herring_app import task')
+        self.write('herringlib/lib.py', '')
+        self.index = TaskIndex(os.path.join(self.base_dir, '.herring', 'task_index.json'))
+
+    def teardown_method(self):
+        shutil.rmtree(self.base_dir)
+
+    def write(self, file_name, text):
+        with open(os.path.join(self.base_dir, file_name), 'w') as out_file:
+            out_file.write(text)
+
+    def signature(self):
+        return self.index.signature(self.herringfile, self.library_paths, ['herringlib'])
+
+    def test_round_trip(self):
+        self.index.save(self.signature(), TASKS)
+        tasks = self.index.load(self.signature())
+        assert list(tasks.keys()) == ['foo']
+        assert tasks['foo']['depends'] == ['bar']
+        assert tasks['foo']['kwargs'] == ['verbose']
+        assert 'task' not in tasks['foo']
+
+    def test_missing(self):
+        assert self.index.load(self.signature()) is None
+
+    def test_herringfile_changed(self):
+        self.index.save(self.signature(), TASKS)
+        self.write('herringfile', 'from herring.herring_app import task\n\n')
+        assert self.index.load(self.signature()) is None
+
+    def test_library_file_added(self):
+        self.index.save(self.signature(), TASKS)
+        self.write('herringlib/other.py', '')
+        assert self.index.load(self.signature()) is None
+
+    def test_settings_changed(self):
+        self.index.save(self.signature(), TASKS)
+        signature = self.index.signature(self.herringfile, self.library_paths, ['herringlib', '~/.herring'])
+        assert self.index.load(signature) is None
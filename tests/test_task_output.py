@@ -0,0 +1,81 @@
+# coding=utf-8
+
+"""
+Unit tests for the streamed task output
+"""
+import os
+import sys
+import tempfile
+from io import StringIO
+
+from herring.task_output import PrefixedOutput, StreamWriter, copy_spilled, redirect_output, stream_output
+
+
+class TestTaskOutput(object):
+    """ Test suite for StreamWriter and PrefixedOutput """
+
+    def setup_method(self):
+        self.sent = []
+
+    def test_complete_lines_are_sent(self):
+        writer = StreamWriter(self.sent.append)
+        writer.write('one\ntw')
+        writer.write('o\nthree')
+        assert self.sent == ['one\n', 'two\n']
+        writer.finish()
+        assert self.sent == ['one\n', 'two\n', 'three']
+
+    def test_partial_line_is_bounded(self):
+        writer = StreamWriter(self.sent.append, limit=4)
+        writer.write('abcdefghij')
+        assert self.sent == ['abcd', 'efgh']
+        writer.write('\n' + 'x\n' * 5)
+        assert all(len(chunk) <= 4 for chunk in self.sent)
+        assert ''.join(self.sent) == 'abcdefghij\n' + 'x\n' * 5
+
+    def test_print(self):
+        writer = StreamWriter(self.sent.append)
+        print('hello', 'world', file=writer)
+        assert self.sent == ['hello world\n']
+
+    def test_prefixed(self):
+        stream = StringIO()
+        output = PrefixedOutput(stream=stream)
+        output.write('build', 'one\ntwo\n')
+        output.write('test', 'partial')
+        assert stream.getvalue() == '[build] one\n[build] two\n[test] partial\n'
+
+    def test_colored(self):
+        stream = StringIO()
+        output = PrefixedOutput(color=True, stream=stream)
+        output.write('build', 'one\n')
+        output.write('test', 'two\n')
+        first, second = stream.getvalue().splitlines()
+        assert first.startswith('\033[') and first.endswith('[build] \033[0mone')
+        assert first[:5] != second[:5]
+
+    def test_redirect_and_copy(self):
+        with tempfile.TemporaryFile() as spill, tempfile.TemporaryFile(mode='w+') as out:
+            with redirect_output(spill.fileno()):
+                print('from python')
+                os.system('echo from the child')
+                sys.stderr.write('to stderr\n')
+            copy_spilled(spill.fileno(), prefix='process: ', stream=out)
+            out.seek(0)
+            assert out.read() == 'process: from python\nfrom the child\nto stderr\n'
+            stream = StringIO()
+            copy_spilled(spill.fileno(), stream=stream)
+            assert stream.getvalue() == 'from python\nfrom the child\nto stderr\n'
+
+    def test_empty_spill_is_not_copied(self):
+        stream = StringIO()
+        with tempfile.TemporaryFile() as spill:
+            copy_spilled(spill.fileno(), prefix='process: ', stream=stream)
+        assert stream.getvalue() == ''
+
+    def test_stream_output(self):
+        with stream_output(self.sent.append):
+            print('from python')
+            os.system('echo from the child')
+            sys.stdout.write('partial')
+        assert ''.join(self.sent) == 'from python\nfrom the child\npartial'
@@ -0,0 +1,131 @@
+# coding=utf-8
+
+"""
+Unit tests for the TaskScheduler
+"""
+import pytest
+
+from herring.parallelize import SerialExecutor
+from herring.task_scheduler import FAIL_FAST, KEEP_GOING, TaskScheduler
+
+
+class ScriptedExecutor(object):
+    """
+    Executor that finishes the running tasks in a given order.
+    """
+
+    def __init__(self, finish_order, failing=()):
+        self.finish_order = list(finish_order)
+        self.failing = set(failing)
+        self.started = []
+        self.active = set()
+        self.canceled = []
+        self.max_running = 0
+
+    @property
+    def running(self):
+        return len(self.active)
+
+    def start(self, name):
+        self.started.append(name)
+        self.active.add(name)
+        self.max_running = max(self.max_running, len(self.active))
+
+    def wait(self):
+        name = [name for name in self.finish_order if name in self.active][0]
+        self.finish_order.remove(name)
+        self.active.remove(name)
+        if name in self.failing:
+            return name, 'job {name} failed'.format(name=name)
+        return name, None
+
+    def cancel(self):
+        self.canceled = sorted(self.active)
+        self.active = set()
+        return self.canceled
+
+
+class TestTaskScheduler(object):
+    """ Test suite for TaskScheduler """
+
+    def test_dependencies_run_first(self):
+        depend_dict = {
+            'alpha': set(),
+            'beta': set(),
+            'gamma': set(['alpha']),
+            'delta': set(['beta', 'phi']),
+            'phi': set(),
+            'sigma': set(['alpha', 'delta']),
+        }
+        ran = []
+        errors = TaskScheduler(depend_dict).run(SerialExecutor(lambda name: lambda: ran.append(name)))
+        assert errors == []
+        assert sorted(ran) == sorted(depend_dict.keys())
+        for name, depends in depend_dict.items():
+            for depend in depends:
+                assert ran.index(depend) < ran.index(name)
+
+    def test_no_level_barrier(self):
+        """gamma only depends on alpha so it must start while the slow beta is still running"""
+        depend_dict = {'alpha': set(), 'beta': set(), 'gamma': set(['alpha']), 'delta': set(['beta'])}
+        executor = ScriptedExecutor(['alpha', 'gamma', 'beta', 'delta'])
+        TaskScheduler(depend_dict).run(executor)
+        assert executor.started.index('gamma') < executor.started.index('delta')
+        assert executor.finish_order == []
+
+    def test_jobs_limit(self):
+        depend_dict = dict(('task%d' % index, set()) for index in range(10))
+        executor = ScriptedExecutor(sorted(depend_dict.keys()))
+        TaskScheduler(depend_dict).run(executor, jobs=3)
+        assert executor.max_running == 3
+        assert sorted(executor.started) == sorted(depend_dict.keys())
+
+    def test_errors_are_returned(self):
+        errors = TaskScheduler({'alpha': set()}).run(SerialExecutor(lambda name: lambda: 2))
+        assert errors == ['job alpha exited with 2']
+
+    def test_undeclared_dependency(self):
+        ran = []
+        TaskScheduler({'beta': set(['alpha'])}).run(SerialExecutor(lambda name: lambda: ran.append(name)))
+        assert ran == ['alpha', 'beta']
+
+    def test_cycle(self):
+        with pytest.raises(ValueError):
+            TaskScheduler({'alpha': set(['beta']), 'beta': set(['alpha']), 'charlie': set()})
+
+    # failing alpha: gamma depends upon it, beta is running at the same time, delta would start after beta
+    FAILURE_DEPENDS = {'alpha': set(), 'beta': set(), 'gamma': set(['alpha']), 'delta': set(['beta'])}
+
+    def test_stop_on_failure(self):
+        executor = ScriptedExecutor(['alpha', 'beta', 'gamma', 'delta'], failing=['alpha'])
+        errors = TaskScheduler(self.FAILURE_DEPENDS).run(executor)
+        assert errors == ['job alpha failed']
+        assert sorted(executor.started) == ['alpha', 'beta']
+
+    def test_keep_going(self):
+        executor = ScriptedExecutor(['alpha', 'beta', 'gamma', 'delta'], failing=['alpha'])
+        errors = TaskScheduler(self.FAILURE_DEPENDS).run(executor, on_failure=KEEP_GOING)
+        assert errors == ['job alpha failed']
+        assert sorted(executor.started) == ['alpha', 'beta', 'delta']
+
+    def test_fail_fast(self):
+        executor = ScriptedExecutor(['alpha', 'beta', 'gamma', 'delta'], failing=['alpha'])
+        errors = TaskScheduler(self.FAILURE_DEPENDS).run(executor, on_failure=FAIL_FAST)
+        assert errors == ['job alpha failed']
+        assert executor.canceled == ['beta']
+        assert executor.running == 0
+
+    def test_longest_path_first(self):
+        # short is ready first but the chain through slow is longer
+        depend_dict = {'short': set(), 'slow': set(), 'after_slow': set(['slow'])}
+        executor = ScriptedExecutor(['short', 'slow', 'after_slow'])
+        scheduler = TaskScheduler(depend_dict, estimates={'short': 1.0, 'slow': 5.0})
+        assert scheduler.priority == {'short': 1.0, 'slow': 6.0, 'after_slow': 1.0}
+        scheduler.run(executor, jobs=1)
+        assert executor.started == ['slow', 'short', 'after_slow']
+
+    def test_default_estimate(self):
+        depend_dict = {'known': set(), 'unknown': set()}
+        executor = ScriptedExecutor(['known', 'unknown'])
+        TaskScheduler(depend_dict, estimates={'known': 1.0}, default_estimate=10.0).run(executor, jobs=1)
+        assert executor.started == ['unknown', 'known']
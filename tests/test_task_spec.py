@@ -0,0 +1,63 @@
+# coding=utf-8
+
+"""
+Test the TaskSpec task records.
+"""
+import pytest
+
+from herring.task_spec import TaskSpec
+from herring.task_with_args import HerringTasks, NameSpace, TaskWithArgs
+
+
+def build():
+    """build the project"""
+    return 'built'
+
+
+class TestTaskSpec(object):
+    """
+    Test suite for TaskSpec
+    """
+
+    def setup_method(self):
+        self.saved_tasks = dict(HerringTasks)
+        HerringTasks.clear()
+
+    def teardown_method(self):
+        HerringTasks.clear()
+        HerringTasks.update(self.saved_tasks)
+
+    def test_registered(self):
+        with NameSpace('proj'):
+            TaskWithArgs(depends=['clean'], help='--fast')(build)
+        spec = HerringTasks['proj::build']
+        assert isinstance(spec, TaskSpec)
+        assert spec['task']() == 'built'
+        assert spec.function is build
+        assert spec['depends'] == ('clean',)
+        assert spec['fullname'] == 'proj::build'
+        assert spec['description'] == 'build the project'
+        assert spec.get('help') == '--fast'
+        assert spec.get('no_such_key') is None
+
+    def test_mapping(self):
+        spec = TaskSpec(name='build', fullname='build', depends=['clean'])
+        assert set(spec.keys()) == set(TaskSpec.FIELDS)
+        assert 'task' in spec
+        assert 'task_id' not in spec
+        assert dict(spec)['depends'] == ('clean',)
+        with pytest.raises(KeyError):
+            # noinspection PyStatementEffect
+            spec['task_id']
+
+    def test_compact(self):
+        spec = TaskSpec(name='build')
+        assert not hasattr(spec, '__dict__')
+        with pytest.raises(AttributeError):
+            spec.extra = True
+
+    def test_ids_and_interned_names(self):
+        first = TaskSpec(fullname=''.join(['pro', 'j::build']), depends=[''.join(['cl', 'ean'])])
+        second = TaskSpec(fullname='proj::test', depends=[''.join(['cle', 'an'])])
+        assert second.task_id > first.task_id
+        assert first.depends[0] is second.depends[0]
@@ -0,0 +1,70 @@
+# coding=utf-8
+
+"""
+Unit tests for the task state database
+"""
+import os
+import shutil
+
+from tempfile import mkdtemp
+
+from herring.task_state import TaskState
+
+
+class TestTaskState(object):
+    """ Test suite for TaskState """
+
+    def setup_method(self):
+        self.cwd = os.getcwd()
+        self.base_dir = mkdtemp()
+        os.chdir(self.base_dir)
+        os.makedirs('src')
+        self.write('src/a.txt', 'alpha')
+        self.write('src/b.txt', 'beta')
+        self.write('out.txt', 'alphabeta')
+        self.state_path = os.path.join(self.base_dir, '.herring', 'state.json')
+
+    def teardown_method(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.base_dir)
+
+    # noinspection PyMethodMayBeStatic
+    def write(self, file_name, text):
+        with open(file_name, 'w') as out_file:
+            out_file.write(text)
+
+    def recorded_state(self):
+        state = TaskState(self.state_path)
+        state.record('cat', ['src/*.txt'], ['out.txt'], [])
+        state.save()
+        return TaskState(self.state_path)
+
+    def test_unchanged(self):
+        assert self.recorded_state().is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
+
+    def test_never_ran(self):
+        assert not TaskState(self.state_path).is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
+
+    def test_input_changed(self):
+        state = self.recorded_state()
+        self.write('src/a.txt', 'alpha2')
+        assert not state.is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
+
+    def test_input_added(self):
+        state = self.recorded_state()
+        self.write('src/c.txt', 'charlie')
+        assert not state.is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
+
+    def test_output_removed(self):
+        state = self.recorded_state()
+        os.remove('out.txt')
+        assert not state.is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
+
+    def test_arguments_changed(self):
+        assert not self.recorded_state().is_up_to_date('cat', ['src/*.txt'], ['out.txt'], ['--verbose'])
+
+    def test_forget(self):
+        state = self.recorded_state()
+        state.forget('cat')
+        state.save()
+        assert not TaskState(self.state_path).is_up_to_date('cat', ['src/*.txt'], ['out.txt'], [])
@@ -0,0 +1,85 @@
+# coding=utf-8
+
+"""
+Unit tests for the task timing
+"""
+import json
+import os
+import tempfile
+
+from herring.parallelize import SerialExecutor
+from herring.task_scheduler import TaskScheduler
+from herring.task_timing import TaskTimeline
+
+
+class FakeClock(object):
+    """a clock that advances one second per reading"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1.0
+        return self.now
+
+
+class TestTaskTiming(object):
+    """ Test suite for TaskTimeline """
+
+    def setup_method(self):
+        self.timeline = TaskTimeline(clock=FakeClock())
+
+    def test_record(self):
+        self.timeline.queued('build', ['clean'])
+        self.timeline.started('build')
+        self.timeline.ran('build', 42, 0, 100)
+        self.timeline.finished('build', None)
+        timing = self.timeline.completed()[0]
+        assert (timing.name, timing.depends, timing.pid, timing.exitcode, timing.output_size) == \
+            ('build', ['clean'], 42, 0, 100)
+        assert (timing.queued, timing.started, timing.finished) == (1.0, 2.0, 3.0)
+        assert (timing.wait, timing.duration) == (1.0, 1.0)
+
+    def test_scheduler(self):
+        errors = TaskScheduler({'alpha': set(), 'beta': set(['alpha'])}).run(
+            SerialExecutor(lambda name: lambda: 3 if name == 'beta' else 0), timeline=self.timeline)
+        assert len(errors) == 1
+        timings = self.timeline.completed()
+        assert [(timing.name, timing.depends) for timing in timings] == [('alpha', []), ('beta', ['alpha'])]
+        assert timings[0].error is None
+        assert timings[1].error == errors[0]
+        assert timings[1].queued >= timings[0].finished
+
+    def test_slowest_and_summary(self):
+        for name, ticks in [('fast', 0), ('slow', 3), ('medium', 1)]:
+            self.timeline.queued(name)
+            self.timeline.started(name)
+            for _ in range(ticks):
+                self.timeline._clock()
+            self.timeline.finished(name, None)
+        assert [timing.name for timing in self.timeline.slowest(2)] == ['slow', 'medium']
+        summary = self.timeline.summary(2)
+        assert summary[0] == 'Slowest tasks:'
+        assert summary[2].split()[:2] == ['slow', '4.000s']
+        assert len(summary) == 4
+
+    def test_trace(self):
+        self.timeline.queued('build', ['clean'])
+        self.timeline.started('build')
+        self.timeline.ran('build', 42, 0, 100)
+        self.timeline.finished('build', None)
+        self.timeline.started('unfinished')
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            self.timeline.write_trace(path, jobs=4)
+            with open(path) as trace_file:
+                trace = json.load(trace_file)
+        finally:
+            os.remove(path)
+        tasks = [event for event in trace['traceEvents'] if event['ph'] == 'X']
+        assert len(tasks) == 1
+        assert (tasks[0]['name'], tasks[0]['tid'], tasks[0]['ts'], tasks[0]['dur']) == ('build', 42, 2000000, 1000000)
+        assert tasks[0]['args']['depends'] == ['clean']
+        assert trace['otherData']['jobs'] == 4
+        assert {'name': 'worker 42'} in [event['args'] for event in trace['traceEvents'] if event['ph'] == 'M']
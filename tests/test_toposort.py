@@ -0,0 +1,45 @@
+# coding=utf-8
+
+"""
+Unit tests for the linear time topological ordering
+"""
+
+import pytest
+
+from herring.support.toposort import CyclicDependencyError, DependencyGraph, toposort
+
+
+class TestToposort(object):
+    """ Test suite for DependencyGraph """
+
+    def test_levels(self):
+        data = {2: [11], 9: [11, 8], 10: [11, 3], 11: [7, 5], 8: [7, 3]}
+        assert [sorted(level) for level in toposort(data)] == [[3, 5, 7], [8, 11], [2, 9, 10]]
+
+    def test_order(self):
+        data = {2: [11], 9: [11, 8], 10: [11, 3], 11: [7, 5], 8: [7, 3]}
+        order = list(DependencyGraph(data).order())
+        assert sorted(order) == [2, 3, 5, 7, 8, 9, 10, 11]
+        for item, depends in data.items():
+            assert all(order.index(depend) < order.index(item) for depend in depends)
+
+    def test_self_dependency(self):
+        assert list(toposort({'a': ['a', 'b']})) == [{'b'}, {'a'}]
+
+    def test_long_chain(self):
+        data = dict((index, [index - 1]) for index in range(1, 100000))
+        assert list(DependencyGraph(data).order()) == list(range(100000))
+
+    def test_cycle_path(self):
+        with pytest.raises(CyclicDependencyError) as ex:
+            list(toposort({'a': ['b'], 'b': ['c'], 'c': ['a', 'd'], 'd': [], 'e': ['a']}))
+        assert ex.value.cycle == ['a', 'b', 'c', 'a']
+        assert str(ex.value) == 'Cyclic dependency: a -> b -> c -> a'
+
+    def test_cycle_beyond_start(self):
+        with pytest.raises(CyclicDependencyError) as ex:
+            DependencyGraph({'a': ['x'], 'x': ['y'], 'y': ['x']}).verify()
+        assert ex.value.cycle == ['x', 'y', 'x']
+
+    def test_no_cycle(self):
+        assert DependencyGraph({'a': ['b']}).find_cycle() is None
@@ -0,0 +1,105 @@
+# coding=utf-8
+
+"""
+Unit tests for the WorkerPool
+"""
+import os
+import time
+
+from herring.task_output import STREAM
+from herring.task_scheduler import FAIL_FAST, TaskScheduler
+from herring.task_with_args import HerringTasks, TaskWithArgs
+from herring.worker_pool import WorkerPool
+
+
+def register(name, function):
+    """register the function as a task with the given name"""
+    function.__name__ = name
+    TaskWithArgs()(function)
+
+
+def register_tasks():
+    """the worker initializer for workers that are not forked"""
+    register('pool_pid', lambda: print(os.getpid()))
+    register('pool_fail', lambda: 3)
+    register('pool_child', lambda: os.system('echo from the child process'))
+    register('pool_sleep', lambda: time.sleep(30))
+
+
+class TestWorkerPool(object):
+    """ Test suite for WorkerPool """
+
+    def setup_method(self):
+        register_tasks()
+
+    def teardown_method(self):
+        for name in ['pool_pid', 'pool_fail', 'pool_child', 'pool_sleep']:
+            del HerringTasks[name]
+
+    def test_workers_are_reused(self, capsys):
+        pool = WorkerPool(1)
+        try:
+            for _ in range(3):
+                assert TaskScheduler({'pool_pid': set()}).run(pool) == []
+        finally:
+            pool.close()
+        pids = set(line.split()[-1] for line in capsys.readouterr().out.splitlines() if line.startswith('process:'))
+        assert len(pids) == 1
+        assert str(os.getpid()) not in pids
+
+    def test_exit_code_is_reported(self):
+        pool = WorkerPool(2)
+        try:
+            errors = TaskScheduler({'pool_fail': set(), 'pool_pid': set(['pool_fail'])}).run(pool, jobs=2)
+        finally:
+            pool.close()
+        assert errors == ['job pool_fail exited with 3']
+
+    def test_spawn_initializer(self):
+        pool = WorkerPool(1, start_method='spawn', initializer=register_tasks)
+        try:
+            errors = TaskScheduler({'pool_fail': set()}).run(pool)
+        finally:
+            pool.close()
+        assert errors == ['job pool_fail exited with 3']
+
+    def test_stream_output(self, capsys):
+        pool = WorkerPool(1, output=STREAM)
+        try:
+            assert TaskScheduler({'pool_pid': set()}).run(pool) == []
+        finally:
+            pool.close()
+        lines = capsys.readouterr().out.splitlines()
+        pids = [line.split()[-1] for line in lines if line.startswith('[pool_pid] ')]
+        assert len(pids) == 1 and pids[0].isdigit()
+        assert not [line for line in lines if line.startswith('process:')]
+
+    def test_child_process_output_is_captured(self, capfd):
+        pool = WorkerPool(1)
+        try:
+            assert TaskScheduler({'pool_child': set()}).run(pool) == []
+        finally:
+            pool.close()
+        assert 'process: from the child process\n' in capfd.readouterr().out
+
+    def test_stream_child_process_output(self, capsys):
+        pool = WorkerPool(1, output=STREAM)
+        try:
+            assert TaskScheduler({'pool_child': set()}).run(pool) == []
+        finally:
+            pool.close()
+        assert '[pool_child] from the child process' in capsys.readouterr().out.splitlines()
+
+    def test_fail_fast_cancels_running_tasks(self):
+        pool = WorkerPool(2)
+        try:
+            started = time.time()
+            errors = TaskScheduler({'pool_sleep': set(), 'pool_fail': set()}).run(pool, jobs=2,
+                                                                                   on_failure=FAIL_FAST)
+            assert time.time() - started < 10
+            assert pool.running == 0
+            # the pool is still usable
+            assert TaskScheduler({'pool_pid': set()}).run(pool) == []
+        finally:
+            pool.close()
+        assert errors == ['job pool_fail exited with 3']